@@ -4,5 +4,100 @@ TIMEOUT_IN_SECONDS = 10
 
 VEHICLE_TYPES = ['Car', 'Truck']
 BOOKING_HTTP_METHODS = ['POST', 'PUT']
-RESPONSE_TYPES = ["JSON_id", "XML_uuid"]
 DEFAULT_SEARCH_PERIOD_IN_DAYS = 7
+# Longest date range a search may cover; longer ranges are rejected, as they fan out into many chunk requests
+MAX_SEARCH_RANGE_IN_DAYS = 92
+
+# Responses of at least this size are compressed with brotli (requires the "brotli" package) or gzip
+COMPRESSION_MINIMUM_SIZE_IN_BYTES = 1024
+GZIP_COMPRESSION_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Upper bounds for concurrent requests to workshop APIs during a search
+MAX_CONCURRENT_UPSTREAM_REQUESTS = 20
+MAX_CONCURRENT_UPSTREAM_REQUESTS_PER_HOST = 4
+
+# Token bucket per workshop API host, shared by availability and booking requests: sustained requests per second
+# and burst size (None disables the limit). Requests above the rate wait for their turn, up to the max wait.
+UPSTREAM_RATE_LIMIT_PER_SECOND = 20
+UPSTREAM_RATE_LIMIT_BURST = 40
+UPSTREAM_RATE_LIMIT_MAX_WAIT_IN_SECONDS = 10
+# A 429 answer pauses its host for the Retry-After (or this default), after which the request is retried
+UPSTREAM_RETRY_AFTER_DEFAULT_IN_SECONDS = 1
+UPSTREAM_MAX_RETRIES_AFTER_THROTTLING = 1
+
+# Shared HTTP client used for all requests to workshop APIs
+HTTP_POOL_MAX_CONNECTIONS = 100
+HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS = 40
+HTTP_POOL_KEEPALIVE_EXPIRY_IN_SECONDS = 30
+HTTP2_ENABLED = False  # Requires the "h2" package (pip install "httpx[http2]")
+
+# Cache of parsed workshop slots, bucketed per workshop and calendar day
+SLOT_CACHE_TTL_IN_SECONDS = 60
+SLOT_CACHE_MAX_SLOTS = 100_000
+# Stale-while-revalidate: expired days up to this age (beyond the TTL) are served right away, marked with their age,
+# while they are refreshed in the background. Overridden per workshop by Workshop.max_stale_in_seconds; 0 disables it.
+# Opt-in, since the plain list returned by /available-times carries no status or age to mark stale slots with.
+SLOT_CACHE_MAX_STALE_IN_SECONDS = 0
+# Failed upstream requests are remembered this long, so a broken workshop does not cost a request on every search
+NEGATIVE_CACHE_TTL_IN_SECONDS = 10
+
+# Long searches are requested from each workshop in chunks of at most this many days, fetched concurrently
+# and cached separately (None disables it). Workshop.max_range_in_days caps a single request further.
+FETCH_CHUNK_SIZE_IN_DAYS = 14
+
+# Live slot subscriptions (server-sent events): subscribers with the same filters share one computation, repeated at
+# this interval and soon after a workshop answered with fresh slots, but at most once per min interval
+SLOT_SUBSCRIPTION_INTERVAL_IN_SECONDS = 30
+SLOT_SUBSCRIPTION_MIN_INTERVAL_IN_SECONDS = 1
+SLOT_SUBSCRIPTION_QUEUE_SIZE = 100
+SLOT_SUBSCRIPTION_KEEPALIVE_IN_SECONDS = 15
+
+# Changes logged per workshop for since tokens of /available-times; older tokens get that workshop's full slot list
+SLOT_VERSION_HISTORY_SIZE = 1000
+
+# Workshops are served from an in-memory snapshot that is invalidated by writes in this process.
+# Set to a number of seconds to also check a version counter in the DB for writes made by other processes.
+WORKSHOP_REGISTRY_VERSION_CHECK_IN_SECONDS = None
+
+# Circuit breaker per workshop: after this many consecutive failures the workshop is skipped,
+# and probed again in the background once the reset timeout has passed
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 3
+CIRCUIT_BREAKER_RESET_TIMEOUT_IN_SECONDS = 30
+CIRCUIT_BREAKER_SERVE_STALE_SLOTS = True
+
+# Adaptive timeouts and hedged requests, derived from each workshop's recent latencies.
+# Both can be overridden per workshop (Workshop.timeout_in_seconds, Workshop.hedge_after_in_ms).
+LATENCY_WINDOW_SIZE = 200
+LATENCY_MIN_SAMPLES = 20
+ADAPTIVE_TIMEOUT_MULTIPLIER = 3
+ADAPTIVE_TIMEOUT_MIN_IN_SECONDS = 1
+HEDGING_ENABLED = True
+HEDGING_MAX_FRACTION = 0.1  # At most this share of requests to a workshop may be hedged
+
+# Last response per workshop and request URL: used for conditional requests (ETag/Last-Modified),
+# and to skip parsing when an upstream without validators returns an identical body. 0 disables it.
+# The memo is also bounded by the number of slots it holds, and only buffers bodies up to the given size
+# to compare them before parsing; larger ones are hashed while they are parsed.
+RESPONSE_MEMO_MAX_ENTRIES = 1000
+RESPONSE_MEMO_MAX_SLOTS = 100_000
+RESPONSE_MEMO_MAX_BUFFERED_BYTES = 256 * 1024
+
+# Response bodies of at least this size are parsed in a worker pool instead of on the event loop (None disables it).
+# "thread" keeps the overhead low; "process" also takes the parsing off the GIL, which helps most with huge XML bodies.
+PARSE_OFFLOAD_THRESHOLD_IN_BYTES = 256 * 1024
+PARSE_OFFLOAD_EXECUTOR = "thread"
+PARSE_OFFLOAD_MAX_WORKERS = 4
+
+# Background slot refresher: polls every active workshop for a rolling horizon of days and stores
+# the slots in the database, so searches are answered by a local query instead of upstream requests.
+# Each workshop's polling interval shrinks while its slots keep changing and grows while they do not.
+SLOT_REFRESHER_ENABLED = False
+SLOT_REFRESH_HORIZON_IN_DAYS = 30
+SLOT_REFRESH_MIN_INTERVAL_IN_SECONDS = 30
+SLOT_REFRESH_MAX_INTERVAL_IN_SECONDS = 900
+SLOT_REFRESH_TICK_IN_SECONDS = 5
+SLOT_STORE_MAX_AGE_IN_SECONDS = 1800  # Older stored slots are not served; the workshop is requested live instead
+# Workers sharing the database refresh each workshop only while holding its lease. Leases are renewed every tick,
+# so this must be well above SLOT_REFRESH_TICK_IN_SECONDS; a dead worker's workshops are taken over once it expires.
+SLOT_REFRESH_LEASE_IN_SECONDS = 60
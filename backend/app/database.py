@@ -1,14 +1,45 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from app.config import DB_PATH
 
 
 DATABASE_URL = f"sqlite:///{DB_PATH}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DB_PATH}"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# WAL lets readers work alongside a writer; the other pragmas trade a little durability on power loss for speed
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+}
+
+
+def apply_sqlite_pragmas(dbapi_connection, _connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def enable_sqlite_pragmas(engine):
+    """
+    Apply SQLITE_PRAGMAS to every new connection of a sync or async engine.
+    """
+    event.listen(getattr(engine, "sync_engine", engine), "connect", apply_sqlite_pragmas)
+    return engine
+
+
+engine = enable_sqlite_pragmas(create_engine(DATABASE_URL, connect_args={"check_same_thread": False}))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async path for async routes: queries run on aiosqlite's worker thread instead of blocking the event loop
+async_engine = enable_sqlite_pragmas(create_async_engine(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -22,3 +53,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Create and return a new async database session.
+    This should be used as a FastAPI dependency of async routes.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,16 +1,42 @@
 import traceback
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.responses import RedirectResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routes import booking_routes, workshop_routes
+import app.config as app_config
+from app.compression import CompressionMiddleware
+from app.routes import booking_routes, workshop_routes, admin_routes
+from app.services.http_client import start_http_client, close_http_client
+from app.services.parse_offload import shutdown_parse_offload
+from app.services.slot_refresher import start_slot_refresher, stop_slot_refresher
+from app.services.slot_subscriptions import stop_slot_subscriptions
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    await start_http_client()
+    start_slot_refresher()
+    yield
+    stop_slot_subscriptions()
+    await stop_slot_refresher()
+    await close_http_client()
+    shutdown_parse_offload()
 
 
 app = FastAPI(
     title="Tire Change Booking App",
     version="1.0.0",
     debug=True,
+    lifespan=lifespan,
+)
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=app_config.COMPRESSION_MINIMUM_SIZE_IN_BYTES,
+    gzip_level=app_config.GZIP_COMPRESSION_LEVEL,
+    brotli_quality=app_config.BROTLI_QUALITY,
 )
 
 app.add_middleware(
@@ -24,6 +50,7 @@ app.add_middleware(
 
 app.include_router(booking_routes.router, prefix="/api/booking", tags=["Booking"])
 app.include_router(workshop_routes.router, prefix="/api/workshops", tags=["Workshops"])
+app.include_router(admin_routes.router, prefix="/api/admin", tags=["Admin"])
 
 
 @app.get("/", include_in_schema=False)
@@ -0,0 +1,63 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import Workshop
+
+
+def add_missing_columns(connection):
+    """
+    Adds columns that exist in the models but not yet in the database tables.
+    SQLite can only add nullable columns or columns with a constant default, which covers all additions so far.
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+            added.append(f"{table.name}.{column.name}")
+
+    return added
+
+
+def backfill_normalized_workshop_fields(connection):
+    """
+    Fills the normalized name, city and vehicle type links of workshops created before they existed.
+    """
+    with Session(bind=connection) as db:
+        workshops = db.query(Workshop).filter(
+            (Workshop.name_normalized.is_(None)) | (Workshop.city_normalized.is_(None)) | (~Workshop.vehicle_type_links.any())
+        ).all()
+        for workshop in workshops:
+            # Re-assigning runs the model validators that maintain the normalized fields
+            workshop.name = workshop.name
+            workshop.city = workshop.city
+            workshop.vehicle_types = workshop.vehicle_types
+        db.flush()
+        return len(workshops)
+
+
+def migrate_db(engine):
+    """
+    Brings an existing database up to date with the models: creates new tables and indexes,
+    adds new columns and backfills derived data.
+    """
+    with engine.begin() as connection:
+        added_columns = add_missing_columns(connection)
+        # Creates missing tables, and the indexes of tables it creates
+        Base.metadata.create_all(connection)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+        backfilled = backfill_normalized_workshop_fields(connection)
+
+    return {"added_columns": added_columns, "backfilled_workshops": backfilled}
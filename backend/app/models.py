@@ -1,6 +1,8 @@
-from datetime import datetime
+import functools
+from datetime import date, datetime, timedelta, timezone
 
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, Float, Date, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship, validates
 from pydantic import BaseModel
 
 from app.database import Base
@@ -21,13 +23,154 @@ class Workshop(Base):
     booking_http_method = Column(String, nullable=False)
     booking_body = Column(String, nullable=False)
 
+    # Per-workshop overrides of the adaptive request timeout and hedging delay (0 disables hedging)
+    timeout_in_seconds = Column(Float, nullable=True)
+    hedge_after_in_ms = Column(Integer, nullable=True)
+    # Per-workshop override of how stale served slots may be (0 disables stale-while-revalidate)
+    max_stale_in_seconds = Column(Integer, nullable=True)
+    # Longest date range, in days, that the workshop API accepts in one request
+    max_range_in_days = Column(Integer, nullable=True)
+
+    # Lowercase copies for indexed, case-insensitive filtering
+    name_normalized = Column(String, index=True)
+    city_normalized = Column(String, index=True)
+    vehicle_type_links = relationship("WorkshopVehicleType", cascade="all, delete-orphan", lazy="selectin")
+
+    @validates("name", "city")
+    def normalize_search_field(self, key, value):
+        setattr(self, f"{key}_normalized", value.lower() if value is not None else None)
+        return value
+
+    @validates("vehicle_types")
+    def normalize_vehicle_types(self, _key, value):
+        vehicle_types = split_vehicle_types(value)
+        existing_links = {link.vehicle_type: link for link in self.vehicle_type_links}
+        self.vehicle_type_links = [
+            existing_links.get(vehicle_type) or WorkshopVehicleType(vehicle_type=vehicle_type)
+            for vehicle_type in vehicle_types
+        ]
+        return value
+
+
+class WorkshopVehicleType(Base):
+    __tablename__ = 'workshop_vehicle_types'
+
+    id_workshop = Column(Integer, ForeignKey('workshops.id_workshop', ondelete="CASCADE"), primary_key=True)
+    vehicle_type = Column(String, primary_key=True, index=True)
+
+
+def split_vehicle_types(vehicle_types):
+    """
+    Turns a comma-joined vehicle types string into a list of unique lowercase types.
+    """
+    return list(dict.fromkeys(vt for vt in (vehicle_types or "").lower().split(",") if vt))
+
+
+class RegistryVersion(Base):
+    """
+    Change counters shared by all processes using the same database.
+    """
+    __tablename__ = 'registry_versions'
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class StoredSlot(Base):
+    """
+    Available time slot stored by the background slot refresher.
+    slot_datetime is kept in UTC without a timezone, slot_date is the date as given by the workshop API.
+    """
+    __tablename__ = 'stored_slots'
+    __table_args__ = (
+        Index('ix_stored_slots_workshop_date', 'id_workshop', 'slot_date'),
+    )
+
+    id_workshop = Column(Integer, ForeignKey('workshops.id_workshop', ondelete="CASCADE"), primary_key=True)
+    id_slot = Column(String, primary_key=True)
+    slot_date = Column(Date, nullable=False)
+    slot_datetime = Column(DateTime, nullable=False)
+    utc_offset = Column(Integer, default=0)  # Offset of the workshop's time zone in seconds
+
+
+class SlotRefreshState(Base):
+    """
+    The date range covered by a workshop's stored slots and when it was last refreshed (UTC).
+    """
+    __tablename__ = 'slot_refresh_states'
+
+    id_workshop = Column(Integer, ForeignKey('workshops.id_workshop', ondelete="CASCADE"), primary_key=True)
+    covered_from = Column(Date, nullable=False)
+    covered_to = Column(Date, nullable=False)
+    refreshed_at = Column(DateTime, nullable=False)
+    fingerprint = Column(String, nullable=False)
+
+
+class RefreshLease(Base):
+    """
+    Ownership of a workshop's slot refresh by one worker process, valid until expires_at (UTC).
+    """
+    __tablename__ = 'refresh_leases'
+
+    id_workshop = Column(Integer, ForeignKey('workshops.id_workshop', ondelete="CASCADE"), primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
 
 class TimeSlot(BaseModel):
+    """
+    API schema of a time slot. Internally slots are handled as Slot objects, which are not validated again.
+    """
     id_workshop: int
     id_slot: str
     slot_datetime: datetime
 
 
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@functools.lru_cache(maxsize=None)
+def slot_timezone(utc_offset):
+    return timezone.utc if utc_offset == 0 else timezone(timedelta(seconds=utc_offset))
+
+
+class Slot:
+    """
+    Compact internal representation of an available time slot, used from parsing to serialization.
+    The time is a POSIX timestamp plus the UTC offset given by the workshop API, so filtering and sorting
+    compare plain numbers, and datetimes are only created when a slot is serialized.
+    """
+    __slots__ = ("id_workshop", "id_slot", "timestamp", "utc_offset")
+
+    def __init__(self, id_workshop, id_slot, timestamp, utc_offset=0):
+        self.id_workshop = id_workshop
+        self.id_slot = id_slot
+        self.timestamp = timestamp
+        self.utc_offset = utc_offset
+
+    @classmethod
+    def from_datetime(cls, id_workshop, id_slot, slot_datetime):
+        offset = slot_datetime.utcoffset()
+        return cls(id_workshop, id_slot, slot_datetime.timestamp(), int(offset.total_seconds()) if offset else 0)
+
+    @property
+    def slot_datetime(self):
+        return datetime.fromtimestamp(self.timestamp, slot_timezone(self.utc_offset))
+
+    @property
+    def day(self):
+        """
+        The date of the slot in the workshop's time zone.
+        """
+        return date.fromordinal(EPOCH_ORDINAL + int((self.timestamp + self.utc_offset) // 86400))
+
+    def to_dict(self):
+        return {"id_workshop": self.id_workshop, "id_slot": self.id_slot, "slot_datetime": self.slot_datetime}
+
+    def __repr__(self):
+        return f"Slot({self.id_workshop!r}, {self.id_slot!r}, {self.slot_datetime.isoformat()!r})"
+
+
 SAMPLE_WORKSHOP_DATA = {
     "name": "Sample Workshop",
     "city": "Sample City",
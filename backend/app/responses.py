@@ -0,0 +1,27 @@
+import orjson
+from fastapi.responses import JSONResponse
+
+from app.models import Slot
+
+
+def encode_default(value):
+    if isinstance(value, Slot):
+        return value.to_dict()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content):
+    """
+    Serialize JSON types, dates, datetimes and Slots straight to bytes.
+    """
+    return orjson.dumps(content, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response serialized with orjson. Returning it from a route skips FastAPI's jsonable_encoder,
+    which walks every value in Python before serializing.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,132 @@
+from fastapi import APIRouter, HTTPException
+
+from app.services.circuit_breaker import get_circuit_breakers
+from app.services.failure_cache import get_failure_cache
+from app.services.http_client import get_http_pool_stats
+from app.services.latency_stats import get_latency_stats
+from app.services.parse_offload import get_parse_offload
+from app.services.rate_limiter import get_rate_limiter
+from app.services.response_memo import get_response_memo
+from app.services.single_flight import get_upstream_flights
+from app.services.slot_cache import get_slot_cache
+from app.services.slot_refresher import get_slot_refresher
+from app.services.slot_subscriptions import get_slot_subscriptions
+from app.services.slot_versions import get_slot_versions
+from app.services.workshop_registry import get_workshop_registry
+
+
+router = APIRouter()
+
+
+@router.get("/http-pool", summary="Get HTTP connection pool statistics")
+def provide_http_pool_stats():
+    """
+    Show the configuration and current state of the shared HTTP connection pool.
+    """
+    return get_http_pool_stats()
+
+
+@router.get("/rate-limits", summary="Get rate limiter queues per workshop host")
+def provide_rate_limit_stats():
+    """
+    Show each workshop host's request queue depth, waiting times and 429 answers, to size the rate limits against throughput.
+    """
+    return get_rate_limiter().stats()
+
+
+@router.get("/slot-cache", summary="Get slot cache statistics")
+def provide_slot_cache_stats():
+    """
+    Show the size and hit rate of the cache of workshop time slots.
+    """
+    return get_slot_cache().stats()
+
+
+@router.get("/coalescing", summary="Get upstream request coalescing statistics")
+def provide_coalescing_stats():
+    """
+    Show how many upstream requests were saved by sharing identical in-flight requests.
+    """
+    return get_upstream_flights().stats()
+
+
+@router.get("/response-memo", summary="Get statistics of skipped response parsing")
+def provide_response_memo_stats():
+    """
+    Show how many upstream responses were not parsed because they had not changed since the previous request.
+    """
+    return get_response_memo().stats()
+
+
+@router.get("/parse-offload", summary="Get statistics of response parsing in the worker pool")
+def provide_parse_offload_stats():
+    """
+    Show how many response bodies were parsed inline and how many in the worker pool.
+    """
+    return get_parse_offload().stats()
+
+
+@router.get("/negative-cache", summary="Get remembered upstream failures per workshop")
+def provide_negative_cache_stats():
+    """
+    Show the workshops whose last upstream request failed, and how long that failure is still reported without a new request.
+    """
+    return get_failure_cache().stats()
+
+
+@router.get("/workshop-registry", summary="Get workshop registry statistics")
+def provide_workshop_registry_stats():
+    """
+    Show the version of the in-memory workshop snapshot and how often it has been loaded.
+    """
+    return get_workshop_registry().stats()
+
+
+@router.get("/circuit-breakers", summary="Get circuit breaker state per workshop")
+def provide_circuit_breakers():
+    """
+    Show the circuit breaker state of every workshop that has been requested since startup.
+    """
+    return get_circuit_breakers().stats()
+
+
+@router.post("/circuit-breakers/{id_workshop}/reset", summary="Close the circuit breaker of a workshop")
+def reset_circuit_breaker(id_workshop: int):
+    breaker = get_circuit_breakers().find(id_workshop)
+    if breaker is None:
+        raise HTTPException(status_code=404, detail=f"No circuit breaker for workshop {id_workshop}")
+
+    breaker.reset()
+    return breaker.stats()
+
+
+@router.get("/latency", summary="Get latency statistics per workshop")
+def provide_latency_stats():
+    """
+    Show rolling latency percentiles, the derived timeout and hedging counts of every requested workshop.
+    """
+    return get_latency_stats().stats()
+
+
+@router.get("/slot-refresher", summary="Get background slot refresher state per workshop")
+def provide_slot_refresher_stats():
+    """
+    Show whether the background slot refresher runs, and each workshop's current polling interval and refresh counts.
+    """
+    return get_slot_refresher().stats()
+
+
+@router.get("/slot-subscriptions", summary="Get live slot subscriptions grouped by filters")
+def provide_slot_subscription_stats():
+    """
+    Show the filter groups of live slot subscriptions, their subscribers and how often their slots were computed.
+    """
+    return get_slot_subscriptions().stats()
+
+
+@router.get("/slot-versions", summary="Get the availability snapshot version per workshop")
+def provide_slot_version_stats():
+    """
+    Show the current snapshot version and known slot count of every workshop, as used by since tokens.
+    """
+    return get_slot_versions().stats()
@@ -1,28 +1,107 @@
+import asyncio
 from datetime import date
+from typing import List, Literal
 
 from fastapi import APIRouter, HTTPException, Query, Depends
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.services.booking_services import fetch_available_timeslots, book_timeslot
+import app.config as app_config
+from app.database import get_async_db
+from app.models import TimeSlot
+from app.responses import FastJSONResponse, dumps
+from app.services.booking_services import (
+    fetch_available_timeslots,
+    search_available_timeslots,
+    search_compact_timeslots,
+    search_changed_timeslots,
+    stream_available_timeslots,
+    book_timeslot
+)
+from app.services.slot_subscriptions import SubscriptionFilters, get_slot_subscriptions
 
 
 router = APIRouter()
 
 
-@router.get("/available-times", summary="Get available time slots for tire changes")
+def check_search_range(date_from, date_to):
+    if (date_to - date_from).days + 1 > app_config.MAX_SEARCH_RANGE_IN_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The date range must not be longer than {app_config.MAX_SEARCH_RANGE_IN_DAYS} days"
+        )
+
+
+# Slots are documented with the TimeSlot schema, but not validated again on the way out
+@router.get(
+    "/available-times",
+    summary="Get available time slots for tire changes",
+    responses={200: {"model": List[TimeSlot]}},
+)
 async def get_available_timeslots(
     date_from: date = Query(description="Start date (YYYY-MM-DD)"),
     date_to: date = Query(description="End date (YYYY-MM-DD)"),
     vehicle_types: str = Query(None, description="Vehicle types, separated by comma"),
     cities: str = Query(None, description="Cities, separated by comma"),
     workshop_name: str = Query(None, description="Workshop name"),
-    db: Session = Depends(get_db)
+    deadline_ms: int = Query(None, ge=1, description="Latency budget in milliseconds; returns partial results with per-workshop status"),
+    response_format: Literal["list", "compact"] = Query("list", alias="format", description="Response format"),
+    limit: int = Query(None, ge=1, le=1000, description="Return only this many earliest slots"),
+    cursor: str = Query(None, description="next_cursor of the previous page"),
+    since: str = Query(None, description="token of the previous response; returns only the changes since then"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Fetch list of available times filtered by date range, vehicle type, city, or workshop name.
+    With deadline_ms, limit or cursor, the response is an object with the slots, the status of every workshop
+    (ok / cached / stale / stored / timeout / error / circuit_open / throttled), and the cursor of the next page if the limit cut the slots off.
+    Stale results carry the age of their cached slots in age_in_seconds; they are refreshed in the background.
+    deadline_ms returns the slots that arrived within the budget.
+    With format=compact, slots are grouped by workshop: each workshop's details and status are sent once,
+    followed by its slots as [id_slot, epoch seconds] pairs.
+    With since (empty on the first call), the response holds only the slots added and removed since the token,
+    the workshops whose slots are sent in full (reset_workshops), and the token for the next call.
     """
+    check_search_range(date_from, date_to)
     try:
+        if since is not None:
+            return FastJSONResponse(await search_changed_timeslots(
+                db,
+                date_from,
+                date_to,
+                vehicle_types,
+                cities,
+                workshop_name,
+                since,
+                deadline_ms
+            ))
+
+        if response_format == "compact":
+            return FastJSONResponse(await search_compact_timeslots(
+                db,
+                date_from,
+                date_to,
+                vehicle_types,
+                cities,
+                workshop_name,
+                deadline_ms,
+                limit,
+                cursor
+            ))
+
+        if deadline_ms is not None or limit is not None or cursor is not None:
+            return FastJSONResponse(await search_available_timeslots(
+                db,
+                date_from,
+                date_to,
+                vehicle_types,
+                cities,
+                workshop_name,
+                deadline_ms,
+                limit,
+                cursor
+            ))
+
         timeslots = await fetch_available_timeslots(
             db,
             date_from,
@@ -31,18 +110,95 @@ async def get_available_timeslots(
             cities,
             workshop_name
         )
-        return timeslots
+        return FastJSONResponse(timeslots)
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@router.get("/available-times/stream", summary="Stream available time slots as workshops answer")
+async def stream_timeslots(
+    date_from: date = Query(description="Start date (YYYY-MM-DD)"),
+    date_to: date = Query(description="End date (YYYY-MM-DD)"),
+    vehicle_types: str = Query(None, description="Vehicle types, separated by comma"),
+    cities: str = Query(None, description="Cities, separated by comma"),
+    workshop_name: str = Query(None, description="Workshop name"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream available times as newline-delimited JSON (NDJSON).
+    Each line holds the slots of one workshop as soon as it answers; the last line is a per-workshop status summary.
+    """
+    check_search_range(date_from, date_to)
+    try:
+        results = await stream_available_timeslots(
+            db,
+            date_from,
+            date_to,
+            vehicle_types,
+            cities,
+            workshop_name
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    async def ndjson_lines():
+        async for item in results:
+            yield dumps(item) + b"\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+@router.get("/available-times/subscribe", summary="Subscribe to changes of available time slots")
+async def subscribe_timeslots(
+    date_from: date = Query(description="Start date (YYYY-MM-DD)"),
+    date_to: date = Query(description="End date (YYYY-MM-DD)"),
+    vehicle_types: str = Query(None, description="Vehicle types, separated by comma"),
+    cities: str = Query(None, description="Cities, separated by comma"),
+    workshop_name: str = Query(None, description="Workshop name"),
+):
+    """
+    Stream changes of the available times as server-sent events.
+    The first event is a "snapshot" with all matching slots; every following "delta" event holds only the
+    added slots and the removed slots (id_workshop and id_slot), including slots that were just booked.
+    Subscribers with the same filters share one computation.
+    """
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    check_search_range(date_from, date_to)
+
+    filters = SubscriptionFilters.normalized(date_from, date_to, vehicle_types, cities, workshop_name)
+
+    async def server_sent_events():
+        # Subscribe only once the body is iterated, so a client that disconnects before never leaves a group behind
+        subscriptions = get_slot_subscriptions()
+        group, queue = subscriptions.subscribe(filters)
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), app_config.SLOT_SUBSCRIPTION_KEEPALIVE_IN_SECONDS)
+                except TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield b"event: " + event.encode("ascii") + b"\ndata: " + dumps(data) + b"\n\n"
+        finally:
+            subscriptions.unsubscribe(group, queue)
+
+    return StreamingResponse(
+        server_sent_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/reserve/{id_timeslot}", summary="Book a time slot")
 async def make_timeslot_booking(
     id_timeslot: str,
     id_workshop: int = Query(description="Tire workshop ID"),
     customer_phone: str = Query(description="Customer phone number"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Book a specific time slot by ID.
@@ -4,12 +4,14 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.services.workshop_services import (
     get_workshops,
+    workshop_to_dict,
     get_filter_values,
     create_workshop,
     update_workshop,
     toggle_workshop_status
 )
 from app.models import SAMPLE_WORKSHOP_DATA
+from app.responses import FastJSONResponse
 
 
 router = APIRouter()
@@ -22,7 +24,7 @@ def list_workshops(db: Session = Depends(get_db)):
     """
     try:
         workshops = get_workshops(db, active_only=False)
-        return workshops
+        return FastJSONResponse([workshop_to_dict(workshop) for workshop in workshops])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -41,7 +43,7 @@ def provide_filter_values(db: Session = Depends(get_db)):
 @router.post("/", summary="Create new workshop")
 def add_workshop(workshop_data: dict = Body(..., examples=[SAMPLE_WORKSHOP_DATA]), db: Session = Depends(get_db)):
     try:
-        return create_workshop(db, workshop_data)
+        return FastJSONResponse(workshop_to_dict(create_workshop(db, workshop_data)))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
@@ -51,7 +53,7 @@ def add_workshop(workshop_data: dict = Body(..., examples=[SAMPLE_WORKSHOP_DATA]
 @router.put("/{id_workshop}", summary="Update workshop")
 def edit_workshop(id_workshop: int, workshop_data: dict = Body(..., examples=[SAMPLE_WORKSHOP_DATA]), db: Session = Depends(get_db)):
     try:
-        return update_workshop(db, id_workshop, workshop_data)
+        return FastJSONResponse(workshop_to_dict(update_workshop(db, id_workshop, workshop_data)))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
@@ -1,75 +1,426 @@
-import os
-import json
+import time
+import asyncio
 import datetime
+from typing import NamedTuple
 from dateutil.relativedelta import relativedelta
 
 import httpx
-from lxml import etree
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.config as app_config
+from app.services.circuit_breaker import get_circuit_breakers
+from app.services.concurrency import get_upstream_limiter
+from app.services.failure_cache import get_failure_cache
+from app.services.http_client import get_http_client
+from app.services.latency_stats import get_latency_stats
+from app.services.rate_limiter import get_rate_limiter, RateLimitExceeded
+from app.services.response_memo import get_response_memo
+from app.services.response_parsers import parse_response_chunks
+from app.services.single_flight import get_upstream_flights
+from app.services.slot_cache import get_slot_cache
+from app.services.slot_events import get_slot_events
+from app.services.slot_merge import merge_sorted_slots, encode_cursor, decode_cursor
+from app.services.slot_store import load_stored_slots, delete_stored_slot
+from app.services.slot_versions import get_slot_versions
+from app.services.workshop_adapters import WorkshopAdapter, get_workshop_adapter
+from app.services.workshop_services import find_workshops, find_active_workshop
+
+
+STATUS_OK = "ok"
+STATUS_CACHED = "cached"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+STATUS_CIRCUIT_OPEN = "circuit_open"
+STATUS_STORED = "stored"
+STATUS_STALE = "stale"
+STATUS_THROTTLED = "throttled"
+# Results that do not reflect the workshop's current availability
+FAILED_STATUSES = (STATUS_ERROR, STATUS_TIMEOUT, STATUS_CIRCUIT_OPEN, STATUS_THROTTLED)
+
+
+class WorkshopTimeslots(NamedTuple):
+    adapter: WorkshopAdapter
+    status: str
+    timeslots: list
+    error: str = None
+    age_in_seconds: float = None  # Age of the oldest cached day served in place of a fresh response
+
+
+class FetchFailure(NamedTuple):
+    status: str
+    error: str
 
-from app.config import TIMEOUT_IN_SECONDS
-from app.models import TimeSlot, Workshop
-from app.services.workshop_services import get_workshops
 
-
-def rewrite_localhost(url):
+def collect_timeslots_from_external_response(data_str, workshop, date_from, date_to):
     """
-    When in docker, replace host machine links with container links.
+    Parse timeslots from external service response.
     """
-    return url.replace('//localhost', '//myhost') if os.path.exists("/.dockerenv") else url
+    parser = get_workshop_adapter(workshop).create_parser(date_from, date_to)
+    if parser is None:
+        return []
+    return parse_response_chunks([data_str.encode("utf-8")], parser)
 
 
-def convert_to_datetime(timestamp_string):
-    return datetime.datetime.fromisoformat(timestamp_string.replace("Z", "+00:00"))
+async def select_workshops(db: AsyncSession, flt_vehicle_types=None, flt_cities=None, flt_workshop_name=None):
+    """
+    Find the workshops matching the search filters and return their compiled adapters.
+    """
+    workshops = await db.run_sync(find_workshops, flt_vehicle_types, flt_cities, flt_workshop_name)
+    return [get_workshop_adapter(workshop) for workshop in workshops]
 
 
-def collect_timeslots_from_external_response(data_str, workshop, date_from, date_to):
+async def load_stored_workshop_timeslots(db: AsyncSession, adapters, flt_date_from, flt_date_to):
     """
-    Parse timeslots from external service response.
+    With the background slot refresher enabled, read the slots of the selected workshops from the slot store.
+    Returns the stored results by workshop ID; workshops whose stored slots do not cover the dates
+    or are too old are left out and have to be requested live.
     """
-    timeslots = []
+    if not app_config.SLOT_REFRESHER_ENABLED or not adapters:
+        return {}
+
+    stored_slots = await db.run_sync(
+        load_stored_slots,
+        [adapter.id_workshop for adapter in adapters],
+        flt_date_from,
+        flt_date_to,
+        app_config.SLOT_STORE_MAX_AGE_IN_SECONDS,
+    )
+    return {
+        adapter.id_workshop: WorkshopTimeslots(adapter, STATUS_STORED, stored_slots[adapter.id_workshop])
+        for adapter in adapters if adapter.id_workshop in stored_slots
+    }
+
+
+async def request_workshop_timeslots(client, adapter, date_from, date_to):
+    """
+    Request time slots for a date range from the workshop API.
+    Requests wait for their turn in the host's rate limit; a 429 answer pauses the host for its Retry-After
+    and the request is queued again.
+    Responses that did not change since the previous request are not parsed again.
+    Once the request holds a concurrency slot, it is bounded by the workshop's adaptive timeout, and hedged
+    with a duplicate request when it runs past the workshop's usual (p95) latency. Time spent queueing
+    counts neither towards the timeout nor towards the workshop's latency.
+    Returns None when the request fails. Raises RateLimitExceeded when the host's rate limit has no slot
+    within its max wait; the workshop was not asked then, so this is not recorded as its failure.
+    """
+    if adapter.create_parser(date_from, date_to) is None:
+        return []
 
+    # Extend the time window by one day on both ends to ensure boundary dates remain included,
+    # even for APIs that compare dates using > instead of >=.
+    # Any unneeded dates will be filtered out later.
+    breaker = get_circuit_breakers().get(adapter.id_workshop)
     try:
-        if workshop.response_type == "JSON_id":
-            data_list = json.loads(data_str)
-
-            for item in data_list:
-                if item.get("available", True):
-                    slot_datetime = convert_to_datetime(item["time"])
-                    timeslots.append(TimeSlot(
-                        id_workshop=workshop.id_workshop,
-                        id_slot=str(item["id"]),
-                        slot_datetime=slot_datetime
-                    ))
-
-        elif workshop.response_type == "XML_uuid":
-            root = etree.fromstring(data_str.encode("utf-8"))
-            for available_time in root.findall(".//availableTime"):
-                uuid_element = available_time.find("uuid")
-                time_element = available_time.find("time")
-                if uuid_element is not None and time_element is not None:
-                    slot_datetime = convert_to_datetime(time_element.text)
-                    timeslots.append(TimeSlot(
-                        id_workshop=workshop.id_workshop,
-                        id_slot=uuid_element.text,
-                        slot_datetime=slot_datetime
-                    ))
+        url = adapter.availability_url(
+            date_from - relativedelta(days=1),
+            date_to + relativedelta(days=1),
+        )
+    except (KeyError, IndexError, AttributeError, ValueError) as e:
+        # A broken URL template fails this workshop only, not the whole search
+        breaker.record_failure(e)
+        print(f"Invalid availability URL of workshop {adapter.name}: {e!r}")
+        return None
+
+    latency = get_latency_stats().get(adapter.id_workshop)
+    timeout = latency.timeout(adapter.timeout_in_seconds)
+    hedge_delay = latency.hedge_delay(adapter.hedge_after_in_ms)
+
+    memo = get_response_memo()
+    window = workshop_window(adapter, date_from, date_to)
+    rate_limiter = get_rate_limiter()
+    upstream_limiter = get_upstream_limiter()
+
+    async def send():
+        """
+        Send the request and read its response; the caller holds a concurrency slot.
+        """
+        started = time.monotonic()
+        previous = memo.get(window)
+        async with client.stream("GET", url, headers=memo.request_headers(previous)) as response:
+            if response.status_code == 429:
+                rate_limiter.throttle(url, response)
+            if response.status_code == 304 and previous is not None:
+                timeslots = memo.reuse_not_modified(previous)
+            else:
+                response.raise_for_status()
+                timeslots = await memo.read_response(window, response, adapter, date_from, date_to, previous)
+        latency.record(time.monotonic() - started)
+        return timeslots
+
+    async def send_in_slot():
+        async with upstream_limiter.limit(url):
+            return await send()
 
+    def hedge():
+        # A duplicate is only sent when the host's rate limit has room for it right away
+        return send_in_slot() if rate_limiter.try_acquire(url) else None
+
+    retries = app_config.UPSTREAM_MAX_RETRIES_AFTER_THROTTLING
+    try:
+        latency.requests += 1
+        while True:
+            await rate_limiter.acquire(url)
+            async with upstream_limiter.limit(url):
+                try:
+                    timeslots = await asyncio.wait_for(run_hedged(send, hedge_delay, latency, hedge), timeout)
+                    break
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code != 429 or retries <= 0:
+                        raise
+                    retries -= 1
+        breaker.record_success()
+        return timeslots
+
+    except RateLimitExceeded:
+        raise
     except Exception as e:
-        print(f"Error when collecting time slots: {e}")
+        is_timeout = isinstance(e, (httpx.TimeoutException, TimeoutError))
+        if is_timeout:
+            latency.record_timeout(timeout)
+        breaker.record_failure(e, is_timeout=is_timeout)
+        print(f"Error fetching slots for workshop {adapter.name}: {e!r}")
+
+    return None
+
+
+async def run_hedged(attempt, hedge_delay, latency, hedge=None):
+    """
+    Run attempt(); if it has not finished after hedge_delay seconds, start hedge() (by default another attempt())
+    and return the result of whichever succeeds first. hedge() returns None when no duplicate may be sent.
+    """
+    first = asyncio.ensure_future(attempt())
+    if hedge_delay is None:
+        return await first
+
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+        if not done and latency.hedge_allowed():
+            duplicate = (hedge or attempt)()
+            if duplicate is not None:
+                latency.hedges += 1
+                tasks.add(asyncio.ensure_future(duplicate))
+
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not first:
+                        latency.hedges_won += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def fetch_and_cache_workshop_timeslots(client, adapter, date_from, date_to):
+    """
+    Request time slots for a date range and store them in the slot cache.
+    Failures are remembered for a short while, so that following searches do not repeat them;
+    a request held back by the host's rate limit is reported but not remembered.
+    Returns the slots grouped by day and None, or None and the FetchFailure when the request fails.
+    """
+    try:
+        timeslots = await request_workshop_timeslots(client, adapter, date_from, date_to)
+    except RateLimitExceeded as e:
+        print(f"Not requesting slots from workshop {adapter.name}: {e}")
+        return None, FetchFailure(STATUS_THROTTLED, str(e))
+
+    if timeslots is None:
+        breaker = get_circuit_breakers().get(adapter.id_workshop)
+        failure = FetchFailure(STATUS_TIMEOUT if breaker.consecutive_timeouts else STATUS_ERROR, breaker.last_error)
+        get_failure_cache().remember(workshop_window(adapter, date_from, date_to), *failure)
+        return None, failure
+
+    get_failure_cache().forget(workshop_window(adapter, date_from, date_to))
+    days = get_slot_cache().store_range(adapter.id_workshop, date_from, date_to, timeslots)
+    get_slot_events().workshop_refreshed(adapter.id_workshop)
+    return days, None
+
+
+def workshop_window(adapter, fetch_from, fetch_to):
+    """
+    Key of a window of days requested from a workshop, for coalescing requests and remembering failures.
+    """
+    return adapter.id_workshop, fetch_from, fetch_to
+
+
+async def fetch_workshop_window(client, adapter, fetch_from, fetch_to):
+    """
+    Fetch and cache a window of days; concurrent searches needing the same window share one upstream request.
+    """
+    return await get_upstream_flights().run(
+        workshop_window(adapter, fetch_from, fetch_to),
+        fetch_and_cache_workshop_timeslots, client, adapter, fetch_from, fetch_to
+    )
+
+
+def revalidate_workshop_window(client, adapter, fetch_from, fetch_to):
+    """
+    Refresh a window of days in the background, unless it is already being fetched.
+    """
+    get_upstream_flights().start(
+        workshop_window(adapter, fetch_from, fetch_to),
+        fetch_and_cache_workshop_timeslots, client, adapter, fetch_from, fetch_to
+    )
+
+
+def chunk_size_in_days(adapter, preferred_size=None):
+    """
+    Number of days requested from the workshop at once: the preferred size (None for no limit),
+    capped by the workshop's max_range_in_days. Requests are widened by one day on both ends,
+    so max_range_in_days leaves two days less for the chunk itself.
+    """
+    chunk_size = preferred_size
+    if adapter.max_range_in_days is not None:
+        max_chunk_size = adapter.max_range_in_days - 2
+        chunk_size = max_chunk_size if chunk_size is None else min(chunk_size, max_chunk_size)
+    return max(1, chunk_size) if chunk_size is not None else None
+
+
+def split_date_range(date_from, date_to, chunk_size_in_days):
+    """
+    Split an inclusive date range into consecutive (date_from, date_to) chunks of at most chunk_size_in_days days.
+    """
+    if chunk_size_in_days is None:
+        return [(date_from, date_to)]
+
+    chunks = []
+    while date_from <= date_to:
+        chunk_to = min(date_to, date_from + relativedelta(days=chunk_size_in_days - 1))
+        chunks.append((date_from, chunk_to))
+        date_from = chunk_to + relativedelta(days=1)
+    return chunks
+
+
+async def fetch_workshop_chunks(client, adapter, chunks):
+    """
+    Fetch and cache the (date_from, date_to) chunks of a window of days. The chunks are requested
+    concurrently, within the host limits, and each is cached and coalesced on its own.
+    Returns the slots of the fetched chunks grouped by day, and the FetchFailure of the first failed chunk, if any.
+    """
+    results = await asyncio.gather(*(
+        fetch_workshop_window(client, adapter, chunk_from, chunk_to) for chunk_from, chunk_to in chunks
+    ))
+
+    days = {}
+    for chunk_days, _ in results:
+        if chunk_days is not None:
+            days |= chunk_days
+    failures = [failure for _, failure in results if failure is not None]
+    return days, failures[0] if failures else None
+
+
+async def request_workshop_timeslots_in_chunks(client, adapter, date_from, date_to):
+    """
+    Request time slots for a date range in chunks no longer than the workshop accepts, without caching them.
+    Returns the slots without duplicates, or None when any chunk fails or is held back by the host's rate limit.
+    """
+    try:
+        results = await asyncio.gather(*(
+            request_workshop_timeslots(client, adapter, chunk_from, chunk_to)
+            for chunk_from, chunk_to in split_date_range(date_from, date_to, chunk_size_in_days(adapter))
+        ))
+    except RateLimitExceeded as e:
+        print(f"Not requesting slots from workshop {adapter.name}: {e}")
+        return None
+    if any(timeslots is None for timeslots in results):
+        return None
+    return unique_timeslots(ts for timeslots in results for ts in timeslots)
+
+
+def max_stale_in_seconds(adapter):
+    if adapter.max_stale_in_seconds is not None:
+        return adapter.max_stale_in_seconds
+    return app_config.SLOT_CACHE_MAX_STALE_IN_SECONDS
 
-    # Filter by date range
-    timeslots = [ts for ts in timeslots if date_from <= ts.slot_datetime.date() <= date_to]
 
-    # Drop due times
-    now = datetime.datetime.now(datetime.timezone.utc)
-    timeslots = [ts for ts in timeslots if ts.slot_datetime > now]
+async def fetch_workshop_timeslots(client, adapter, flt_date_from, flt_date_to):
+    """
+    Fetch available times from a single workshop, using cached days where possible.
+    Only the span of missing days is requested, widened by one day on both ends so that the
+    neighbouring days are cached as well; long spans are split into chunks fetched concurrently.
+    Errors are logged and the workshop then only contributes its last good slots, so one failing
+    workshop does not break the search.
+    While the workshop's circuit breaker is open it is not requested at all; it is probed in the background instead.
+    A window that failed recently is reported as failed again without a new request; the workshop's
+    other windows are still requested.
+    With stale-while-revalidate, recently expired days are served right away, marked with their age,
+    and refreshed in the background.
+    """
+    cache = get_slot_cache()
+    days, missing_days = cache.get_range(adapter.id_workshop, flt_date_from, flt_date_to)
+
+    status = STATUS_CACHED
+    error = None
+    age = None
+    if missing_days:
+        fetch_from = missing_days[0] - relativedelta(days=1)
+        fetch_to = missing_days[-1] + relativedelta(days=1)
+        chunks = split_date_range(fetch_from, fetch_to, chunk_size_in_days(adapter, app_config.FETCH_CHUNK_SIZE_IN_DAYS))
+        breaker = get_circuit_breakers().get(adapter.id_workshop)
+        max_stale = max_stale_in_seconds(adapter)
+        stale_days, stale_missing_days, stale_age = cache.get_stale_range(
+            adapter.id_workshop, flt_date_from, flt_date_to, max_stale
+        )
+        cached_failures = [get_failure_cache().get(workshop_window(adapter, *chunk)) for chunk in chunks]
+        failure = next((cached for cached in cached_failures if cached is not None), None)
+        pending_chunks = [chunk for chunk, cached in zip(chunks, cached_failures) if cached is None]
+
+        if not breaker.allow_request():
+            status = STATUS_CIRCUIT_OPEN
+            if breaker.probe_due():
+                breaker.start_probe(fetch_workshop_window(client, adapter, *chunks[0]))
+            if app_config.CIRCUIT_BREAKER_SERVE_STALE_SLOTS:
+                days, _, age = cache.get_stale_range(adapter.id_workshop, flt_date_from, flt_date_to, float("inf"))
+        elif not pending_chunks:
+            status, error = failure.status, failure.error
+            days, age = stale_days, stale_age
+        elif not stale_missing_days and max_stale > 0:
+            status = STATUS_STALE
+            days, age = stale_days, stale_age
+            for chunk_from, chunk_to in pending_chunks:
+                revalidate_workshop_window(client, adapter, chunk_from, chunk_to)
+        else:
+            fetched_days, fetch_failure = await fetch_workshop_chunks(client, adapter, pending_chunks)
+            fetched_days = {day: fetched_days[day] for day in missing_days if day in fetched_days}
+            failure = fetch_failure or failure
+            if failure is not None:
+                status, error = failure.status, failure.error
+                days, age = stale_days | fetched_days, stale_age
+            else:
+                status = STATUS_OK
+                days |= fetched_days
+
+    return WorkshopTimeslots(adapter, status, drop_due_timeslots(days), error, age)
+
+
+def unique_timeslots(timeslots):
+    """
+    Drop repeated slots, e.g. a slot reported by two chunk requests, keeping the first of each id_slot.
+    """
+    seen = set()
+    unique = []
+    for ts in timeslots:
+        if ts.id_slot not in seen:
+            seen.add(ts.id_slot)
+            unique.append(ts)
+    return unique
+
 
-    return timeslots
+def drop_due_timeslots(days):
+    """
+    Flatten slots grouped by day without duplicates, dropping those that became due since they were fetched.
+    """
+    now = time.time()
+    return unique_timeslots(ts for day in sorted(days) for ts in days[day] if ts.timestamp > now)
 
 
 async def fetch_available_timeslots(
-        db: Session,
+        db: AsyncSession,
         flt_date_from: datetime.date,
         flt_date_to: datetime.date,
         flt_vehicle_types: str = None,
@@ -78,63 +429,262 @@ async def fetch_available_timeslots(
 ):
     """
     Fetch available times from configured workshops.
+    Workshops are queried concurrently, within the limits set in the config.
     """
-    if flt_vehicle_types:
-        flt_vehicle_types = flt_vehicle_types.lower().split(",")
-
-    if flt_cities:
-        flt_cities = flt_cities.lower().split(",")
-
-    results = []
-
-    async with httpx.AsyncClient(timeout=TIMEOUT_IN_SECONDS) as client:
-        for workshop in get_workshops(db):
-            # Apply filters
-            if flt_workshop_name and workshop.name.lower() != flt_workshop_name.lower():
-                continue
-            if flt_vehicle_types:
-                workshop_vehicle_types = set(workshop.vehicle_types.lower().split(","))
-                if not workshop_vehicle_types.intersection(flt_vehicle_types):
-                    continue
-            if flt_cities:
-                if workshop.city.lower() not in flt_cities:
-                    continue
-
-            # Extend the time window by one day on both ends to ensure boundary dates remain included,
-            # even for APIs that compare dates using > instead of >=.
-            # Any unneeded dates will be filtered out later.
-            request_params = {
-                'date_from': flt_date_from - relativedelta(days=1),
-                'date_to': flt_date_to + relativedelta(days=1),
-            }
-            url = rewrite_localhost(workshop.url_available_times).format(**request_params)
-
-            try:
-                response = await client.get(url)
-                response.raise_for_status()
-
-                if response.status_code == 200:
-                    timeslots = collect_timeslots_from_external_response(
-                        response.text, workshop, flt_date_from, flt_date_to
-                    )
-                    results.extend(timeslots)
-
-            except Exception as e:
-                print(f"Error fetching slots for workshop {workshop.name}: {e}")
+    search_results = await search_available_timeslots(
+        db, flt_date_from, flt_date_to, flt_vehicle_types, flt_cities, flt_workshop_name
+    )
+    return search_results["slots"]
 
-    results.sort(key=lambda ts: (ts.slot_datetime, ts.id_workshop))
-    return [slot.model_dump() for slot in results]  # Convert to dict for JSON response
 
-
-async def book_timeslot(db: Session, id_timeslot: str, id_workshop: int, customer_phone: str):
+async def search_available_timeslots(
+        db: AsyncSession,
+        flt_date_from: datetime.date,
+        flt_date_to: datetime.date,
+        flt_vehicle_types: str = None,
+        flt_cities: str = None,
+        flt_workshop_name: str = None,
+        deadline_ms: int = None,
+        limit: int = None,
+        cursor: str = None
+):
+    """
+    Fetch available times from configured workshops, together with the status of every queried workshop.
+    With a limit, only the earliest slots after the cursor are returned, along with the cursor of the next page.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    workshop_results = await collect_workshop_timeslots(
+        db, flt_date_from, flt_date_to, flt_vehicle_types, flt_cities, flt_workshop_name, deadline_ms
+    )
+    slots, next_key = merge_sorted_slots([result.timeslots for result in workshop_results], limit, after)
+    return {
+        "slots": [slot.to_dict() for slot in slots],
+        "workshops": [describe_workshop_result(result) for result in workshop_results],
+        "next_cursor": encode_cursor(next_key),
+    }
+
+
+async def search_compact_timeslots(
+        db: AsyncSession,
+        flt_date_from: datetime.date,
+        flt_date_to: datetime.date,
+        flt_vehicle_types: str = None,
+        flt_cities: str = None,
+        flt_workshop_name: str = None,
+        deadline_ms: int = None,
+        limit: int = None,
+        cursor: str = None
+):
     """
-    Book a time slot via the workshop API.
+    Fetch available times grouped by workshop: the workshop details and status are sent once,
+    followed by its slots as [id_slot, epoch seconds] pairs sorted by time.
+    With a limit, the page holds the earliest slots across all workshops, as in search_available_timeslots.
     """
-    workshop = db.query(Workshop).filter(
-        Workshop.id_workshop == id_workshop,
-        Workshop.is_active
-    ).first()
-    print(id_workshop, workshop.name)
+    after = decode_cursor(cursor) if cursor else None
+    workshop_results = await collect_workshop_timeslots(
+        db, flt_date_from, flt_date_to, flt_vehicle_types, flt_cities, flt_workshop_name, deadline_ms
+    )
+    slots, next_key = merge_sorted_slots([result.timeslots for result in workshop_results], limit, after)
+
+    slots_by_workshop = {result.adapter.id_workshop: [] for result in workshop_results}
+    for slot in slots:
+        slots_by_workshop[slot.id_workshop].append(slot)
+    return {
+        "workshops": [
+            describe_compact_workshop_result(result, slots_by_workshop[result.adapter.id_workshop])
+            for result in workshop_results
+        ],
+        "next_cursor": encode_cursor(next_key),
+    }
+
+
+async def search_changed_timeslots(
+        db: AsyncSession,
+        flt_date_from: datetime.date,
+        flt_date_to: datetime.date,
+        flt_vehicle_types: str = None,
+        flt_cities: str = None,
+        flt_workshop_name: str = None,
+        since: str = None,
+        deadline_ms: int = None
+):
+    """
+    Fetch the changes of available times since the token of a previous response, along with a new token.
+    Every result updates its workshop's versioned snapshot. Workshops the token has no usable version for,
+    e.g. on the first call, are listed in reset_workshops and all their slots are sent as added:
+    clients replace those workshops' slots, and apply added and removed slots for the others.
+    """
+    versions = get_slot_versions()
+    known_versions = versions.decode_token(since, flt_date_from, flt_date_to) if since else {}
+    workshop_results = await collect_workshop_timeslots(
+        db, flt_date_from, flt_date_to, flt_vehicle_types, flt_cities, flt_workshop_name, deadline_ms
+    )
+
+    added = []
+    removed = []
+    reset_ids = []
+    token_versions = {}
+    for result in workshop_results:
+        workshop_versions = versions.workshop(result.adapter.id_workshop)
+        if result.status not in FAILED_STATUSES:
+            workshop_versions.record(flt_date_from, flt_date_to, result.timeslots)
+
+        changes = workshop_versions.changes_since(
+            known_versions.get(result.adapter.id_workshop), flt_date_from, flt_date_to
+        )
+        if changes is None:
+            reset_ids.append(result.adapter.id_workshop)
+            added.extend(workshop_versions.snapshot(flt_date_from, flt_date_to))
+        else:
+            added.extend(changes[0])
+            removed.extend(changes[1])
+        token_versions[result.adapter.id_workshop] = workshop_versions.version
+
+    added, _ = merge_sorted_slots([added])
+    return {
+        "added": [slot.to_dict() for slot in added],
+        "removed": [{"id_workshop": slot.id_workshop, "id_slot": slot.id_slot} for slot in removed],
+        "reset_workshops": reset_ids,
+        "workshops": [describe_workshop_result(result) for result in workshop_results],
+        "token": versions.encode_token(flt_date_from, flt_date_to, token_versions),
+    }
+
+
+async def collect_workshop_timeslots(
+        db: AsyncSession,
+        flt_date_from: datetime.date,
+        flt_date_to: datetime.date,
+        flt_vehicle_types: str = None,
+        flt_cities: str = None,
+        flt_workshop_name: str = None,
+        deadline_ms: int = None
+):
+    """
+    Fetch the time slots of every matching workshop concurrently; returns a WorkshopTimeslots per workshop.
+    With a deadline, the search returns whatever arrived within it: workshops that have not answered
+    by then are reported as timed out and contribute only their cached days.
+    Their upstream requests keep running in the background and fill the cache for later searches.
+    Workshops kept up to date by the background slot refresher are read from the slot store instead.
+    """
+    adapters = await select_workshops(db, flt_vehicle_types, flt_cities, flt_workshop_name)
+    stored_results = await load_stored_workshop_timeslots(db, adapters, flt_date_from, flt_date_to)
+
+    client = get_http_client()
+    tasks = {
+        adapter.id_workshop: asyncio.ensure_future(fetch_workshop_timeslots(client, adapter, flt_date_from, flt_date_to))
+        for adapter in adapters if adapter.id_workshop not in stored_results
+    }
+    if tasks:
+        await asyncio.wait(tasks.values(), timeout=deadline_ms / 1000 if deadline_ms else None)
+
+    workshop_results = []
+    for adapter in adapters:
+        task = tasks.get(adapter.id_workshop)
+        if task is None:
+            workshop_results.append(stored_results[adapter.id_workshop])
+        elif task.done():
+            workshop_results.append(task.result())
+        else:
+            task.cancel()
+            cached_days, _ = get_slot_cache().get_range(adapter.id_workshop, flt_date_from, flt_date_to)
+            workshop_results.append(WorkshopTimeslots(
+                adapter, STATUS_TIMEOUT, drop_due_timeslots(cached_days), f"No answer within {deadline_ms} ms"
+            ))
+    return workshop_results
+
+
+async def stream_available_timeslots(
+        db: AsyncSession,
+        flt_date_from: datetime.date,
+        flt_date_to: datetime.date,
+        flt_vehicle_types: str = None,
+        flt_cities: str = None,
+        flt_workshop_name: str = None
+):
+    """
+    Fetch available times from configured workshops, yielding each workshop's slots as soon as it answers.
+    The last item is a summary with the status of every queried workshop.
+    Workshops are selected right away, so the returned generator does not need the database session.
+    """
+    adapters = await select_workshops(db, flt_vehicle_types, flt_cities, flt_workshop_name)
+    stored_results = await load_stored_workshop_timeslots(db, adapters, flt_date_from, flt_date_to)
+    return _stream_workshop_timeslots(adapters, stored_results, flt_date_from, flt_date_to)
+
+
+async def _stream_workshop_timeslots(adapters, stored_results, flt_date_from, flt_date_to):
+    client = get_http_client()
+    pending = [
+        asyncio.ensure_future(fetch_workshop_timeslots(client, adapter, flt_date_from, flt_date_to))
+        for adapter in adapters if adapter.id_workshop not in stored_results
+    ]
+    summary = []
+    try:
+        for result in stored_results.values():
+            summary.append(describe_workshop_result(result))
+            yield describe_workshop_slots(result)
+
+        for next_result in asyncio.as_completed(pending):
+            result = await next_result
+            result.timeslots.sort(key=lambda ts: ts.timestamp)
+            summary.append(describe_workshop_result(result))
+            yield describe_workshop_slots(result)
+    finally:
+        # The client may disconnect before all workshops have answered
+        for task in pending:
+            task.cancel()
+
+    summary.sort(key=lambda item: item["id_workshop"])
+    yield {"type": "summary", "workshops": summary}
+
+
+def describe_workshop_slots(result):
+    return {
+        "type": "slots",
+        "id_workshop": result.adapter.id_workshop,
+        "status": result.status,
+        "slots": [slot.to_dict() for slot in result.timeslots],
+    }
+
+
+def describe_workshop_result(result):
+    return {
+        "id_workshop": result.adapter.id_workshop,
+        "name": result.adapter.name,
+        "status": result.status,
+        "slot_count": len(result.timeslots),
+        "error": result.error,
+        "age_in_seconds": describe_age(result.age_in_seconds),
+    }
+
+
+def describe_age(age_in_seconds):
+    return round(age_in_seconds, 1) if age_in_seconds is not None else None
+
+
+def describe_compact_workshop_result(result, timeslots):
+    workshop = result.adapter.workshop
+    return {
+        "id_workshop": workshop.id_workshop,
+        "name": workshop.name,
+        "city": workshop.city,
+        "address": workshop.address,
+        "vehicle_types": workshop.vehicle_types,
+        "status": result.status,
+        "error": result.error,
+        "age_in_seconds": describe_age(result.age_in_seconds),
+        "slots": [[slot.id_slot, epoch_seconds(slot.timestamp)] for slot in timeslots],
+    }
+
+
+def epoch_seconds(timestamp):
+    return int(timestamp) if timestamp.is_integer() else timestamp
+
+
+async def book_timeslot(db: AsyncSession, id_timeslot: str, id_workshop: int, customer_phone: str):
+    """
+    Book a time slot via the workshop API, within the workshop host's rate limit.
+    """
+    workshop = await db.run_sync(find_active_workshop, id_workshop)
 
     if not workshop:
         return 400, "Invalid workshop ID"
@@ -146,27 +696,38 @@ async def book_timeslot(db: Session, id_timeslot: str, id_workshop: int, custome
     if len(stripped_phone) < 7 or len(stripped_phone) > 15:
         return 400, "Phone number length must be between 7 and 15 digits"
 
-    booking_url = rewrite_localhost(workshop.url_booking).format(id=id_timeslot)
-    booking_http_method = workshop.booking_http_method
-    booking_body = workshop.booking_body.format(contact_info=customer_phone)
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.request(
-                method=booking_http_method,
-                url=booking_url,
-                data=booking_body
-            )
-
-            if response.status_code == 200:
-                return 200, "Booking successful!"
-            if response.status_code == 422:
-                return 422, "Unfortunately, this tire change time has already been booked."
-            return response.status_code, "An error occurred while booking the time slot."
-
-        except httpx.RequestError as exc:
-            print(f"Request error during booking: {exc}")
-            return 500, "Failed to connect to booking service"
-        except Exception as exc:
-            print(f"Unexpected error during booking: {exc}")
-            return 500, "An unexpected error occurred during booking"
+    booking_request = get_workshop_adapter(workshop).booking_request(id_timeslot, customer_phone)
+
+    client = get_http_client()
+    rate_limiter = get_rate_limiter()
+    retries = app_config.UPSTREAM_MAX_RETRIES_AFTER_THROTTLING
+    try:
+        while True:
+            await rate_limiter.acquire(booking_request["url"])
+            response = await client.request(**booking_request)
+            if response.status_code != 429:
+                break
+            rate_limiter.throttle(booking_request["url"], response)
+            if retries == 0:
+                return 429, "The workshop is busy, please try again later."
+            retries -= 1
+
+        if response.status_code == 200:
+            get_slot_cache().discard_slot(workshop.id_workshop, id_timeslot)
+            get_slot_events().slot_booked(workshop.id_workshop, id_timeslot)
+            if app_config.SLOT_REFRESHER_ENABLED:
+                await db.run_sync(delete_stored_slot, workshop.id_workshop, id_timeslot)
+            return 200, "Booking successful!"
+        if response.status_code == 422:
+            return 422, "Unfortunately, this tire change time has already been booked."
+        return response.status_code, "An error occurred while booking the time slot."
+
+    except RateLimitExceeded as exc:
+        print(f"Booking not sent: {exc}")
+        return 429, "The workshop is busy, please try again later."
+    except httpx.RequestError as exc:
+        print(f"Request error during booking: {exc}")
+        return 500, "Failed to connect to booking service"
+    except Exception as exc:
+        print(f"Unexpected error during booking: {exc}")
+        return 500, "An unexpected error occurred during booking"
@@ -0,0 +1,122 @@
+import time
+import asyncio
+
+import app.config as app_config
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures of one workshop API.
+    Closed: requests go through. Open: requests are skipped until the reset timeout has passed.
+    Half-open: a single background probe decides whether the circuit closes again or re-opens.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.consecutive_timeouts = 0
+        self.total_failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self.probe_task = None
+
+    def allow_request(self):
+        return self.state == CLOSED
+
+    def probe_due(self):
+        """
+        Returns True once when an open circuit should be probed, moving it to half-open.
+        """
+        if self.state != OPEN or time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+        self.state = HALF_OPEN
+        return True
+
+    def start_probe(self, coroutine):
+        self.probe_task = asyncio.ensure_future(coroutine)
+        self.probe_task.add_done_callback(self._probe_finished)
+
+    def record_success(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.consecutive_timeouts = 0
+        self.opened_at = None
+
+    def record_failure(self, error, is_timeout=False):
+        self.consecutive_failures += 1
+        self.consecutive_timeouts = self.consecutive_timeouts + 1 if is_timeout else 0
+        self.total_failures += 1
+        self.last_error = str(error) or type(error).__name__
+
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def reset(self):
+        self.record_success()
+        self.last_error = None
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "consecutive_timeouts": self.consecutive_timeouts,
+            "total_failures": self.total_failures,
+            "open_for_seconds": round(time.monotonic() - self.opened_at, 1) if self.opened_at else None,
+            "last_error": self.last_error,
+        }
+
+    def _probe_finished(self, task):
+        self.probe_task = None
+        # A probe that did not report back (e.g. it was cancelled) must not leave the circuit half-open
+        if self.state == HALF_OPEN:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Circuit breaker probe failed: {task.exception()}")
+
+
+class CircuitBreakerRegistry:
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+
+    def get(self, id_workshop):
+        breaker = self._breakers.get(id_workshop)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            self._breakers[id_workshop] = breaker
+        return breaker
+
+    def find(self, id_workshop):
+        return self._breakers.get(id_workshop)
+
+    def stats(self):
+        return {id_workshop: breaker.stats() for id_workshop, breaker in sorted(self._breakers.items())}
+
+
+_registry = None
+
+
+def get_circuit_breakers():
+    global _registry  # pylint: disable=global-statement
+    if _registry is None:
+        _registry = CircuitBreakerRegistry(
+            app_config.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            app_config.CIRCUIT_BREAKER_RESET_TIMEOUT_IN_SECONDS,
+        )
+    return _registry
+
+
+def reset_circuit_breakers():
+    global _registry  # pylint: disable=global-statement
+    _registry = None
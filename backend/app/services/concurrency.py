@@ -0,0 +1,45 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import app.config as app_config
+
+
+class UpstreamLimiter:
+    """
+    Caps the number of concurrent upstream requests, both in total and per host.
+    """
+
+    def __init__(self, max_total, max_per_host):
+        self.max_total = max_total
+        self.max_per_host = max_per_host
+        self._total = asyncio.Semaphore(max_total)
+        self._per_host = defaultdict(lambda: asyncio.Semaphore(max_per_host))
+
+    @asynccontextmanager
+    async def limit(self, url):
+        host = urlsplit(url).netloc
+        async with self._per_host[host], self._total:
+            yield
+
+
+_limiter = None
+
+
+def get_upstream_limiter():
+    """
+    Returns the process-wide limiter, creating it from the current config on first use.
+    """
+    global _limiter  # pylint: disable=global-statement
+    if _limiter is None:
+        _limiter = UpstreamLimiter(
+            app_config.MAX_CONCURRENT_UPSTREAM_REQUESTS,
+            app_config.MAX_CONCURRENT_UPSTREAM_REQUESTS_PER_HOST,
+        )
+    return _limiter
+
+
+def reset_upstream_limiter():
+    global _limiter  # pylint: disable=global-statement
+    _limiter = None
@@ -0,0 +1,84 @@
+import time
+from typing import NamedTuple
+
+import app.config as app_config
+
+
+class CachedFailure(NamedTuple):
+    status: str
+    error: str
+    failed_at: float
+
+
+class FailureCache:
+    """
+    Negative cache of failed upstream requests per (id_workshop, date_from, date_to) window,
+    the same key that coalesces concurrent requests for the window.
+    While a failure is remembered, searches report it again instead of waiting for another timeout or error;
+    other windows of the same workshop are still requested.
+    """
+
+    def __init__(self, ttl_in_seconds):
+        self.ttl_in_seconds = ttl_in_seconds
+        self._failures = {}
+        self.hits = 0
+
+    def remember(self, window, status, error):
+        if self.ttl_in_seconds > 0:
+            self.purge_expired()
+            self._failures[window] = CachedFailure(status, error, time.monotonic())
+
+    def purge_expired(self):
+        """
+        Drop expired failures, which are otherwise only removed when their window is looked up again.
+        """
+        now = time.monotonic()
+        for window in [window for window, failure in self._failures.items() if now - failure.failed_at > self.ttl_in_seconds]:
+            del self._failures[window]
+
+    def get(self, window):
+        failure = self._failures.get(window)
+        if failure is None:
+            return None
+        if time.monotonic() - failure.failed_at > self.ttl_in_seconds:
+            del self._failures[window]
+            return None
+        self.hits += 1
+        return failure
+
+    def forget(self, window):
+        self._failures.pop(window, None)
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "ttl_in_seconds": self.ttl_in_seconds,
+            "hits": self.hits,
+            "failures": [
+                {
+                    "id_workshop": id_workshop,
+                    "date_from": date_from,
+                    "date_to": date_to,
+                    "status": failure.status,
+                    "error": failure.error,
+                    "expires_in_seconds": round(max(0.0, self.ttl_in_seconds - (now - failure.failed_at)), 1),
+                }
+                for (id_workshop, date_from, date_to), failure in sorted(self._failures.items())
+                if now - failure.failed_at <= self.ttl_in_seconds
+            ],
+        }
+
+
+_cache = None
+
+
+def get_failure_cache():
+    global _cache  # pylint: disable=global-statement
+    if _cache is None:
+        _cache = FailureCache(app_config.NEGATIVE_CACHE_TTL_IN_SECONDS)
+    return _cache
+
+
+def reset_failure_cache():
+    global _cache  # pylint: disable=global-statement
+    _cache = None
@@ -0,0 +1,88 @@
+from collections import Counter
+
+import httpx
+
+import app.config as app_config
+
+
+_client = None
+
+
+def create_http_client():
+    """
+    Creates an HTTP client with a keep-alive connection pool sized from the config.
+    Connections per host are additionally bounded by the per-host upstream request limit.
+    """
+    limits = httpx.Limits(
+        max_connections=app_config.HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=app_config.HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=app_config.HTTP_POOL_KEEPALIVE_EXPIRY_IN_SECONDS,
+    )
+    return httpx.AsyncClient(
+        timeout=app_config.TIMEOUT_IN_SECONDS,
+        limits=limits,
+        http2=app_config.HTTP2_ENABLED,
+    )
+
+
+async def start_http_client():
+    global _client  # pylint: disable=global-statement
+    if _client is None:
+        _client = create_http_client()
+    return _client
+
+
+async def close_http_client():
+    global _client  # pylint: disable=global-statement
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client():
+    """
+    Returns the application-wide HTTP client.
+    It is normally created by the app lifespan, but is created on demand when used outside of it.
+    """
+    global _client  # pylint: disable=global-statement
+    if _client is None:
+        _client = create_http_client()
+    return _client
+
+
+def reset_http_client():
+    """
+    Forgets the current client without closing it. Intended for tests.
+    """
+    global _client  # pylint: disable=global-statement
+    _client = None
+
+
+def get_http_pool_stats():
+    """
+    Returns the connection pool configuration and the current state of its connections.
+    """
+    stats = {
+        "max_connections": app_config.HTTP_POOL_MAX_CONNECTIONS,
+        "max_keepalive_connections": app_config.HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS,
+        "keepalive_expiry_in_seconds": app_config.HTTP_POOL_KEEPALIVE_EXPIRY_IN_SECONDS,
+        "http2": app_config.HTTP2_ENABLED,
+        "connections": 0,
+        "idle_connections": 0,
+        "active_connections": 0,
+        "connections_per_host": {},
+    }
+    if _client is None:
+        return stats
+
+    pool = getattr(_client._transport, "_pool", None)  # pylint: disable=protected-access
+    connections = list(getattr(pool, "connections", []))
+    per_host = Counter(str(getattr(connection, "_origin", "unknown")) for connection in connections)
+    idle = sum(1 for connection in connections if connection.is_idle())
+
+    return stats | {
+        "connections": len(connections),
+        "idle_connections": idle,
+        "active_connections": len(connections) - idle,
+        "connections_per_host": dict(per_host),
+    }
@@ -0,0 +1,115 @@
+import math
+from collections import deque
+
+import app.config as app_config
+
+
+class LatencyTracker:
+    """
+    Rolling window of request latencies of one workshop API, in seconds.
+    Timed-out requests count with the timeout they ran into, so that a workshop that became slower
+    raises its own timeout instead of being cut off at the old one.
+    """
+
+    def __init__(self, window_size, min_samples):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window_size)
+        self.requests = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self.consecutive_timeouts = 0
+
+    def record(self, seconds):
+        self._samples.append(seconds)
+        self.consecutive_timeouts = 0
+
+    def record_timeout(self, seconds):
+        self._samples.append(seconds)
+        self.consecutive_timeouts += 1
+
+    def percentile(self, percent):
+        """
+        Returns the latency percentile, or None while there are too few samples to be meaningful.
+        """
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1)
+        return ordered[max(index, 0)]
+
+    def timeout(self, override=None):
+        """
+        Total time allowed for a request: the override if set, otherwise a multiple of p99
+        bounded by the configured minimum and TIMEOUT_IN_SECONDS.
+        After a timeout, TIMEOUT_IN_SECONDS applies until a request succeeds again.
+        """
+        if override:
+            return override
+        p99 = self.percentile(99)
+        if p99 is None or self.consecutive_timeouts:
+            return app_config.TIMEOUT_IN_SECONDS
+        adaptive = p99 * app_config.ADAPTIVE_TIMEOUT_MULTIPLIER
+        return min(max(adaptive, app_config.ADAPTIVE_TIMEOUT_MIN_IN_SECONDS), app_config.TIMEOUT_IN_SECONDS)
+
+    def hedge_delay(self, override_in_ms=None):
+        """
+        Seconds after which a duplicate request is sent, or None if the request should not be hedged.
+        An override of 0 disables hedging for the workshop.
+        """
+        if override_in_ms is not None:
+            return override_in_ms / 1000 if override_in_ms > 0 else None
+        if not app_config.HEDGING_ENABLED:
+            return None
+        return self.percentile(95)
+
+    def hedge_allowed(self):
+        return self.hedges < app_config.HEDGING_MAX_FRACTION * self.requests
+
+    def stats(self):
+        def rounded(value):
+            return round(value, 4) if value is not None else None
+
+        return {
+            "samples": len(self._samples),
+            "p50": rounded(self.percentile(50)),
+            "p95": rounded(self.percentile(95)),
+            "p99": rounded(self.percentile(99)),
+            "timeout": rounded(self.timeout()),
+            "consecutive_timeouts": self.consecutive_timeouts,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+        }
+
+
+class LatencyStats:
+
+    def __init__(self, window_size, min_samples):
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self._trackers = {}
+
+    def get(self, id_workshop):
+        tracker = self._trackers.get(id_workshop)
+        if tracker is None:
+            tracker = LatencyTracker(self.window_size, self.min_samples)
+            self._trackers[id_workshop] = tracker
+        return tracker
+
+    def stats(self):
+        return {id_workshop: tracker.stats() for id_workshop, tracker in sorted(self._trackers.items())}
+
+
+_stats = None
+
+
+def get_latency_stats():
+    global _stats  # pylint: disable=global-statement
+    if _stats is None:
+        _stats = LatencyStats(app_config.LATENCY_WINDOW_SIZE, app_config.LATENCY_MIN_SAMPLES)
+    return _stats
+
+
+def reset_latency_stats():
+    global _stats  # pylint: disable=global-statement
+    _stats = None
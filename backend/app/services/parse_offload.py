@@ -0,0 +1,116 @@
+import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import app.config as app_config
+from app.models import Slot
+from app.services.response_parsers import get_response_parser, parse_response_chunks
+
+
+MATERIALIZE_BATCH_SIZE = 2000
+
+
+def parse_slots_compact(response_type, id_workshop, date_from, date_to, body):
+    """
+    Parse a complete response body in a worker.
+    Returns (id_slot, timestamp, utc_offset) tuples, which are cheaper to send back from a process than objects.
+    """
+    parser = get_response_parser(response_type)(id_workshop, date_from, date_to)
+    return [(slot.id_slot, slot.timestamp, slot.utc_offset) for slot in parse_response_chunks([body], parser)]
+
+
+class ParseOffload:
+    """
+    Parses large response bodies in a thread or process pool, so they do not stall the event loop.
+    Bodies below the size threshold are parsed inline, where the pool overhead would cost more than it saves.
+    """
+
+    def __init__(self, threshold_in_bytes, executor_type, max_workers):
+        self.threshold_in_bytes = threshold_in_bytes
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self._executor = None
+        self.inline = 0
+        self.offloaded = 0
+        self.offloaded_bytes = 0
+
+    def should_offload(self, size):
+        return self.threshold_in_bytes is not None and size >= self.threshold_in_bytes
+
+    def may_offload(self, content_length):
+        """
+        Whether a response announcing this Content-Length (None if unknown) may have to be parsed in the pool.
+        """
+        return self.threshold_in_bytes is not None and (content_length is None or self.should_offload(content_length))
+
+    async def parse(self, adapter, date_from, date_to, chunks, size):
+        """
+        Parse a buffered response body of the given total size into Slots.
+        """
+        if not self.should_offload(size):
+            self.inline += 1
+            return parse_response_chunks(chunks, adapter.create_parser(date_from, date_to))
+
+        self.offloaded += 1
+        self.offloaded_bytes += size
+        rows = await asyncio.get_running_loop().run_in_executor(
+            self.executor(),
+            parse_slots_compact, adapter.response_type, adapter.id_workshop, date_from, date_to, b"".join(chunks)
+        )
+        # Slots are built in batches, yielding to the event loop in between
+        timeslots = []
+        for start in range(0, len(rows), MATERIALIZE_BATCH_SIZE):
+            timeslots.extend(
+                Slot(adapter.id_workshop, sys.intern(id_slot), timestamp, utc_offset)
+                for id_slot, timestamp, utc_offset in rows[start:start + MATERIALIZE_BATCH_SIZE]
+            )
+            await asyncio.sleep(0)
+        return timeslots
+
+    def executor(self):
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="slot-parser")
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        return {
+            "threshold_in_bytes": self.threshold_in_bytes,
+            "executor": self.executor_type,
+            "max_workers": self.max_workers,
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+            "offloaded_bytes": self.offloaded_bytes,
+        }
+
+
+_offload = None
+
+
+def get_parse_offload():
+    global _offload  # pylint: disable=global-statement
+    if _offload is None:
+        _offload = ParseOffload(
+            app_config.PARSE_OFFLOAD_THRESHOLD_IN_BYTES,
+            app_config.PARSE_OFFLOAD_EXECUTOR,
+            app_config.PARSE_OFFLOAD_MAX_WORKERS,
+        )
+    return _offload
+
+
+def shutdown_parse_offload():
+    if _offload is not None:
+        _offload.shutdown()
+
+
+def reset_parse_offload():
+    global _offload  # pylint: disable=global-statement
+    shutdown_parse_offload()
+    _offload = None
@@ -0,0 +1,194 @@
+import time
+import asyncio
+import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import app.config as app_config
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a request would have to wait longer than the limiter's max wait for its turn.
+    """
+
+
+class TokenBucket:
+    """
+    Token bucket of one upstream host: requests may burst up to `burst`, and are then spread out to `rate` per second
+    (None for no limit).
+    It is implemented as the equivalent virtual schedule, so every caller learns its send time up front and
+    callers are served in arrival order without a lock. A Retry-After answer pauses the bucket.
+    """
+
+    def __init__(self, rate, burst):
+        self.interval = 1 / rate if rate else 0.0
+        self.tolerance = (max(1, burst or 1) - 1) * self.interval
+        self.rate = rate
+        self.burst = burst
+        self._next_at = 0.0  # Theoretical arrival time of the next request
+        self.paused_until = 0.0
+        self.waiting = 0
+        self.requests = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+    def reserve(self, max_wait):
+        """
+        Reserve the next send time and return how long to wait for it. Raises RateLimitExceeded beyond max_wait.
+        """
+        now = time.monotonic()
+        send_at = max(now, self._next_at - self.tolerance, self.paused_until)
+        if send_at - now > max_wait:
+            raise RateLimitExceeded(f"Rate limit: no request slot within {max_wait} s")
+        self._next_at = max(self._next_at, send_at) + self.interval
+        return send_at - now
+
+    def release(self):
+        """
+        Give back a reservation that will not be used, so that the next caller may take its place.
+        """
+        self._next_at -= self.interval
+
+    def try_acquire(self):
+        """
+        Take a send slot only if one is free right away. Returns whether it was taken.
+        """
+        try:
+            self.reserve(max_wait=0)
+        except RateLimitExceeded:
+            return False
+        self.requests += 1
+        return True
+
+    async def acquire(self, max_wait):
+        started = time.monotonic()
+        wait = self.reserve(max_wait)
+        if wait > 0:
+            self.delayed += 1
+            self.waiting += 1
+            try:
+                await asyncio.sleep(wait)
+                # A Retry-After that arrived while waiting postpones the reserved send time
+                while self.paused_until > time.monotonic():
+                    await asyncio.sleep(self.paused_until - time.monotonic())
+            except asyncio.CancelledError:
+                self.release()
+                raise
+            finally:
+                self.waiting -= 1
+
+        waited = time.monotonic() - started
+        self.requests += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def pause(self, seconds):
+        self.throttled += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def stats(self):
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "queue_depth": self.waiting,
+            "requests": self.requests,
+            "delayed": self.delayed,
+            "mean_wait_in_ms": round(self.total_wait / self.requests * 1000, 1) if self.requests else None,
+            "max_wait_in_ms": round(self.max_wait * 1000, 1),
+            "throttled": self.throttled,
+            "paused_for_in_seconds": round(max(0.0, self.paused_until - time.monotonic()), 1),
+        }
+
+
+class HostRateLimiter:
+    """
+    Token buckets per upstream host, shared by availability and booking requests.
+    Requests above the rate wait for their turn instead of failing; rate None disables the limit,
+    but Retry-After answers still pause the host.
+    """
+
+    def __init__(self, rate, burst, max_wait_in_seconds):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait_in_seconds = max_wait_in_seconds
+        self._buckets = {}
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    async def acquire(self, url):
+        """
+        Wait until a request to the URL's host may be sent; returns the time waited in seconds.
+        """
+        return await self.bucket(url).acquire(self.max_wait_in_seconds)
+
+    def try_acquire(self, url):
+        """
+        Take a request slot of the URL's host only if one is free without waiting. Returns whether it was taken.
+        """
+        return self.bucket(url).try_acquire()
+
+    def throttle(self, url, response):
+        """
+        Pause the host for the Retry-After of a 429 response (or a default delay).
+        Returns the pause in seconds.
+        """
+        seconds = parse_retry_after(response.headers.get("Retry-After"))
+        if seconds is None:
+            seconds = app_config.UPSTREAM_RETRY_AFTER_DEFAULT_IN_SECONDS
+        self.bucket(url).pause(seconds)
+        return seconds
+
+    def stats(self):
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "max_wait_in_seconds": self.max_wait_in_seconds,
+            "hosts": {host: bucket.stats() for host, bucket in sorted(self._buckets.items())},
+        }
+
+
+def parse_retry_after(value):
+    """
+    Seconds to wait according to a Retry-After header, given either as seconds or as an HTTP date.
+    Returns None for a missing or invalid header.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+_limiter = None
+
+
+def get_rate_limiter():
+    global _limiter  # pylint: disable=global-statement
+    if _limiter is None:
+        _limiter = HostRateLimiter(
+            app_config.UPSTREAM_RATE_LIMIT_PER_SECOND,
+            app_config.UPSTREAM_RATE_LIMIT_BURST,
+            app_config.UPSTREAM_RATE_LIMIT_MAX_WAIT_IN_SECONDS,
+        )
+    return _limiter
+
+
+def reset_rate_limiter():
+    global _limiter  # pylint: disable=global-statement
+    _limiter = None
@@ -0,0 +1,56 @@
+import os
+import uuid
+import socket
+import datetime
+
+from sqlalchemy import select, delete, or_
+from sqlalchemy.dialects.sqlite import insert
+
+from app.models import RefreshLease
+from app.services.slot_store import utc_now, to_stored_datetime
+
+
+def create_lease_owner():
+    """
+    Identifies a worker process, unique even when several containers reuse the same PIDs.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def acquire_leases(db, workshop_ids, owner, duration_in_seconds):
+    """
+    Take or renew the refresh leases of the given workshops and commit.
+    A lease is granted when it is free, already held by the owner, or expired.
+    Every lease is claimed with a single conditional upsert, so concurrent workers cannot both win it.
+    Returns the IDs of the workshops the owner now holds.
+    """
+    if not workshop_ids:
+        return set()
+
+    now = to_stored_datetime(utc_now())
+    expires_at = now + datetime.timedelta(seconds=duration_in_seconds)
+    for id_workshop in workshop_ids:
+        statement = insert(RefreshLease).values(id_workshop=id_workshop, owner=owner, expires_at=expires_at)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[RefreshLease.id_workshop],
+            set_={"owner": owner, "expires_at": expires_at},
+            where=or_(RefreshLease.owner == owner, RefreshLease.expires_at < now),
+        ))
+
+    owned = db.scalars(
+        select(RefreshLease.id_workshop).where(
+            RefreshLease.id_workshop.in_(workshop_ids),
+            RefreshLease.owner == owner,
+        )
+    ).all()
+    db.commit()
+    return set(owned)
+
+
+def release_leases(db, owner):
+    """
+    Give up all leases of the owner and commit, so other workers can take over right away.
+    """
+    db.execute(delete(RefreshLease).where(RefreshLease.owner == owner))
+    db.commit()
+
@@ -0,0 +1,185 @@
+import time
+import hashlib
+from collections import OrderedDict
+from typing import NamedTuple
+
+import app.config as app_config
+from app.services.parse_offload import get_parse_offload
+from app.services.response_parsers import parse_response_stream
+
+
+class MemoEntry(NamedTuple):
+    etag: str
+    last_modified: str
+    body_hash: str
+    timeslots: list
+
+
+class ResponseMemo:
+    """
+    Remembers the last response of every (id_workshop, date_from, date_to) window, so unchanged responses are not
+    parsed again. Slots are filtered by the window's dates while parsing, so an entry is only valid for its own window,
+    even when the workshop's URL does not depend on the dates.
+    Upstreams that send ETag or Last-Modified are asked with conditional requests and answer 304 Not Modified.
+    For all others the body is hashed while it is received, and the previous slots are reused when the hash matches.
+    Entries are evicted least recently used first, beyond max_entries responses or max_slots slots in total.
+    """
+
+    def __init__(self, max_entries, max_slots, max_buffered_bytes):
+        self.max_entries = max_entries
+        self.max_slots = max_slots
+        self.max_buffered_bytes = max_buffered_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self.responses = 0
+        self.not_modified = 0
+        self.unchanged_bodies = 0
+        self.parsed = 0
+        self.parsed_bytes = 0
+        self.skipped_bytes = 0
+
+    def get(self, window):
+        entry = self._entries.get(window)
+        if entry is not None:
+            self._entries.move_to_end(window)
+        return entry
+
+    def request_headers(self, entry):
+        """
+        Conditional request headers for a remembered response.
+        """
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def reuse_not_modified(self, entry):
+        self.responses += 1
+        self.not_modified += 1
+        return reuse_timeslots(entry)
+
+    async def read_response(self, window, response, adapter, date_from, date_to, entry):
+        """
+        Returns the slots of a 200 response, reusing the remembered ones when the body did not change.
+        A body that may have to be parsed off the event loop, or a small one with a remembered response,
+        is buffered and hashed first, so an unchanged body is not parsed at all. Any other body is parsed
+        while it is received and hashed along the way; when it turns out unchanged, the remembered slots are kept.
+        """
+        self.responses += 1
+        digest = hashlib.blake2b(digest_size=16)
+        size = 0
+        offload = get_parse_offload()
+        length = content_length(response)
+
+        if offload.may_offload(length) or (entry is not None and length is not None and length <= self.max_buffered_bytes):
+            chunks = []
+            async for chunk in response.aiter_bytes():
+                digest.update(chunk)
+                size += len(chunk)
+                chunks.append(chunk)
+
+            if entry is not None and digest.hexdigest() == entry.body_hash:
+                self.unchanged_bodies += 1
+                self.skipped_bytes += size
+                self._store(window, response, entry.body_hash, entry.timeslots)
+                return reuse_timeslots(entry)
+            timeslots = await offload.parse(adapter, date_from, date_to, chunks, size)
+        else:
+            async def hashed_chunks():
+                nonlocal size
+                async for chunk in response.aiter_bytes():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    yield chunk
+
+            timeslots = await parse_response_stream(hashed_chunks(), adapter.create_parser(date_from, date_to))
+            if entry is not None and digest.hexdigest() == entry.body_hash:
+                timeslots = reuse_timeslots(entry)
+
+        self.parsed += 1
+        self.parsed_bytes += size
+        self._store(window, response, digest.hexdigest(), timeslots)
+        return list(timeslots)
+
+    def invalidate_workshop(self, id_workshop):
+        for key in [key for key in self._entries if key[0] == id_workshop]:
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self):
+        skipped = self.not_modified + self.unchanged_bodies
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "slots": self._size,
+            "max_slots": self.max_slots,
+            "responses": self.responses,
+            "not_modified": self.not_modified,
+            "unchanged_bodies": self.unchanged_bodies,
+            "parsed": self.parsed,
+            "skipped_parse_ratio": round(skipped / self.responses, 3) if self.responses else None,
+            "parsed_bytes": self.parsed_bytes,
+            "skipped_bytes": self.skipped_bytes,
+        }
+
+    def _store(self, window, response, body_hash, timeslots):
+        if self.max_entries <= 0:
+            return
+        if window in self._entries:
+            self._remove(window)
+        self._entries[window] = MemoEntry(
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            body_hash,
+            timeslots,
+        )
+        self._size += len(timeslots)
+        while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_slots):
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.timeslots)
+
+
+def content_length(response):
+    """
+    The announced body size, or None when the body is sent chunked.
+    Bodies of unknown size are buffered so that they can be offloaded when they turn out to be large.
+    """
+    try:
+        return int(response.headers["Content-Length"])
+    except (KeyError, ValueError):
+        return None
+
+
+def reuse_timeslots(entry):
+    """
+    Copy of remembered slots without those that became due since they were parsed.
+    """
+    now = time.time()
+    return [ts for ts in entry.timeslots if ts.timestamp > now]
+
+
+_memo = None
+
+
+def get_response_memo():
+    global _memo  # pylint: disable=global-statement
+    if _memo is None:
+        _memo = ResponseMemo(
+            app_config.RESPONSE_MEMO_MAX_ENTRIES,
+            app_config.RESPONSE_MEMO_MAX_SLOTS,
+            app_config.RESPONSE_MEMO_MAX_BUFFERED_BYTES,
+        )
+    return _memo
+
+
+def reset_response_memo():
+    global _memo  # pylint: disable=global-statement
+    _memo = None
@@ -0,0 +1,203 @@
+import sys
+import json
+import codecs
+import datetime
+
+from lxml import etree
+
+from app.models import Slot
+
+
+def convert_to_datetime(timestamp_string):
+    return datetime.datetime.fromisoformat(timestamp_string.replace("Z", "+00:00"))
+
+
+RESPONSE_PARSERS = {}
+
+
+def register_response_parser(response_type):
+    """
+    Class decorator registering a SlotParser for a workshop response type.
+    Registered types become valid values of Workshop.response_type.
+    """
+    def register(parser_class):
+        RESPONSE_PARSERS[response_type] = parser_class
+        return parser_class
+    return register
+
+
+def get_response_parser(response_type):
+    return RESPONSE_PARSERS.get(response_type)
+
+
+def get_response_types():
+    return list(RESPONSE_PARSERS)
+
+
+class SlotParser:
+    """
+    Base class for incremental parsers of workshop API responses.
+    The response body is fed in chunks; slots are filtered as soon as they are parsed,
+    so only slots within the date range and in the future are ever materialized.
+    A malformed element is skipped, while a malformed or incomplete document raises.
+    """
+
+    def __init__(self, id_workshop, date_from, date_to):
+        self.id_workshop = id_workshop
+        self.date_from = date_from
+        self.date_to = date_to
+        self.now = datetime.datetime.now(datetime.timezone.utc).timestamp()
+        self.timeslots = []
+        self.skipped = 0
+
+    def feed(self, chunk: bytes):
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Finish parsing and return the collected slots.
+        """
+        return self.timeslots
+
+    def add_slot(self, id_slot, time_string):
+        slot_datetime = convert_to_datetime(time_string)
+        if self.date_from <= slot_datetime.date() <= self.date_to:
+            slot = Slot.from_datetime(self.id_workshop, sys.intern(id_slot), slot_datetime)
+            if slot.timestamp > self.now:
+                self.timeslots.append(slot)
+
+    def skip_element(self, error):
+        self.skipped += 1
+        print(f"Skipping malformed time slot of workshop {self.id_workshop}: {error!r}")
+
+
+@register_response_parser("JSON_id")
+class JsonIdParser(SlotParser):
+    """
+    Parses a JSON array of {"id", "time", "available"} objects one element at a time.
+    """
+
+    def __init__(self, id_workshop, date_from, date_to):
+        super().__init__(id_workshop, date_from, date_to)
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+
+    def feed(self, chunk: bytes):
+        self._buffer += self._text_decoder.decode(chunk)
+        self._parse_buffer()
+
+    def close(self):
+        self._buffer += self._text_decoder.decode(b"", final=True)
+        self._parse_buffer(final=True)
+        if not self._finished:
+            raise ValueError("Incomplete JSON array in response")
+        return self.timeslots
+
+    def _parse_buffer(self, final=False):
+        buffer = self._buffer
+        position = _skip_whitespace(buffer, 0)
+
+        if not self._started:
+            if position == len(buffer):
+                self._buffer = ""
+                return
+            if buffer[position] != "[":
+                raise ValueError("Expected a JSON array in response")
+            self._started = True
+            position = _skip_whitespace(buffer, position + 1)
+
+        while position < len(buffer) and not self._finished:
+            if buffer[position] == "]":
+                self._finished = True
+                position += 1
+                break
+            if buffer[position] == ",":
+                position = _skip_whitespace(buffer, position + 1)
+                continue
+
+            try:
+                item, end = self._decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break  # Element is not complete yet, wait for more data
+
+            # Scalars may be cut off at the chunk boundary, so they are only accepted once followed by a delimiter
+            if not isinstance(item, (dict, list)) and not final:
+                lookahead = _skip_whitespace(buffer, end)
+                if lookahead == len(buffer):
+                    break
+
+            if isinstance(item, dict) and item.get("available", True):
+                try:
+                    self.add_slot(str(item["id"]), item["time"])
+                except (KeyError, TypeError, ValueError) as e:
+                    self.skip_element(e)
+            position = _skip_whitespace(buffer, end)
+
+        self._buffer = buffer[position:]
+
+
+@register_response_parser("XML_uuid")
+class XmlUuidParser(SlotParser):
+    """
+    Parses <availableTime><uuid/><time/></availableTime> elements with a pull parser,
+    discarding every element once it has been read.
+    """
+
+    def __init__(self, id_workshop, date_from, date_to):
+        super().__init__(id_workshop, date_from, date_to)
+        self._parser = etree.XMLPullParser(events=("end",), tag="availableTime")
+
+    def feed(self, chunk: bytes):
+        self._parser.feed(chunk)
+        self._read_events()
+
+    def close(self):
+        self._parser.close()
+        self._read_events()
+        return self.timeslots
+
+    def _read_events(self):
+        for _, available_time in self._parser.read_events():
+            uuid_element = available_time.find("uuid")
+            time_element = available_time.find("time")
+            if uuid_element is not None and time_element is not None:
+                try:
+                    self.add_slot(uuid_element.text, time_element.text)
+                except (AttributeError, TypeError, ValueError) as e:
+                    self.skip_element(e)
+
+            # Free the parsed element and everything before it
+            available_time.clear()
+            while available_time.getprevious() is not None:
+                del available_time.getparent()[0]
+
+
+def parse_response_chunks(byte_chunks, parser):
+    """
+    Parse timeslots from an iterable of response body chunks.
+    A malformed or incomplete response raises instead of passing for a complete one with fewer slots.
+    """
+    for chunk in byte_chunks:
+        parser.feed(chunk)
+    return parser.close()
+
+
+async def parse_response_stream(byte_chunks, parser):
+    """
+    Parse timeslots from an asynchronous stream of response body chunks.
+    Errors reading the stream and malformed or incomplete responses are raised to the caller.
+    """
+    async for chunk in byte_chunks:
+        parser.feed(chunk)
+    return parser.close()
+
+
+def _skip_whitespace(text, position):
+    while position < len(text) and text[position] in " \t\r\n":
+        position += 1
+    return position
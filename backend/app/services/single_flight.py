@@ -0,0 +1,62 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into a single execution.
+    Callers that arrive while a call is in flight await its result instead of starting their own.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self.calls = 0
+        self.executions = 0
+
+    async def run(self, key, func, *args):
+        task = self.start(key, func, *args)
+
+        # Shielded, so that a cancelled caller does not cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def start(self, key, func, *args):
+        """
+        Start the call in the background unless one with the same key is already in flight, and return its task.
+        """
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(func(*args))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+        return task
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "saved_calls": self.calls - self.executions,
+            "in_flight": len(self._in_flight),
+        }
+
+    def _forget(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+
+_upstream_flights = None
+
+
+def get_upstream_flights():
+    """
+    Returns the process-wide coalescer of upstream slot requests.
+    """
+    global _upstream_flights  # pylint: disable=global-statement
+    if _upstream_flights is None:
+        _upstream_flights = SingleFlight()
+    return _upstream_flights
+
+
+def reset_upstream_flights():
+    global _upstream_flights  # pylint: disable=global-statement
+    _upstream_flights = None
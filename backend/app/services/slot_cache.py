@@ -0,0 +1,167 @@
+import time
+import datetime
+from collections import OrderedDict, defaultdict
+
+import app.config as app_config
+
+
+def iter_days(date_from, date_to):
+    day = date_from
+    while day <= date_to:
+        yield day
+        day += datetime.timedelta(days=1)
+
+
+class SlotCache:
+    """
+    LRU cache of parsed time slots keyed by (workshop ID, calendar day).
+    A day that is present but empty means the workshop has no slots on that day.
+    Memory is bounded by the total number of cached slots; every day also counts as one slot,
+    so that empty days are bounded too.
+    """
+
+    def __init__(self, ttl_in_seconds, max_slots):
+        self.ttl_in_seconds = ttl_in_seconds
+        self.max_slots = max_slots
+        self._entries = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_day(self, id_workshop, day, max_age=None):
+        """
+        Returns the cached slots of a day, or None if the day is not cached or older than max_age.
+        max_age defaults to the TTL; expired days are kept until evicted, so they can still be read as stale data.
+        """
+        key = (id_workshop, day)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, slots = entry
+        max_age = self.ttl_in_seconds if max_age is None else max_age
+        if time.monotonic() - stored_at > max_age:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return slots
+
+    def put_day(self, id_workshop, day, slots):
+        key = (id_workshop, day)
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic(), slots)
+        self._size += len(slots) + 1
+        while self._size > self.max_slots and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def get_range(self, id_workshop, date_from, date_to, max_age=None):
+        """
+        Returns cached slots per day for the given range, and the list of days that are not cached.
+        """
+        cached_days = {}
+        missing_days = []
+        for day in iter_days(date_from, date_to):
+            slots = self.get_day(id_workshop, day, max_age)
+            if slots is None:
+                missing_days.append(day)
+            else:
+                cached_days[day] = slots
+        return cached_days, missing_days
+
+    def get_stale_range(self, id_workshop, date_from, date_to, max_stale):
+        """
+        Returns the cached slots per day that expired at most max_stale seconds ago (or are still fresh),
+        the days that are missing, and the age in seconds of the oldest returned day (None if no day is returned).
+        """
+        now = time.monotonic()
+        max_age = self.ttl_in_seconds + max_stale
+        cached_days = {}
+        missing_days = []
+        oldest = None
+        for day in iter_days(date_from, date_to):
+            entry = self._entries.get((id_workshop, day))
+            if entry is None or now - entry[0] > max_age:
+                missing_days.append(day)
+                continue
+            stored_at, cached_days[day] = entry
+            oldest = stored_at if oldest is None else min(oldest, stored_at)
+
+        age = now - oldest if oldest is not None else None
+        if age is not None and age > self.ttl_in_seconds:
+            self.stale_hits += 1
+        return cached_days, missing_days, age
+
+    def store_range(self, id_workshop, date_from, date_to, slots):
+        """
+        Stores slots fetched for a complete date range, including the days that have no slots.
+        Returns the stored slots grouped by day.
+        """
+        slots_by_day = defaultdict(list)
+        for slot in slots:
+            slots_by_day[slot.day].append(slot)
+
+        days = {}
+        for day in iter_days(date_from, date_to):
+            days[day] = slots_by_day.get(day, [])
+            if self.ttl_in_seconds > 0:
+                self.put_day(id_workshop, day, days[day])
+        return days
+
+    def discard_slot(self, id_workshop, id_slot):
+        """
+        Removes a single slot, e.g. after it has been booked.
+        """
+        for (cached_id_workshop, day), (stored_at, slots) in list(self._entries.items()):
+            if cached_id_workshop != id_workshop:
+                continue
+            remaining = [slot for slot in slots if slot.id_slot != id_slot]
+            if len(remaining) != len(slots):
+                self._entries[(id_workshop, day)] = (stored_at, remaining)
+                self._size -= len(slots) - len(remaining)
+
+    def invalidate_workshop(self, id_workshop):
+        for key in [key for key in self._entries if key[0] == id_workshop]:
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self):
+        return {
+            "ttl_in_seconds": self.ttl_in_seconds,
+            "max_slots": self.max_slots,
+            "days": len(self._entries),
+            "size": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+        }
+
+    def _remove(self, key):
+        _, slots = self._entries.pop(key)
+        self._size -= len(slots) + 1
+
+
+_cache = None
+
+
+def get_slot_cache():
+    global _cache  # pylint: disable=global-statement
+    if _cache is None:
+        _cache = SlotCache(app_config.SLOT_CACHE_TTL_IN_SECONDS, app_config.SLOT_CACHE_MAX_SLOTS)
+    return _cache
+
+
+def reset_slot_cache():
+    global _cache  # pylint: disable=global-statement
+    _cache = None
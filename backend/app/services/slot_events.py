@@ -0,0 +1,38 @@
+class SlotEvents:
+    """
+    Tells listeners about slot changes as the backend learns about them: a workshop answered with fresh slots,
+    or a slot was booked. Listeners implement workshop_refreshed(id_workshop) and slot_booked(id_workshop, id_slot).
+    """
+
+    def __init__(self):
+        self._listeners = []
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def workshop_refreshed(self, id_workshop):
+        for listener in self._listeners:
+            listener.workshop_refreshed(id_workshop)
+
+    def slot_booked(self, id_workshop, id_slot):
+        for listener in self._listeners:
+            listener.slot_booked(id_workshop, id_slot)
+
+
+_events = None
+
+
+def get_slot_events():
+    global _events  # pylint: disable=global-statement
+    if _events is None:
+        _events = SlotEvents()
+    return _events
+
+
+def reset_slot_events():
+    global _events  # pylint: disable=global-statement
+    _events = None
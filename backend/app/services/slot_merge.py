@@ -0,0 +1,57 @@
+import heapq
+import base64
+import bisect
+from itertools import islice
+
+import orjson
+
+
+def slot_sort_key(slot):
+    """
+    Total order of slots across workshops: by time, then workshop, then slot ID.
+    """
+    return slot.timestamp, slot.id_workshop, slot.id_slot
+
+
+def merge_sorted_slots(slot_lists, limit=None, after=None):
+    """
+    Merge per-workshop slot lists into one list ordered by slot_sort_key.
+    Every list is sorted on its own, which is cheap because workshops return their slots nearly sorted,
+    and the lists are then combined with a lazy k-way heap merge.
+    With a limit, the merge stops after the first `limit` slots following the `after` key.
+    Returns the merged slots and the key of the last one when more slots follow, otherwise None.
+    """
+    streams = []
+    for slots in slot_lists:
+        slots.sort(key=slot_sort_key)
+        start = bisect.bisect_right(slots, after, key=slot_sort_key) if after is not None else 0
+        if start < len(slots):
+            streams.append(islice(slots, start, None))
+
+    merged = heapq.merge(*streams, key=slot_sort_key)
+    if limit is None:
+        return list(merged), None
+
+    page = list(islice(merged, limit + 1))
+    if len(page) > limit:
+        return page[:limit], slot_sort_key(page[limit - 1])
+    return page, None
+
+
+def encode_cursor(key):
+    if key is None:
+        return None
+    return base64.urlsafe_b64encode(orjson.dumps(list(key))).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Turns a cursor returned by a previous search back into a slot key. Raises ValueError for invalid cursors.
+    """
+    try:
+        timestamp, id_workshop, id_slot = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(timestamp, (int, float)) or not isinstance(id_workshop, int) or not isinstance(id_slot, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return timestamp, id_workshop, id_slot
@@ -0,0 +1,215 @@
+import time
+import asyncio
+import datetime
+from dateutil.relativedelta import relativedelta
+
+import app.config as app_config
+from app.database import AsyncSessionLocal
+from app.services.booking_services import request_workshop_timeslots_in_chunks
+from app.services.circuit_breaker import get_circuit_breakers
+from app.services.http_client import get_http_client
+from app.services.refresh_leases import create_lease_owner, acquire_leases, release_leases
+from app.services.slot_events import get_slot_events
+from app.services.slot_store import store_workshop_slots
+from app.services.workshop_adapters import get_workshop_adapter
+from app.services.workshop_services import get_workshops
+
+
+class RefreshSchedule:
+    """
+    Polling schedule of one workshop. The interval is halved whenever a refresh finds changed slots,
+    and grows by half whenever nothing changed or the request failed, within the configured bounds.
+    """
+
+    def __init__(self, min_interval, max_interval):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.next_due = 0.0
+        self.refreshes = 0
+        self.changes = 0
+        self.failures = 0
+        self.last_refreshed_at = None
+
+    def is_due(self, now):
+        return self.next_due <= now
+
+    def record_refresh(self, changed):
+        self.refreshes += 1
+        self.last_refreshed_at = datetime.datetime.now(datetime.timezone.utc)
+        if changed:
+            self.changes += 1
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        self.next_due = time.monotonic() + self.interval
+
+    def record_failure(self):
+        self.failures += 1
+        self.interval = min(self.max_interval, self.interval * 1.5)
+        self.next_due = time.monotonic() + self.interval
+
+    def stats(self):
+        return {
+            "interval_in_seconds": round(self.interval, 1),
+            "due_in_seconds": round(max(0.0, self.next_due - time.monotonic()), 1),
+            "refreshes": self.refreshes,
+            "changes": self.changes,
+            "failures": self.failures,
+            "last_refreshed_at": self.last_refreshed_at,
+        }
+
+
+class SlotRefresher:
+    """
+    Background task that keeps the slot store filled for all active workshops.
+    Every tick it refreshes the workshops whose polling interval has passed, concurrently
+    and within the usual upstream limits, timeouts and circuit breakers.
+    Workers sharing the database only refresh the workshops whose lease they hold,
+    and read the stored slots of all other workshops.
+    """
+
+    def __init__(self, session_factory, horizon_in_days, min_interval, max_interval, tick, lease_duration):
+        self.session_factory = session_factory
+        self.horizon_in_days = horizon_in_days
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.tick = tick
+        self.lease_duration = lease_duration
+        self.owner = create_lease_owner()
+        self.ticks = 0
+        self._schedules = {}
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+            try:
+                async with self.session_factory() as db:
+                    await db.run_sync(release_leases, self.owner)
+            except Exception as e:
+                print(f"Error releasing slot refresh leases: {e!r}")
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def schedule(self, id_workshop):
+        schedule = self._schedules.get(id_workshop)
+        if schedule is None:
+            schedule = RefreshSchedule(self.min_interval, self.max_interval)
+            self._schedules[id_workshop] = schedule
+        return schedule
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh_due()
+            except Exception as e:
+                print(f"Error refreshing stored slots: {e!r}")
+            await asyncio.sleep(self.tick)
+
+    async def refresh_due(self):
+        """
+        Renew the leases of this worker, then refresh every leased workshop that is due.
+        Returns the number of refreshed workshops.
+        """
+        self.ticks += 1
+        async with self.session_factory() as db:
+            workshops = await db.run_sync(get_workshops)
+            owned_ids = await db.run_sync(
+                acquire_leases, [workshop.id_workshop for workshop in workshops], self.owner, self.lease_duration
+            )
+
+        # Workshops refreshed by other workers are scheduled from scratch if their lease comes to this worker
+        for id_workshop in set(self._schedules) - owned_ids:
+            del self._schedules[id_workshop]
+
+        now = time.monotonic()
+        due = [
+            get_workshop_adapter(workshop) for workshop in workshops
+            if workshop.id_workshop in owned_ids and self.schedule(workshop.id_workshop).is_due(now)
+        ]
+        await asyncio.gather(*(self.refresh_workshop(adapter) for adapter in due))
+        return len(due)
+
+    async def refresh_workshop(self, adapter):
+        """
+        Fetch the workshop's slots for the whole horizon, in chunks the workshop accepts, and replace its stored slots with them.
+        While the workshop's circuit breaker is open, it is only requested when a probe is due.
+        """
+        schedule = self.schedule(adapter.id_workshop)
+        breaker = get_circuit_breakers().get(adapter.id_workshop)
+        if not breaker.allow_request() and not breaker.probe_due():
+            schedule.record_failure()
+            return
+
+        date_from = datetime.date.today()
+        date_to = date_from + relativedelta(days=self.horizon_in_days)
+        timeslots = await request_workshop_timeslots_in_chunks(get_http_client(), adapter, date_from, date_to)
+        if timeslots is None:
+            schedule.record_failure()
+            return
+
+        async with self.session_factory() as db:
+            changed = await db.run_sync(store_workshop_slots, adapter.id_workshop, date_from, date_to, timeslots)
+        schedule.record_refresh(changed)
+        if changed:
+            get_slot_events().workshop_refreshed(adapter.id_workshop)
+
+    def stats(self):
+        return {
+            "enabled": app_config.SLOT_REFRESHER_ENABLED,
+            "running": self.running,
+            "owner": self.owner,
+            "ticks": self.ticks,
+            "workshops": {id_workshop: schedule.stats() for id_workshop, schedule in sorted(self._schedules.items())},
+        }
+
+
+_refresher = None
+
+
+def get_slot_refresher():
+    global _refresher  # pylint: disable=global-statement
+    if _refresher is None:
+        _refresher = SlotRefresher(
+            AsyncSessionLocal,
+            app_config.SLOT_REFRESH_HORIZON_IN_DAYS,
+            app_config.SLOT_REFRESH_MIN_INTERVAL_IN_SECONDS,
+            app_config.SLOT_REFRESH_MAX_INTERVAL_IN_SECONDS,
+            app_config.SLOT_REFRESH_TICK_IN_SECONDS,
+            app_config.SLOT_REFRESH_LEASE_IN_SECONDS,
+        )
+    return _refresher
+
+
+def start_slot_refresher():
+    """
+    Start the background slot refresher if it is enabled in the config.
+    """
+    if app_config.SLOT_REFRESHER_ENABLED:
+        get_slot_refresher().start()
+
+
+async def stop_slot_refresher():
+    if _refresher is not None:
+        await _refresher.stop()
+
+
+def reset_slot_refresher():
+    """
+    Forgets the current refresher without stopping it. Intended for tests.
+    """
+    global _refresher  # pylint: disable=global-statement
+    _refresher = None
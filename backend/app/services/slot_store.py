@@ -0,0 +1,119 @@
+import hashlib
+import datetime
+
+from sqlalchemy import select, delete, insert
+
+from app.models import StoredSlot, SlotRefreshState, Slot
+
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def to_stored_datetime(value):
+    """
+    SQLite keeps no timezone, so stored datetimes are naive UTC.
+    """
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def timestamp_to_stored_datetime(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).replace(tzinfo=None)
+
+
+def stored_datetime_to_timestamp(value):
+    return value.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def slot_fingerprint(timeslots):
+    """
+    Hash of a workshop's slots, independent of their order, used to detect whether availability changed.
+    """
+    digest = hashlib.sha256()
+    for id_slot, timestamp, utc_offset in sorted((ts.id_slot, ts.timestamp, ts.utc_offset) for ts in timeslots):
+        digest.update(f"{id_slot}\0{timestamp!r}\0{utc_offset}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def store_workshop_slots(db, id_workshop, date_from, date_to, timeslots):
+    """
+    Replace the stored slots of a workshop with a freshly fetched range of days and commit.
+    Returns whether the slots differ from the previously stored ones.
+    """
+    fingerprint = slot_fingerprint(timeslots)
+    state = db.get(SlotRefreshState, id_workshop)
+    changed = state is None or state.fingerprint != fingerprint
+
+    if changed:
+        db.execute(delete(StoredSlot).where(StoredSlot.id_workshop == id_workshop))
+        if timeslots:
+            db.execute(insert(StoredSlot), [
+                {
+                    "id_workshop": id_workshop,
+                    "id_slot": ts.id_slot,
+                    "slot_date": ts.day,
+                    "slot_datetime": timestamp_to_stored_datetime(ts.timestamp),
+                    "utc_offset": ts.utc_offset,
+                }
+                for ts in {ts.id_slot: ts for ts in timeslots}.values()
+            ])
+
+    if state is None:
+        state = SlotRefreshState(id_workshop=id_workshop)
+        db.add(state)
+    state.covered_from = date_from
+    state.covered_to = date_to
+    state.refreshed_at = to_stored_datetime(utc_now())
+    state.fingerprint = fingerprint
+    db.commit()
+    return changed
+
+
+def load_stored_slots(db, workshop_ids, date_from, date_to, max_age_in_seconds):
+    """
+    Returns the stored future slots within the date range, grouped by workshop and sorted by time.
+    Only workshops whose stored range covers the dates and was refreshed within max_age_in_seconds are included,
+    even when they have no slots.
+    """
+    now = utc_now()
+    refreshed_after = to_stored_datetime(now - datetime.timedelta(seconds=max_age_in_seconds))
+    covered_ids = db.scalars(
+        select(SlotRefreshState.id_workshop).where(
+            SlotRefreshState.id_workshop.in_(workshop_ids),
+            SlotRefreshState.covered_from <= date_from,
+            SlotRefreshState.covered_to >= date_to,
+            SlotRefreshState.refreshed_at >= refreshed_after,
+        )
+    ).all()
+    if not covered_ids:
+        return {}
+
+    rows = db.execute(
+        select(StoredSlot.id_workshop, StoredSlot.id_slot, StoredSlot.slot_datetime, StoredSlot.utc_offset).where(
+            StoredSlot.id_workshop.in_(covered_ids),
+            StoredSlot.slot_date >= date_from,
+            StoredSlot.slot_date <= date_to,
+            StoredSlot.slot_datetime > to_stored_datetime(now),
+        ).order_by(StoredSlot.slot_datetime, StoredSlot.id_workshop)
+    )
+
+    slots = {id_workshop: [] for id_workshop in covered_ids}
+    for id_workshop, id_slot, slot_datetime, utc_offset in rows:
+        slots[id_workshop].append(Slot(id_workshop, id_slot, stored_datetime_to_timestamp(slot_datetime), utc_offset or 0))
+    return slots
+
+
+def delete_stored_slot(db, id_workshop, id_slot):
+    """
+    Remove a booked slot from the store and commit.
+    """
+    db.execute(delete(StoredSlot).where(StoredSlot.id_workshop == id_workshop, StoredSlot.id_slot == id_slot))
+    db.commit()
+
+
+def clear_stored_slots(db, id_workshop):
+    """
+    Forget the stored slots of a workshop, e.g. after its API settings changed. Does not commit.
+    """
+    db.execute(delete(StoredSlot).where(StoredSlot.id_workshop == id_workshop))
+    db.execute(delete(SlotRefreshState).where(SlotRefreshState.id_workshop == id_workshop))
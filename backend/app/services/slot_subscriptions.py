@@ -0,0 +1,236 @@
+import asyncio
+import datetime
+from typing import NamedTuple
+
+import app.config as app_config
+from app.database import AsyncSessionLocal
+from app.services.booking_services import collect_workshop_timeslots, FAILED_STATUSES
+from app.services.slot_events import get_slot_events
+from app.services.slot_merge import slot_sort_key
+
+
+class SubscriptionFilters(NamedTuple):
+    date_from: datetime.date
+    date_to: datetime.date
+    vehicle_types: str = None
+    cities: str = None
+    workshop_name: str = None
+
+    @classmethod
+    def normalized(cls, date_from, date_to, vehicle_types=None, cities=None, workshop_name=None):
+        """
+        Filters in a canonical form, so that equal searches written differently share a group.
+        """
+        def normalize_list(value):
+            return ",".join(sorted(value.lower().split(","))) if value else None
+
+        return cls(
+            date_from, date_to, normalize_list(vehicle_types), normalize_list(cities),
+            workshop_name.lower() if workshop_name else None
+        )
+
+
+def describe_removed_slot(key):
+    id_workshop, id_slot = key
+    return {"id_workshop": id_workshop, "id_slot": id_slot}
+
+
+class SubscriptionGroup:
+    """
+    The subscribers of one set of filters. The group's slots are computed once for all of them,
+    periodically and soon after a workshop answered with fresh slots, and only the differences are published.
+    Every subscriber has a bounded queue; one that falls behind gets a new snapshot instead of the missed deltas.
+    """
+
+    def __init__(self, filters, session_factory, interval, min_interval, queue_size):
+        self.filters = filters
+        self.session_factory = session_factory
+        self.interval = interval
+        self.min_interval = min_interval
+        self.queue_size = queue_size
+        self.queues = set()
+        self.slots = None
+        self.computations = 0
+        self.published = 0
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.queues.add(queue)
+        if self.slots is not None:
+            queue.put_nowait(self.snapshot_event())
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.queues.discard(queue)
+        if not self.queues:
+            self.stop()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def wake(self):
+        self._wake.set()
+
+    async def run(self):
+        while True:
+            self._wake.clear()
+            try:
+                await self.recompute()
+            except Exception as e:
+                print(f"Error computing slots for subscription {self.filters}: {e!r}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+                await asyncio.sleep(self.min_interval)
+            except TimeoutError:
+                pass
+
+    async def recompute(self):
+        """
+        Search the slots for the group's filters. Workshops that failed keep their previous slots,
+        so that an outage is not published as every slot being removed.
+        """
+        async with self.session_factory() as db:
+            results = await collect_workshop_timeslots(db, *self.filters)
+        self.computations += 1
+
+        failed_ids = {result.adapter.id_workshop for result in results if result.status in FAILED_STATUSES}
+        slots = {(ts.id_workshop, ts.id_slot): ts for result in results for ts in result.timeslots}
+        if self.slots is not None:
+            slots |= {key: ts for key, ts in self.slots.items() if key[0] in failed_ids}
+        self.update(slots)
+
+    def update(self, slots):
+        if self.slots is None:
+            self.slots = slots
+            self.publish_all(self.snapshot_event)
+            return
+
+        added = sorted((slots[key] for key in slots.keys() - self.slots.keys()), key=slot_sort_key)
+        removed = sorted(self.slots.keys() - slots.keys())
+        self.slots = slots
+        if added or removed:
+            self.publish_delta(added, removed)
+
+    def remove_slot(self, id_workshop, id_slot):
+        key = (id_workshop, id_slot)
+        if self.slots is not None and key in self.slots:
+            del self.slots[key]
+            self.publish_delta([], [key])
+
+    def snapshot_event(self):
+        return "snapshot", {"slots": [ts.to_dict() for ts in sorted(self.slots.values(), key=slot_sort_key)]}
+
+    def publish_delta(self, added, removed):
+        event = "delta", {
+            "added": [ts.to_dict() for ts in added],
+            "removed": [describe_removed_slot(key) for key in removed],
+        }
+        self.publish_all(lambda: event)
+
+    def publish_all(self, make_event):
+        self.published += 1
+        for queue in self.queues:
+            if queue.full():
+                # The subscriber missed deltas, so it starts over from the current slots
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot_event())
+            else:
+                queue.put_nowait(make_event())
+
+    def stats(self):
+        return {
+            "filters": self.filters._asdict(),
+            "subscribers": len(self.queues),
+            "slots": len(self.slots) if self.slots is not None else None,
+            "computations": self.computations,
+            "published": self.published,
+        }
+
+
+class SlotSubscriptions:
+    """
+    Live slot subscriptions, grouped by filters. Listens to slot events to publish bookings right away
+    and to recompute groups soon after fresh slots arrived.
+    """
+
+    def __init__(self, session_factory, interval, min_interval, queue_size):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.min_interval = min_interval
+        self.queue_size = queue_size
+        self._groups = {}
+
+    def subscribe(self, filters):
+        """
+        Returns the filters' group and a new queue of (event, data) tuples, starting with a snapshot.
+        """
+        group = self._groups.get(filters)
+        if group is None:
+            group = self._groups[filters] = SubscriptionGroup(
+                filters, self.session_factory, self.interval, self.min_interval, self.queue_size
+            )
+        return group, group.subscribe()
+
+    def unsubscribe(self, group, queue):
+        group.unsubscribe(queue)
+        if not group.queues and self._groups.get(group.filters) is group:
+            del self._groups[group.filters]
+
+    def workshop_refreshed(self, id_workshop):
+        for group in self._groups.values():
+            if group.slots is not None:
+                group.wake()
+
+    def slot_booked(self, id_workshop, id_slot):
+        for group in self._groups.values():
+            group.remove_slot(id_workshop, id_slot)
+
+    def stop(self):
+        for group in self._groups.values():
+            group.stop()
+        self._groups.clear()
+
+    def stats(self):
+        return {
+            "groups": len(self._groups),
+            "subscribers": sum(len(group.queues) for group in self._groups.values()),
+            "filters": [group.stats() for group in self._groups.values()],
+        }
+
+
+_subscriptions = None
+
+
+def get_slot_subscriptions():
+    global _subscriptions  # pylint: disable=global-statement
+    if _subscriptions is None:
+        _subscriptions = SlotSubscriptions(
+            AsyncSessionLocal,
+            app_config.SLOT_SUBSCRIPTION_INTERVAL_IN_SECONDS,
+            app_config.SLOT_SUBSCRIPTION_MIN_INTERVAL_IN_SECONDS,
+            app_config.SLOT_SUBSCRIPTION_QUEUE_SIZE,
+        )
+        get_slot_events().add_listener(_subscriptions)
+    return _subscriptions
+
+
+def stop_slot_subscriptions():
+    if _subscriptions is not None:
+        _subscriptions.stop()
+
+
+def reset_slot_subscriptions():
+    """
+    Stops and forgets the current subscriptions. Intended for tests.
+    """
+    global _subscriptions  # pylint: disable=global-statement
+    stop_slot_subscriptions()
+    _subscriptions = None
@@ -0,0 +1,161 @@
+import time
+import base64
+import secrets
+import datetime
+from collections import deque
+
+import orjson
+
+import app.config as app_config
+from app.services.slot_events import get_slot_events
+
+
+class WorkshopVersions:
+    """
+    Versioned snapshot of one workshop's known slots, with a bounded log of the changes between versions.
+    Every search result updates the snapshot for the days it covers; a change bumps the version.
+    """
+
+    def __init__(self, history_size):
+        self.version = 0
+        self.slots = {}
+        self._changes = deque(maxlen=history_size)  # (version, slot, whether it was removed)
+        self.complete_since = 0  # Oldest version whose later changes are all still logged
+
+    def record(self, date_from, date_to, timeslots):
+        """
+        Update the snapshot with the slots found for a date range. Returns whether anything changed.
+        """
+        now = time.time()
+        found = {ts.id_slot: ts for ts in timeslots}
+        changes = [
+            (ts, True) for id_slot, ts in self.slots.items()
+            if id_slot not in found and date_from <= ts.day <= date_to and ts.timestamp > now
+        ]
+        changes += [
+            (ts, False) for id_slot, ts in found.items()
+            if id_slot not in self.slots or self.slots[id_slot].timestamp != ts.timestamp
+        ]
+        # Slots that became due are forgotten silently; clients drop past slots themselves
+        self.slots = {id_slot: ts for id_slot, ts in self.slots.items() if ts.timestamp > now}
+        if changes:
+            self._apply(changes)
+        return bool(changes)
+
+    def remove(self, id_slot):
+        if id_slot in self.slots:
+            self._apply([(self.slots[id_slot], True)])
+
+    def changes_since(self, version, date_from, date_to):
+        """
+        Returns the slots added (or moved) and the slots removed within the date range since a version,
+        or None when that version is unknown or its changes are no longer logged.
+        """
+        if version is None or version < self.complete_since or version > self.version:
+            return None
+
+        last_change = {}
+        for change_version, ts, was_removed in self._changes:
+            if change_version > version:
+                last_change[ts.id_slot] = (ts, was_removed)
+
+        now = time.time()
+        added = []
+        removed = []
+        for ts, was_removed in last_change.values():
+            if not date_from <= ts.day <= date_to:
+                continue
+            # A slot added and removed again since the version is reported as removed, which clients can ignore
+            if was_removed:
+                removed.append(ts)
+            elif ts.timestamp > now:
+                added.append(ts)
+        return added, removed
+
+    def snapshot(self, date_from, date_to):
+        now = time.time()
+        return [ts for ts in self.slots.values() if date_from <= ts.day <= date_to and ts.timestamp > now]
+
+    def _apply(self, changes):
+        self.version += 1
+        for ts, was_removed in changes:
+            if was_removed:
+                self.slots.pop(ts.id_slot, None)
+            else:
+                self.slots[ts.id_slot] = ts
+            if len(self._changes) == self._changes.maxlen:
+                self.complete_since = self._changes[0][0]
+            self._changes.append((self.version, ts, was_removed))
+
+
+class SlotVersions:
+    """
+    Availability snapshots of all workshops, and the tokens that let clients ask for the changes since a response.
+    Versions live in this process: a token from another process or from before a restart leads to a full response.
+    """
+
+    def __init__(self, history_size):
+        self.history_size = history_size
+        self.epoch = secrets.token_hex(4)
+        self._workshops = {}
+
+    def workshop(self, id_workshop):
+        versions = self._workshops.get(id_workshop)
+        if versions is None:
+            versions = self._workshops[id_workshop] = WorkshopVersions(self.history_size)
+        return versions
+
+    def encode_token(self, date_from, date_to, versions):
+        token = {"epoch": self.epoch, "from": date_from, "to": date_to, "versions": versions}
+        return base64.urlsafe_b64encode(orjson.dumps(token, option=orjson.OPT_NON_STR_KEYS)).rstrip(b"=").decode("ascii")
+
+    def decode_token(self, token, date_from, date_to):
+        """
+        Returns the workshop versions a token was issued for; empty when the token is from another process
+        or for other dates. Raises ValueError for invalid tokens.
+        """
+        try:
+            data = orjson.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+            versions = {int(id_workshop): int(version) for id_workshop, version in data["versions"].items()}
+            token_from = datetime.date.fromisoformat(data["from"])
+            token_to = datetime.date.fromisoformat(data["to"])
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            raise ValueError(f"Invalid since token: {token}") from e
+
+        if data.get("epoch") != self.epoch or (token_from, token_to) != (date_from, date_to):
+            return {}
+        return versions
+
+    def workshop_refreshed(self, id_workshop):
+        pass
+
+    def slot_booked(self, id_workshop, id_slot):
+        versions = self._workshops.get(id_workshop)
+        if versions is not None:
+            versions.remove(id_slot)
+
+    def stats(self):
+        return {
+            "epoch": self.epoch,
+            "history_size": self.history_size,
+            "workshops": {
+                id_workshop: {"version": versions.version, "slots": len(versions.slots)}
+                for id_workshop, versions in sorted(self._workshops.items())
+            },
+        }
+
+
+_versions = None
+
+
+def get_slot_versions():
+    global _versions  # pylint: disable=global-statement
+    if _versions is None:
+        _versions = SlotVersions(app_config.SLOT_VERSION_HISTORY_SIZE)
+        get_slot_events().add_listener(_versions)
+    return _versions
+
+
+def reset_slot_versions():
+    global _versions  # pylint: disable=global-statement
+    _versions = None
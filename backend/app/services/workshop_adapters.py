@@ -0,0 +1,116 @@
+import os
+from string import Formatter
+
+from app.services.response_parsers import get_response_parser
+
+
+IN_DOCKER = os.path.exists("/.dockerenv")
+
+
+def rewrite_localhost(url):
+    """
+    When in docker, replace host machine links with container links.
+    """
+    return url.replace('//localhost', '//myhost') if IN_DOCKER else url
+
+
+def compile_template(template):
+    """
+    Pre-parses a str.format template into a function that only has to join the parts.
+    Fields are resolved like str.format does, including attribute and index lookups such as {date_from.year}.
+    """
+    formatter = Formatter()
+    parts = []
+    for literal, field, format_spec, conversion in formatter.parse(template):
+        if literal:
+            parts.append((literal, None, None, None))
+        if field is not None:
+            parts.append((None, field, format_spec, conversion))
+
+    def render(**values):
+        rendered = []
+        for literal, field, format_spec, conversion in parts:
+            if field is None:
+                rendered.append(literal)
+                continue
+            value, _ = formatter.get_field(field, (), values)
+            value = formatter.convert_field(value, conversion)
+            # Format specs may contain nested fields, e.g. {page:{width}}
+            if "{" in format_spec:
+                format_spec = formatter.vformat(format_spec, (), values)
+            rendered.append(format(value, format_spec))
+        return "".join(rendered)
+
+    return render
+
+
+class WorkshopAdapter:
+    """
+    Per-workshop values compiled once from a Workshop row: URL builders,
+    the response parser and the booking request builder.
+    """
+
+    def __init__(self, workshop):
+        self.workshop = workshop
+        self.id_workshop = workshop.id_workshop
+        self.name = workshop.name
+
+        self.url_available_times = rewrite_localhost(workshop.url_available_times)
+        self._build_availability_url = compile_template(self.url_available_times)
+        self.response_type = workshop.response_type
+        self._parser_class = get_response_parser(workshop.response_type)
+
+        self.timeout_in_seconds = workshop.timeout_in_seconds
+        self.hedge_after_in_ms = workshop.hedge_after_in_ms
+        self.max_stale_in_seconds = workshop.max_stale_in_seconds
+        self.max_range_in_days = workshop.max_range_in_days
+
+        self.booking_http_method = workshop.booking_http_method
+        self._build_booking_url = compile_template(rewrite_localhost(workshop.url_booking))
+        self._build_booking_body = compile_template(workshop.booking_body or "")
+
+    def availability_url(self, date_from, date_to):
+        return self._build_availability_url(date_from=date_from, date_to=date_to)
+
+    def create_parser(self, date_from, date_to):
+        """
+        Returns a parser for this workshop's response type, or None if the type is not supported.
+        """
+        if self._parser_class is None:
+            return None
+        return self._parser_class(self.id_workshop, date_from, date_to)
+
+    def booking_request(self, id_timeslot, contact_info):
+        return {
+            "method": self.booking_http_method,
+            "url": self._build_booking_url(id=id_timeslot),
+            "data": self._build_booking_body(contact_info=contact_info),
+        }
+
+
+ADAPTER_COLUMNS = (
+    "id_workshop", "name", "url_available_times",
+    "response_type", "url_booking", "booking_http_method", "booking_body",
+    "timeout_in_seconds", "hedge_after_in_ms", "max_stale_in_seconds",
+    "max_range_in_days",
+)
+
+_adapters = {}
+
+
+def get_workshop_adapter(workshop):
+    """
+    Returns the compiled adapter for a workshop row, recompiling it only when the row has changed.
+    """
+    fingerprint = tuple(getattr(workshop, column) for column in ADAPTER_COLUMNS)
+    cached = _adapters.get(workshop.id_workshop)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    adapter = WorkshopAdapter(workshop)
+    _adapters[workshop.id_workshop] = (fingerprint, adapter)
+    return adapter
+
+
+def reset_workshop_adapters():
+    _adapters.clear()
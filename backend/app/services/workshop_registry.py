@@ -0,0 +1,154 @@
+import time
+import threading
+from typing import NamedTuple
+
+from sqlalchemy import select, update
+
+import app.config as app_config
+from app.models import Workshop, WorkshopVehicleType, RegistryVersion
+
+
+WORKSHOPS_VERSION_NAME = "workshops"
+
+
+class WorkshopSnapshot(NamedTuple):
+    version: int
+    workshops: list
+    active: list
+    by_id: dict
+
+
+class WorkshopRegistry:
+    """
+    Process-local, versioned snapshot of all workshops.
+    The snapshot holds detached ORM objects, so reading it does not touch the database.
+    """
+
+    def __init__(self, version_check_interval=None):
+        self.version_check_interval = version_check_interval
+        self.loads = 0
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = 0
+        self._db_version = None
+        self._checked_at = 0.0
+
+    def snapshot(self, db):
+        snapshot = self._snapshot
+        if snapshot is not None and not self._changed_in_db(db):
+            return snapshot
+        return self._load(db)
+
+    def select(self, db, vehicle_types=None, cities=None, name=None):
+        """
+        Returns the active workshops matching normalized (lowercase) filters.
+        Filtering runs as an indexed SQL query that only returns IDs; the workshops come from the snapshot.
+        A search without filters is answered from the snapshot alone.
+        """
+        snapshot = self.snapshot(db)
+        if not vehicle_types and not cities and not name:
+            return snapshot.active
+        ids = query_workshop_ids(db, vehicle_types, cities, name)
+        return [snapshot.by_id[id_workshop] for id_workshop in ids if id_workshop in snapshot.by_id]
+
+    def invalidate(self, db=None):
+        """
+        Drop the snapshot after workshops have been changed and committed.
+        With cross-process checks enabled, the shared version counter is bumped as well.
+        """
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+        if db is not None and self.version_check_interval is not None:
+            bump_db_version(db)
+
+    def _changed_in_db(self, db):
+        if self.version_check_interval is None:
+            return False
+        if time.monotonic() - self._checked_at < self.version_check_interval:
+            return False
+
+        self._checked_at = time.monotonic()
+        return read_db_version(db) != self._db_version
+
+    def _load(self, db):
+        with self._lock:
+            version = self._version
+
+        db_version = read_db_version(db) if self.version_check_interval is not None else None
+        workshops = db.query(Workshop).order_by(Workshop.id_workshop).all()
+        for workshop in workshops:
+            db.expunge(workshop)
+        snapshot = WorkshopSnapshot(
+            version,
+            workshops,
+            [w for w in workshops if w.is_active],
+            {w.id_workshop: w for w in workshops},
+        )
+
+        with self._lock:
+            # Do not install a snapshot that was loaded while an invalidation happened
+            if self._version == version:
+                self._snapshot = snapshot
+                self._db_version = db_version
+                self._checked_at = time.monotonic()
+            self.loads += 1
+        return snapshot
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            "version": self._version,
+            "db_version": self._db_version,
+            "loaded": snapshot is not None,
+            "workshops": len(snapshot.workshops) if snapshot else 0,
+            "loads": self.loads,
+        }
+
+
+def query_workshop_ids(db, vehicle_types=None, cities=None, name=None):
+    """
+    Returns IDs of active workshops matching normalized filters, filtered in SQL.
+    """
+    query = db.query(Workshop.id_workshop).filter(Workshop.is_active)
+    if name:
+        query = query.filter(Workshop.name_normalized == name)
+    if cities:
+        query = query.filter(Workshop.city_normalized.in_(cities))
+    if vehicle_types:
+        query = query.filter(Workshop.id_workshop.in_(
+            select(WorkshopVehicleType.id_workshop).where(WorkshopVehicleType.vehicle_type.in_(vehicle_types))
+        ))
+    return [id_workshop for (id_workshop,) in query.order_by(Workshop.id_workshop)]
+
+
+def read_db_version(db):
+    row = db.get(RegistryVersion, WORKSHOPS_VERSION_NAME)
+    return row.version if row else 0
+
+
+def bump_db_version(db):
+    result = db.execute(
+        update(RegistryVersion)
+        .where(RegistryVersion.name == WORKSHOPS_VERSION_NAME)
+        .values(version=RegistryVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.add(RegistryVersion(name=WORKSHOPS_VERSION_NAME, version=1))
+    db.commit()
+
+
+_registry = None
+
+
+def get_workshop_registry():
+    global _registry  # pylint: disable=global-statement
+    if _registry is None:
+        _registry = WorkshopRegistry(app_config.WORKSHOP_REGISTRY_VERSION_CHECK_IN_SECONDS)
+    return _registry
+
+
+def reset_workshop_registry():
+    global _registry  # pylint: disable=global-statement
+    _registry = None
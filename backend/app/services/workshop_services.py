@@ -1,21 +1,59 @@
 import datetime
 from dateutil.relativedelta import relativedelta
 
-from app.models import Workshop
+from app.models import Workshop, split_vehicle_types
+from app.services.response_memo import get_response_memo
 from app.services.sanitization import sanitize_data
+from app.services.slot_cache import get_slot_cache
+from app.services.slot_store import clear_stored_slots
+from app.services.workshop_registry import get_workshop_registry
+from app.services.response_parsers import get_response_types
 import app.config as app_config
 
 
 def get_workshops(db, active_only=True):
     """
-    Retrieves workshops from the database, optionally filtering only active ones.
+    Retrieves workshops, optionally filtering only active ones.
+    Workshops are served from the in-memory registry, which only reads the database after a change.
+    """
+    snapshot = get_workshop_registry().snapshot(db)
+    return snapshot.active if active_only else snapshot.workshops
+
+
+# Workshop columns exposed by the API; the normalized search copies stay internal
+WORKSHOP_API_FIELDS = (
+    "id_workshop", "is_active", "name", "city", "address", "vehicle_types",
+    "url_available_times", "response_type", "url_booking", "booking_http_method", "booking_body",
+    "timeout_in_seconds", "hedge_after_in_ms", "max_stale_in_seconds", "max_range_in_days",
+)
+
+
+def workshop_to_dict(workshop):
+    """
+    The API fields of a workshop, ready for JSON serialization.
+    """
+    return {key: getattr(workshop, key) for key in WORKSHOP_API_FIELDS}
+
+
+def find_workshops(db, vehicle_types: str = None, cities: str = None, workshop_name: str = None):
     """
-    query = db.query(Workshop)
-    if active_only:
-        query = query.filter(Workshop.is_active)
+    Retrieves active workshops matching the search filters.
+    Vehicle types and cities are comma-separated; all filters are case-insensitive.
+    """
+    return get_workshop_registry().select(
+        db,
+        vehicle_types=split_vehicle_types(vehicle_types) if vehicle_types else None,
+        cities=cities.lower().split(",") if cities else None,
+        name=workshop_name.lower() if workshop_name else None,
+    )
 
-    workshops = query.all()
-    return workshops
+
+def find_active_workshop(db, id_workshop: int):
+    """
+    Retrieves an active workshop by ID, or None if there is no such workshop.
+    """
+    workshop = get_workshop_registry().snapshot(db).by_id.get(id_workshop)
+    return workshop if workshop is not None and workshop.is_active else None
 
 
 def get_default_date_range():
@@ -39,7 +77,7 @@ def get_filter_values(db):
         'cities': sorted(cities),
         'workshop_names': sorted(workshop_names),
         'booking_http_methods': app_config.BOOKING_HTTP_METHODS,
-        'response_types': app_config.RESPONSE_TYPES,
+        'response_types': get_response_types(),
     }
     return filters_data
 
@@ -57,13 +95,42 @@ def check_booking_http_method(booking_http_method):
 
 
 def check_response_type(response_type):
-    if response_type not in app_config.RESPONSE_TYPES:
+    if response_type not in get_response_types():
         raise ValueError(f"Invalid response type: {response_type}")
 
 
+# Optional numeric per-workshop settings and their types; empty values reset them to the global defaults
+OPTIONAL_NUMBER_FIELDS = {
+    "timeout_in_seconds": float,
+    "hedge_after_in_ms": int,
+    "max_stale_in_seconds": int,
+    "max_range_in_days": int,
+}
+
+
+def check_optional_number(workshop_data, key, number_type):
+    value = workshop_data[key]
+    if value is None or value == "":
+        workshop_data[key] = None
+        return
+
+    try:
+        number = number_type(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid {key}: {value}") from e
+    if number < 0:
+        raise ValueError(f"Invalid {key}: {value}")
+    workshop_data[key] = number
+
+
 def check_values(workshop_data: dict):
     for key in workshop_data:
-        workshop_data[key] = workshop_data[key].strip()
+        if isinstance(workshop_data[key], str):
+            workshop_data[key] = workshop_data[key].strip()
+
+    for key, number_type in OPTIONAL_NUMBER_FIELDS.items():
+        if key in workshop_data:
+            check_optional_number(workshop_data, key, number_type)
 
     if "vehicle_types" in workshop_data:
         check_vehicle_types(workshop_data["vehicle_types"])
@@ -80,6 +147,7 @@ def create_workshop(db, workshop_data: dict):
     workshop = Workshop(**sanitized_data)
     db.add(workshop)
     db.commit()
+    get_workshop_registry().invalidate(db)
     db.refresh(workshop)
     return workshop
 
@@ -95,8 +163,12 @@ def update_workshop(db, id_workshop: int, workshop_data: dict):
     for key, value in sanitized_data.items():
         setattr(workshop, key, value)
 
+    clear_stored_slots(db, id_workshop)
     db.commit()
+    get_workshop_registry().invalidate(db)
     db.refresh(workshop)
+    get_slot_cache().invalidate_workshop(id_workshop)
+    get_response_memo().invalidate_workshop(id_workshop)
     return workshop
 
 
@@ -107,4 +179,5 @@ def toggle_workshop_status(db, id_workshop: int):
 
     workshop.is_active = not workshop.is_active
     db.commit()
+    get_workshop_registry().invalidate(db)
     return {"success": True, "is_active": workshop.is_active}
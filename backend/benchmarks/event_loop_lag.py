@@ -0,0 +1,85 @@
+"""
+Measures how much parsing large workshop responses delays the event loop, with and without offloading.
+
+Run from the backend directory:
+    python -m benchmarks.event_loop_lag [slot count] [parse count]
+
+While the responses are parsed, a probe coroutine repeatedly sleeps for 1 ms and records how late it wakes up.
+That lateness is what every other request served by the same worker would experience.
+"""
+import sys
+import time
+import asyncio
+import datetime
+import statistics
+
+from app.models import Workshop, SAMPLE_WORKSHOP_DATA
+from app.services.parse_offload import ParseOffload
+from app.services.workshop_adapters import WorkshopAdapter
+
+
+PROBE_INTERVAL_IN_SECONDS = 0.001
+
+
+def xml_body(count, day):
+    items = "".join(
+        f"<availableTime><uuid>{i:08x}-0000-4000-8000-000000000000</uuid>"
+        f"<time>{day}T{i % 24:02}:{i % 60:02}:00Z</time></availableTime>"
+        for i in range(count)
+    )
+    return f"<tireChangeTimesResponse>{items}</tireChangeTimesResponse>".encode("utf-8")
+
+
+async def probe_lag(lags, stop):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL_IN_SECONDS)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL_IN_SECONDS)
+
+
+async def measure(offload, adapter, body, parse_count, day):
+    lags = []
+    stop = asyncio.Event()
+    probe = asyncio.ensure_future(probe_lag(lags, stop))
+    await asyncio.sleep(0.01)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        offload.parse(adapter, day, day, [body], len(body)) for _ in range(parse_count)
+    ))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+    offload.shutdown()
+    return elapsed, lags, sum(len(slots) for slots in results)
+
+
+def report(name, elapsed, lags, slot_count):
+    lags_in_ms = sorted(lag * 1000 for lag in lags)
+    p99 = lags_in_ms[min(len(lags_in_ms) - 1, int(len(lags_in_ms) * 0.99))]
+    print(
+        f"{name:<10} total {elapsed * 1000:8.1f} ms | slots {slot_count:>8} | "
+        f"loop lag mean {statistics.mean(lags_in_ms):7.2f} ms, p99 {p99:7.2f} ms, max {lags_in_ms[-1]:7.2f} ms"
+    )
+
+
+async def main(slot_count, parse_count):
+    day = datetime.date.today() + datetime.timedelta(days=1)
+    workshop = Workshop(**SAMPLE_WORKSHOP_DATA | {"id_workshop": 1, "response_type": "XML_uuid"})
+    adapter = WorkshopAdapter(workshop)
+    body = xml_body(slot_count, day)
+    print(f"{parse_count} responses of {len(body) / 1_000_000:.1f} MB, {slot_count} slots each")
+
+    variants = {
+        "inline": ParseOffload(None, "thread", 4),
+        "thread": ParseOffload(0, "thread", 4),
+        "process": ParseOffload(0, "process", 4),
+    }
+    for name, offload in variants.items():
+        report(name, *await measure(offload, adapter, body, parse_count, day))
+
+
+if __name__ == "__main__":
+    arguments = [int(argument) for argument in sys.argv[1:]]
+    asyncio.run(main(*(arguments + [50_000, 4][len(arguments):])))
@@ -3,21 +3,27 @@ import os
 from sqlalchemy import create_engine
 
 from app.config import DB_PATH
+from app.migrations import migrate_db
 from app.models import Base
 
 
 def init_db():
-    """ Initializes the database if it does not already exist. """
+    """ Initializes the database if it does not already exist, otherwise migrates it to the current models. """
+
+    engine = create_engine(f'sqlite:///{DB_PATH}')
 
     if not os.path.exists(DB_PATH):
         print("Database does not exist. Creating now...")
 
-        engine = create_engine(f'sqlite:///{DB_PATH}')
         Base.metadata.create_all(engine)
 
         print("Database created successfully.")
     else:
-        print("Database already exists. Skipping initialization.")
+        print("Database already exists. Migrating...")
+
+        result = migrate_db(engine)
+
+        print(f"Database migrated successfully: {result}")
 
 
 if __name__ == "__main__":
@@ -1,24 +1,48 @@
+import os
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db, enable_sqlite_pragmas
 from app.models import Workshop, SAMPLE_WORKSHOP_DATA
-
-
-# Use in-memory SQLite for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-
-engine = create_engine(
+from app.services.circuit_breaker import reset_circuit_breakers
+from app.services.concurrency import reset_upstream_limiter
+from app.services.failure_cache import reset_failure_cache
+from app.services.http_client import reset_http_client
+from app.services.latency_stats import reset_latency_stats
+from app.services.parse_offload import reset_parse_offload
+from app.services.rate_limiter import reset_rate_limiter
+from app.services.response_memo import reset_response_memo
+from app.services.single_flight import reset_upstream_flights
+from app.services.slot_cache import reset_slot_cache
+from app.services.slot_events import reset_slot_events
+from app.services.slot_refresher import reset_slot_refresher
+from app.services.slot_subscriptions import reset_slot_subscriptions
+from app.services.slot_versions import reset_slot_versions
+from app.services.workshop_adapters import reset_workshop_adapters
+from app.services.workshop_registry import reset_workshop_registry
+
+
+# Use a temporary SQLite file for testing, so the sync and async engines share the data
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(), "test.sqlite")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
+
+engine = enable_sqlite_pragmas(create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool
-)
+    connect_args={"check_same_thread": False}
+))
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# aiosqlite connections belong to the event loop that opened them, and tests run several loops
+async_engine = enable_sqlite_pragmas(create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}", poolclass=NullPool))
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def override_get_db():
     """Override the get_db dependency for testing"""
@@ -29,6 +53,12 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    """Override the get_async_db dependency for testing"""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 @pytest.fixture(autouse=True)
 def setup_database():
     """Create tables before each test and drop them after"""
@@ -37,24 +67,73 @@ def setup_database():
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def reset_service_state():
+    """Drop process-wide service state so tests do not leak into each other"""
+    reset_upstream_limiter()
+    reset_http_client()
+    reset_slot_cache()
+    reset_upstream_flights()
+    reset_workshop_adapters()
+    reset_workshop_registry()
+    reset_circuit_breakers()
+    reset_latency_stats()
+    reset_slot_refresher()
+    reset_response_memo()
+    reset_parse_offload()
+    reset_failure_cache()
+    reset_rate_limiter()
+    reset_slot_subscriptions()
+    reset_slot_versions()
+    reset_slot_events()
+    yield
+    reset_upstream_limiter()
+    reset_http_client()
+    reset_slot_cache()
+    reset_upstream_flights()
+    reset_workshop_adapters()
+    reset_workshop_registry()
+    reset_circuit_breakers()
+    reset_latency_stats()
+    reset_slot_refresher()
+    reset_response_memo()
+    reset_parse_offload()
+    reset_failure_cache()
+    reset_rate_limiter()
+    reset_slot_subscriptions()
+    reset_slot_versions()
+    reset_slot_events()
+
+
 @pytest.fixture
 def db_session(setup_database):
-    """Create a fresh database session for a test"""
-    connection = engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+    """Create a fresh database session for a test.
+    Data is committed for real, so requests made by the test client see it; tables are dropped after each test."""
+    session = TestingSessionLocal()
 
     yield session
 
     session.close()
-    transaction.rollback()
-    connection.close()
+
+
+@pytest.fixture
+async def async_db_session(setup_database):
+    """Create a fresh async database session for a test"""
+    async with TestingAsyncSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def async_session_factory(setup_database):
+    """Open independent async sessions, e.g. one per concurrent request"""
+    return TestingAsyncSessionLocal
 
 
 @pytest.fixture
 def app_with_db():
     """Create app instance with test database"""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     yield app
     app.dependency_overrides.clear()
 
@@ -0,0 +1,40 @@
+from app.services.circuit_breaker import get_circuit_breakers
+from app.services.http_client import get_http_client
+
+
+def test_http_pool_stats(client):
+    """Test that pool statistics are exposed for the shared HTTP client"""
+    response = client.get("/api/admin/http-pool")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["max_connections"] > 0
+    assert data["max_keepalive_connections"] > 0
+    assert data["connections"] == 0
+    assert data["connections_per_host"] == {}
+
+
+def test_http_client_is_shared(client):
+    """Test that the app lifespan owns a single client reused by all services"""
+    assert get_http_client() is get_http_client()
+    assert not get_http_client().is_closed
+
+
+def test_slot_cache_stats(client):
+    response = client.get("/api/admin/slot-cache")
+    assert response.status_code == 200
+    assert response.json()["days"] == 0
+
+
+def test_circuit_breakers(client):
+    get_circuit_breakers().get(5).record_failure(ValueError("boom"))
+
+    response = client.get("/api/admin/circuit-breakers")
+    assert response.status_code == 200
+    assert response.json()["5"]["consecutive_failures"] == 1
+
+    response = client.post("/api/admin/circuit-breakers/5/reset")
+    assert response.status_code == 200
+    assert response.json()["state"] == "closed"
+
+    assert client.post("/api/admin/circuit-breakers/6/reset").status_code == 404
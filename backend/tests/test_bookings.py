@@ -1,9 +1,16 @@
+import asyncio
+import json
+import time
 from datetime import date, timedelta
 from unittest.mock import patch, AsyncMock
 
 import httpx
 import pytest
 
+import app.config as app_config
+from app.models import Workshop, SAMPLE_WORKSHOP_DATA
+from app.services.booking_services import fetch_available_timeslots
+
 
 def test_get_available_timeslots(client, sample_workshop):
     """Test getting available timeslots with mocked external API"""
@@ -22,7 +29,7 @@ def test_get_available_timeslots(client, sample_workshop):
         request=httpx.Request("GET", "http://testserver")
     )
 
-    with patch("app.services.booking_services.httpx.AsyncClient.get",
+    with patch("app.services.booking_services.httpx.AsyncClient.send",
                new_callable=AsyncMock,
                return_value=mock_response):
         params = {
@@ -152,3 +159,99 @@ def test_book_timeslot_external_service_error(client, sample_workshop):
         data = response.json()
         assert data["status_code"] == 500
         assert "error" in data["message"].lower()
+
+
+def _make_workshops(db_session, count, host_template="http://workshop{}/available/{{date_from}}/{{date_to}}"):
+    workshops = []
+    for i in range(count):
+        workshop = Workshop(**SAMPLE_WORKSHOP_DATA | {
+            "name": f"Workshop {i}",
+            "url_available_times": host_template.format(i),
+        })
+        db_session.add(workshop)
+        workshops.append(workshop)
+    db_session.commit()
+    return workshops
+
+
+async def test_fetch_available_timeslots_runs_concurrently(db_session, async_db_session):
+    """Latency should be close to the slowest workshop rather than the sum of all"""
+    _make_workshops(db_session, 10)
+    tomorrow = date.today() + timedelta(days=1)
+
+    async def slow_get(self, request, **kwargs):
+        url = str(request.url)
+        await asyncio.sleep(0.2)
+        host = httpx.URL(url).host
+        return httpx.Response(
+            status_code=200,
+            json=[{"id": host, "time": f"{tomorrow}T10:00:00Z"}],
+            request=httpx.Request("GET", url)
+        )
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=slow_get):
+        started = time.perf_counter()
+        slots = await fetch_available_timeslots(async_db_session, date.today(), date.today() + timedelta(days=7))
+        elapsed = time.perf_counter() - started
+
+    assert len(slots) == 10
+    assert elapsed < 1.0
+    assert slots == sorted(slots, key=lambda slot: (slot["slot_datetime"], slot["id_workshop"]))
+
+
+async def test_fetch_available_timeslots_respects_per_host_limit(db_session, async_db_session, monkeypatch):
+    """No more than the configured number of requests should run against one host at a time"""
+    monkeypatch.setattr(app_config, "MAX_CONCURRENT_UPSTREAM_REQUESTS_PER_HOST", 2)
+    _make_workshops(db_session, 6, host_template="http://same-host/{}/{{date_from}}/{{date_to}}")
+    in_flight = 0
+    max_in_flight = 0
+
+    async def counting_get(self, request, **kwargs):
+        url = str(request.url)
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return httpx.Response(status_code=200, json=[], request=httpx.Request("GET", url))
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=counting_get):
+        await fetch_available_timeslots(async_db_session, date.today(), date.today() + timedelta(days=7))
+
+    assert max_in_flight == 2
+
+
+def test_stream_available_timeslots(client, db_session):
+    """Each workshop's slots should arrive on their own line, followed by a status summary"""
+    _make_workshops(db_session, 2)
+    tomorrow = date.today() + timedelta(days=1)
+
+    async def fake_get(self, request, **kwargs):
+        url = str(request.url)
+        if "workshop1" in url:
+            raise httpx.ConnectError("down")
+        return httpx.Response(
+            status_code=200,
+            json=[{"id": "1", "time": f"{tomorrow}T10:00:00Z"}, {"id": "2", "time": f"{tomorrow}T09:00:00Z"}],
+            request=httpx.Request("GET", url)
+        )
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=fake_get):
+        params = {
+            "date_from": date.today().isoformat(),
+            "date_to": (date.today() + timedelta(days=7)).isoformat(),
+        }
+        response = client.get("/api/booking/available-times/stream", params=params)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["type"] for line in lines] == ["slots", "slots", "summary"]
+
+    slots_by_workshop = {line["id_workshop"]: line for line in lines[:2]}
+    ok_line = next(line for line in slots_by_workshop.values() if line["status"] == "ok")
+    assert [slot["id_slot"] for slot in ok_line["slots"]] == ["2", "1"]
+
+    summary = lines[-1]["workshops"]
+    assert sorted(item["status"] for item in summary) == ["error", "ok"]
+    assert sum(item["slot_count"] for item in summary) == 2
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+import app.config as app_config
+from app.models import Workshop, SAMPLE_WORKSHOP_DATA
+from app.services.booking_services import search_available_timeslots, split_date_range, chunk_size_in_days
+from app.services.workshop_adapters import WorkshopAdapter
+
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def chunk_size(monkeypatch):
+    monkeypatch.setattr(app_config, "FETCH_CHUNK_SIZE_IN_DAYS", 14)
+
+
+def requested_range(request):
+    date_from, date_to = request.url.path.split("/")[-2:]
+    return date.fromisoformat(date_from), date.fromisoformat(date_to)
+
+
+def test_split_date_range():
+    assert split_date_range(TODAY, TODAY + timedelta(days=4), None) == [(TODAY, TODAY + timedelta(days=4))]
+    assert split_date_range(TODAY, TODAY + timedelta(days=4), 2) == [
+        (TODAY, TODAY + timedelta(days=1)),
+        (TODAY + timedelta(days=2), TODAY + timedelta(days=3)),
+        (TODAY + timedelta(days=4), TODAY + timedelta(days=4)),
+    ]
+
+
+def test_chunk_size_is_capped_by_the_workshop_max_range():
+    adapter = WorkshopAdapter(Workshop(**SAMPLE_WORKSHOP_DATA | {"id_workshop": 1, "max_range_in_days": 10}))
+    # Two days of every request are taken by the widening on both ends
+    assert chunk_size_in_days(adapter, 14) == 8
+    assert chunk_size_in_days(adapter) == 8
+    assert chunk_size_in_days(WorkshopAdapter(Workshop(**SAMPLE_WORKSHOP_DATA | {"id_workshop": 2})), 14) == 14
+
+
+async def test_long_search_is_fetched_in_concurrent_chunks(db_session, async_db_session, sample_workshop, chunk_size):
+    """A 60 day search is split into chunks that are requested concurrently and cached separately"""
+    requests = []
+    in_flight = 0
+    max_in_flight = 0
+
+    async def send(self, request, **kwargs):
+        nonlocal in_flight, max_in_flight
+        requests.append(request)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        date_from, _ = requested_range(request)
+        # Every chunk reports the same slot ID, at the start of its own range
+        slots = [{"id": "repeated", "time": f"{date_from + timedelta(days=1)}T10:00:00Z"}]
+        slots += [{"id": f"{date_from}-{i}", "time": f"{date_from + timedelta(days=i)}T10:00:00Z"} for i in range(1, 15)]
+        return httpx.Response(200, json=slots, request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        result = await search_available_timeslots(async_db_session, TODAY, TODAY + timedelta(days=60))
+        assert result["workshops"][0]["status"] == "ok"
+        assert len(requests) == 5  # 63 days including the widening, in chunks of 14 days
+        assert max_in_flight > 1
+
+        # A chunk is cached on its own, so a shorter search within it needs no request
+        cached = await search_available_timeslots(async_db_session, TODAY + timedelta(days=20), TODAY + timedelta(days=25))
+        assert cached["workshops"][0]["status"] == "cached"
+        assert len(requests) == 5
+
+    slot_ids = [slot["id_slot"] for slot in result["slots"]]
+    assert slot_ids.count("repeated") == 1
+    assert len(slot_ids) == len(set(slot_ids))
+
+
+async def test_requests_stay_within_the_workshop_max_range(db_session, async_db_session, sample_workshop, chunk_size):
+    sample_workshop.max_range_in_days = 7
+    db_session.commit()
+    ranges = []
+
+    async def send(self, request, **kwargs):
+        ranges.append(requested_range(request))
+        return httpx.Response(200, json=[], request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        await search_available_timeslots(async_db_session, TODAY, TODAY + timedelta(days=20))
+
+    assert len(ranges) == 5
+    assert all((date_to - date_from).days + 1 <= 7 for date_from, date_to in ranges)
+
+
+async def test_failed_chunk_keeps_the_fetched_ones(db_session, async_db_session, sample_workshop, chunk_size):
+    async def send(self, request, **kwargs):
+        date_from, _ = requested_range(request)
+        if date_from > TODAY:
+            return httpx.Response(500, request=request)
+        return httpx.Response(200, json=[{"id": "first", "time": f"{TODAY + timedelta(days=1)}T10:00:00Z"}], request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        result = await search_available_timeslots(async_db_session, TODAY, TODAY + timedelta(days=30))
+
+    assert result["workshops"][0]["status"] == "error"
+    assert [slot["id_slot"] for slot in result["slots"]] == ["first"]
+
+
+@pytest.mark.parametrize("path", ["/api/booking/available-times", "/api/booking/available-times/stream", "/api/booking/available-times/subscribe"])
+def test_search_range_is_limited(client, path):
+    date_to = TODAY + timedelta(days=app_config.MAX_SEARCH_RANGE_IN_DAYS)
+    response = client.get(path, params={"date_from": TODAY.isoformat(), "date_to": date_to.isoformat()})
+    assert response.status_code == 400
+    assert str(app_config.MAX_SEARCH_RANGE_IN_DAYS) in response.json()["detail"]
@@ -0,0 +1,93 @@
+import asyncio
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+
+from app.services.booking_services import fetch_available_timeslots, stream_available_timeslots
+from app.services.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN, get_circuit_breakers
+from app.services.slot_cache import get_slot_cache
+
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure(httpx.ReadTimeout("slow"), is_timeout=True)
+    breaker.record_success()
+    breaker.record_failure(httpx.ReadTimeout("slow"), is_timeout=True)
+    assert breaker.state == CLOSED
+
+    breaker.record_failure(httpx.ConnectError("down"))
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert not breaker.probe_due()
+    assert breaker.stats()["last_error"] == "down"
+
+
+def test_half_open_probe_decides_state():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure(ValueError("boom"))
+    assert breaker.probe_due()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.probe_due()
+
+    breaker.record_failure(ValueError("still broken"))
+    assert breaker.state == OPEN
+
+    assert breaker.probe_due()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+async def test_open_circuit_skips_upstream_and_probes_in_background(db_session, async_db_session, sample_workshop, monkeypatch):
+    breakers = get_circuit_breakers()
+    breakers.failure_threshold = 1
+    breakers.reset_timeout = 0
+    requests_made = 0
+    healthy = False
+
+    async def flaky_send(self, request, **kwargs):
+        nonlocal requests_made
+        requests_made += 1
+        if not healthy:
+            raise httpx.ConnectError("down")
+        return httpx.Response(200, json=[{"id": "1", "time": f"{TOMORROW}T10:00:00Z"}], request=request)
+
+    monkeypatch.setattr(get_slot_cache(), "ttl_in_seconds", 0)
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=flaky_send):
+        assert await fetch_available_timeslots(async_db_session, TODAY, TODAY + timedelta(days=7)) == []
+        assert requests_made == 1
+        assert breakers.get(sample_workshop.id_workshop).state == OPEN
+
+        # The search does not wait for the upstream; a background probe is started instead
+        healthy = True
+        assert await fetch_available_timeslots(async_db_session, TODAY, TODAY + timedelta(days=7)) == []
+        breaker = breakers.get(sample_workshop.id_workshop)
+        if breaker.probe_task is not None:
+            await breaker.probe_task
+        assert breaker.state == CLOSED
+        assert requests_made == 2
+
+        assert len(await fetch_available_timeslots(async_db_session, TODAY, TODAY + timedelta(days=7))) == 1
+
+
+async def test_open_circuit_serves_stale_slots(db_session, async_db_session, sample_workshop):
+    async def send(self, request, **kwargs):
+        return httpx.Response(200, json=[{"id": "1", "time": f"{TOMORROW}T10:00:00Z"}], request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        await fetch_available_timeslots(async_db_session, TODAY, TODAY + timedelta(days=7))
+
+    get_slot_cache().ttl_in_seconds = -1
+    breaker = get_circuit_breakers().get(sample_workshop.id_workshop)
+    breaker.reset_timeout = 60
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(httpx.ConnectError("down"))
+
+    items = [item async for item in await stream_available_timeslots(async_db_session, TODAY, TODAY + timedelta(days=7))]
+    assert items[0]["status"] == "circuit_open"
+    assert [slot["id_slot"] for slot in items[0]["slots"]] == ["1"]
+    await asyncio.sleep(0)
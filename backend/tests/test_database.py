@@ -0,0 +1,20 @@
+from sqlalchemy import text
+
+from app.database import SQLITE_PRAGMAS
+
+
+async def test_async_session_uses_wal_and_pragmas(async_db_session):
+    journal_mode = (await async_db_session.execute(text("PRAGMA journal_mode"))).scalar()
+    busy_timeout = (await async_db_session.execute(text("PRAGMA busy_timeout"))).scalar()
+
+    assert journal_mode.upper() == "WAL"
+    assert busy_timeout == SQLITE_PRAGMAS["busy_timeout"]
+
+
+def test_booking_unknown_workshop(client):
+    """Booking reads the workshop through the async path and reports unknown workshops"""
+    params = {"id_workshop": 999, "customer_phone": "+1234567890"}
+    response = client.post("/api/booking/reserve/test-slot-id", params=params)
+
+    assert response.status_code == 200
+    assert response.json()["status_code"] == 400
@@ -0,0 +1,66 @@
+import asyncio
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+
+from app.models import Workshop, SAMPLE_WORKSHOP_DATA
+
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+
+
+def add_workshops(db_session, names):
+    for name in names:
+        db_session.add(Workshop(**SAMPLE_WORKSHOP_DATA | {
+            "name": name,
+            "url_available_times": f"http://{name.lower()}/{{date_from}}/{{date_to}}",
+        }))
+    db_session.commit()
+
+
+async def send(self, request, **kwargs):
+    host = request.url.host
+    if host == "slow":
+        await asyncio.sleep(2)
+    if host == "broken":
+        return httpx.Response(500, request=request)
+    return httpx.Response(200, json=[{"id": host, "time": f"{TOMORROW}T10:00:00Z"}], request=request)
+
+
+def test_deadline_returns_partial_results_with_status(client, db_session):
+    add_workshops(db_session, ["Fast", "Slow", "Broken"])
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        params = {
+            "date_from": TODAY.isoformat(),
+            "date_to": (TODAY + timedelta(days=7)).isoformat(),
+            "deadline_ms": 300,
+        }
+        response = client.get("/api/booking/available-times", params=params)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [slot["id_slot"] for slot in data["slots"]] == ["fast"]
+
+    statuses = {item["name"]: item for item in data["workshops"]}
+    assert statuses["Fast"]["status"] == "ok"
+    assert statuses["Slow"]["status"] == "timeout"
+    assert statuses["Broken"]["status"] == "error"
+    assert "500" in statuses["Broken"]["error"]
+
+
+def test_deadline_must_be_positive(client):
+    params = {"date_from": TODAY.isoformat(), "date_to": TODAY.isoformat(), "deadline_ms": 0}
+    assert client.get("/api/booking/available-times", params=params).status_code == 422
+
+
+def test_without_deadline_response_is_a_list(client, db_session):
+    add_workshops(db_session, ["Fast"])
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        params = {"date_from": TODAY.isoformat(), "date_to": (TODAY + timedelta(days=7)).isoformat()}
+        response = client.get("/api/booking/available-times", params=params)
+
+    assert isinstance(response.json(), list)
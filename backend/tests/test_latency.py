@@ -0,0 +1,154 @@
+import asyncio
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+
+import app.config as app_config
+from app.services.booking_services import fetch_available_timeslots, request_workshop_timeslots
+from app.services.http_client import get_http_client
+from app.services.latency_stats import LatencyTracker, get_latency_stats
+from app.services.workshop_adapters import get_workshop_adapter
+
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+
+
+def warmed_up_tracker(latency, samples=20):
+    tracker = LatencyTracker(window_size=100, min_samples=samples)
+    for _ in range(samples):
+        tracker.record(latency)
+    return tracker
+
+
+def test_percentiles_need_enough_samples():
+    tracker = LatencyTracker(window_size=100, min_samples=3)
+    tracker.record(0.1)
+    assert tracker.percentile(95) is None
+    assert tracker.timeout() == app_config.TIMEOUT_IN_SECONDS
+
+    tracker.record(0.2)
+    tracker.record(0.3)
+    assert tracker.percentile(50) == 0.2
+    assert tracker.percentile(95) == 0.3
+
+
+def test_timeout_is_derived_from_latency_and_bounded():
+    assert warmed_up_tracker(0.5).timeout() == 0.5 * app_config.ADAPTIVE_TIMEOUT_MULTIPLIER
+    assert warmed_up_tracker(0.01).timeout() == app_config.ADAPTIVE_TIMEOUT_MIN_IN_SECONDS
+    assert warmed_up_tracker(60).timeout() == app_config.TIMEOUT_IN_SECONDS
+    assert warmed_up_tracker(0.5).timeout(override=7) == 7
+
+
+def test_timeouts_widen_the_timeout_until_a_success():
+    tracker = warmed_up_tracker(0.5)
+    tracker.record_timeout(tracker.timeout())
+    assert tracker.timeout() == app_config.TIMEOUT_IN_SECONDS
+
+    tracker.record(0.5)
+    assert tracker.timeout() == 1.5 * app_config.ADAPTIVE_TIMEOUT_MULTIPLIER
+
+
+async def test_workshop_that_slowed_down_is_reached_again(sample_workshop, monkeypatch):
+    """A workshop slower than its learned timeout times out once, and is then given the full timeout"""
+    monkeypatch.setattr(app_config, "ADAPTIVE_TIMEOUT_MIN_IN_SECONDS", 0.05)
+    monkeypatch.setattr(app_config, "TIMEOUT_IN_SECONDS", 1)
+    monkeypatch.setattr(app_config, "HEDGING_ENABLED", False)
+    adapter = get_workshop_adapter(sample_workshop)
+    tracker = get_latency_stats().get(sample_workshop.id_workshop)
+    for _ in range(app_config.LATENCY_MIN_SAMPLES):
+        tracker.record(0.02)
+    assert tracker.timeout() < 0.15
+
+    async def send(self, request, **kwargs):
+        await asyncio.sleep(0.15)
+        return httpx.Response(200, json=[{"id": "1", "time": f"{TOMORROW}T10:00:00Z"}], request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        assert await request_workshop_timeslots(get_http_client(), adapter, TODAY, TOMORROW) is None
+        slots = await request_workshop_timeslots(get_http_client(), adapter, TODAY, TOMORROW)
+
+    assert [slot.id_slot for slot in slots] == ["1"]
+    assert tracker.consecutive_timeouts == 0
+
+
+def test_hedge_delay_overrides():
+    tracker = warmed_up_tracker(0.2)
+    assert tracker.hedge_delay() == 0.2
+    assert tracker.hedge_delay(override_in_ms=50) == 0.05
+    assert tracker.hedge_delay(override_in_ms=0) is None
+
+
+async def test_slow_request_is_hedged(db_session, async_db_session, sample_workshop):
+    """A request running past the workshop's p95 gets a duplicate, and the faster answer is used"""
+    sample_workshop.hedge_after_in_ms = 50
+    db_session.commit()
+    get_latency_stats().get(sample_workshop.id_workshop).requests = 100
+    calls = 0
+
+    async def send(self, request, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(5)
+        return httpx.Response(200, json=[{"id": str(calls), "time": f"{TOMORROW}T10:00:00Z"}], request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        slots = await asyncio.wait_for(fetch_available_timeslots(async_db_session, TODAY, TODAY + timedelta(days=7)), 2)
+
+    assert [slot["id_slot"] for slot in slots] == ["2"]
+    stats = get_latency_stats().get(sample_workshop.id_workshop).stats()
+    assert stats["hedges"] == 1
+    assert stats["hedges_won"] == 1
+
+
+async def test_per_workshop_timeout_override(db_session, async_db_session, sample_workshop):
+    sample_workshop.timeout_in_seconds = 0.1
+    db_session.commit()
+
+    async def hanging_send(self, request, **kwargs):
+        await asyncio.sleep(5)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=hanging_send):
+        slots = await asyncio.wait_for(fetch_available_timeslots(async_db_session, TODAY, TODAY + timedelta(days=7)), 2)
+
+    assert slots == []
+
+
+async def test_queueing_for_a_host_slot_is_not_upstream_latency(db_session, sample_workshop, monkeypatch):
+    """Requests waiting for a concurrency slot are neither timed out nor hedged, and their wait is not recorded"""
+    monkeypatch.setattr(app_config, "MAX_CONCURRENT_UPSTREAM_REQUESTS_PER_HOST", 1)
+    sample_workshop.timeout_in_seconds = 0.25
+    sample_workshop.hedge_after_in_ms = 150
+    db_session.commit()
+    adapter = get_workshop_adapter(sample_workshop)
+    tracker = get_latency_stats().get(sample_workshop.id_workshop)
+    tracker.requests = 100
+
+    async def send(self, request, **kwargs):
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, json=[{"id": "1", "time": f"{TOMORROW}T10:00:00Z"}], request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        results = await asyncio.gather(*(
+            request_workshop_timeslots(get_http_client(), adapter, TODAY + timedelta(days=days), TOMORROW + timedelta(days=days))
+            for days in range(3)
+        ))
+
+    assert all(timeslots is not None for timeslots in results)
+    assert tracker.hedges == 0
+    assert max(tracker._samples) < 0.2  # pylint: disable=protected-access
+
+
+def test_overrides_are_stored_on_workshop(client, sample_workshop):
+    response = client.put(f"/api/workshops/{sample_workshop.id_workshop}", json={"timeout_in_seconds": "2.5", "hedge_after_in_ms": 300})
+    assert response.status_code == 200
+    assert response.json()["timeout_in_seconds"] == 2.5
+    assert response.json()["hedge_after_in_ms"] == 300
+
+    response = client.put(f"/api/workshops/{sample_workshop.id_workshop}", json={"timeout_in_seconds": ""})
+    assert response.json()["timeout_in_seconds"] is None
+
+    response = client.put(f"/api/workshops/{sample_workshop.id_workshop}", json={"hedge_after_in_ms": "soon"})
+    assert response.status_code == 400
@@ -0,0 +1,44 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.migrations import migrate_db
+from app.models import Workshop
+from app.services.workshop_registry import query_workshop_ids
+
+
+LEGACY_SCHEMA = """
+CREATE TABLE workshops (
+    id_workshop INTEGER NOT NULL, is_active BOOLEAN, name VARCHAR NOT NULL, city VARCHAR NOT NULL,
+    address VARCHAR NOT NULL, vehicle_types VARCHAR, url_available_times VARCHAR NOT NULL,
+    response_type VARCHAR NOT NULL, url_booking VARCHAR NOT NULL, booking_http_method VARCHAR NOT NULL,
+    booking_body VARCHAR, PRIMARY KEY (id_workshop)
+)
+"""
+
+
+def test_migrate_legacy_database(tmp_path):
+    """A database created by the original init_db.py should be upgraded in place"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.sqlite'}")
+    with engine.begin() as connection:
+        connection.execute(text(LEGACY_SCHEMA))
+        connection.execute(text(
+            "INSERT INTO workshops VALUES (1, 1, 'Old Workshop', 'Tallinn', 'Street 1', 'Car,Truck',"
+            " 'http://a/{date_from}/{date_to}', 'JSON_id', 'http://a/{id}', 'POST', '{contact_info}')"
+        ))
+
+    result = migrate_db(engine)
+
+    assert "workshops.city_normalized" in result["added_columns"]
+    assert result["backfilled_workshops"] == 1
+    inspector = inspect(engine)
+    assert "workshop_vehicle_types" in inspector.get_table_names()
+    assert any(index["column_names"] == ["city_normalized"] for index in inspector.get_indexes("workshops"))
+
+    with Session(engine) as db:
+        workshop = db.get(Workshop, 1)
+        assert workshop.city_normalized == "tallinn"
+        assert sorted(link.vehicle_type for link in workshop.vehicle_type_links) == ["car", "truck"]
+        assert query_workshop_ids(db, vehicle_types=["truck"], cities=["tallinn"]) == [1]
+
+    # Running it again is a no-op
+    assert migrate_db(engine) == {"added_columns": [], "backfilled_workshops": 0}
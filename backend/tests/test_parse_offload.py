@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+import app.config as app_config
+from app.models import Workshop, SAMPLE_WORKSHOP_DATA
+from app.services.booking_services import request_workshop_timeslots
+from app.services.http_client import get_http_client
+from app.services.parse_offload import get_parse_offload
+from app.services.workshop_adapters import get_workshop_adapter
+
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+
+
+def xml_body(count):
+    items = "".join(
+        f"<availableTime><uuid>slot-{i}</uuid><time>{TOMORROW}T{i % 24:02}:{i % 60:02}:00Z</time></availableTime>"
+        for i in range(count)
+    )
+    return f"<tireChangeTimesResponse>{items}</tireChangeTimesResponse>".encode("utf-8")
+
+
+@pytest.fixture
+def xml_workshop(db_session):
+    workshop = Workshop(**SAMPLE_WORKSHOP_DATA | {"response_type": "XML_uuid"})
+    db_session.add(workshop)
+    db_session.commit()
+    return workshop
+
+
+async def request_slots(workshop, body):
+    async def send(self, request, **kwargs):
+        return httpx.Response(200, content=body, request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        return await request_workshop_timeslots(get_http_client(), get_workshop_adapter(workshop), TODAY, TOMORROW)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+async def test_large_bodies_are_parsed_in_the_pool(xml_workshop, monkeypatch, executor):
+    monkeypatch.setattr(app_config, "PARSE_OFFLOAD_THRESHOLD_IN_BYTES", 10_000)
+    monkeypatch.setattr(app_config, "PARSE_OFFLOAD_EXECUTOR", executor)
+    body = xml_body(500)
+
+    timeslots = await request_slots(xml_workshop, body)
+
+    assert len(timeslots) == 500
+    assert timeslots[0].id_workshop == xml_workshop.id_workshop
+    assert timeslots[0].slot_datetime.tzinfo is not None
+    stats = get_parse_offload().stats()
+    assert stats["offloaded"] == 1
+    assert stats["offloaded_bytes"] == len(body)
+
+
+async def test_small_bodies_are_parsed_inline(xml_workshop, monkeypatch):
+    monkeypatch.setattr(app_config, "PARSE_OFFLOAD_THRESHOLD_IN_BYTES", 10_000)
+
+    timeslots = await request_slots(xml_workshop, xml_body(5))
+
+    assert len(timeslots) == 5
+    assert get_parse_offload().stats()["offloaded"] == 0
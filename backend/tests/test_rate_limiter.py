@@ -0,0 +1,152 @@
+import asyncio
+import datetime
+from datetime import date, timedelta
+from email.utils import format_datetime
+from unittest.mock import patch, AsyncMock
+
+import httpx
+import pytest
+
+import app.config as app_config
+from app.services.booking_services import search_available_timeslots
+from app.services.circuit_breaker import get_circuit_breakers
+from app.services.failure_cache import get_failure_cache
+from app.services.rate_limiter import TokenBucket, HostRateLimiter, RateLimitExceeded, parse_retry_after, get_rate_limiter
+
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+
+
+def test_bucket_allows_a_burst_then_spreads_requests():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve(max_wait=10) == 0
+    assert bucket.reserve(max_wait=10) == 0
+    assert bucket.reserve(max_wait=10) == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve(max_wait=10) == pytest.approx(0.2, abs=0.01)
+
+    with pytest.raises(RateLimitExceeded):
+        bucket.reserve(max_wait=0.1)
+
+
+def test_bucket_without_rate_only_honours_pauses():
+    bucket = TokenBucket(rate=None, burst=None)
+    assert all(bucket.reserve(max_wait=0) == 0 for _ in range(100))
+    bucket.pause(5)
+    assert bucket.reserve(max_wait=10) == pytest.approx(5, abs=0.1)
+
+
+async def test_cancelled_waiter_gives_back_its_reservation():
+    bucket = TokenBucket(rate=10, burst=1)
+    await bucket.acquire(max_wait=10)
+    waiter = asyncio.ensure_future(bucket.acquire(max_wait=10))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.sleep(0)
+
+    assert bucket.waiting == 0
+    assert bucket.reserve(max_wait=10) == pytest.approx(0.09, abs=0.01)
+
+
+def test_try_acquire_never_waits():
+    bucket = TokenBucket(rate=10, burst=1)
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.requests == 1
+    assert bucket.reserve(max_wait=10) == pytest.approx(0.1, abs=0.01)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    retry_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(retry_at, usegmt=True)) == pytest.approx(30, abs=2)
+
+
+async def test_requests_queue_while_over_the_rate():
+    limiter = HostRateLimiter(rate=20, burst=1, max_wait_in_seconds=10)
+    waiters = [asyncio.ensure_future(limiter.acquire("http://workshop_api/a")) for _ in range(4)]
+    await asyncio.sleep(0.01)
+    assert limiter.stats()["hosts"]["workshop_api"]["queue_depth"] == 3
+
+    waits = await asyncio.gather(*waiters)
+    assert max(waits) == pytest.approx(0.15, abs=0.05)
+    stats = limiter.stats()["hosts"]["workshop_api"]
+    assert stats["queue_depth"] == 0
+    assert stats["requests"] == 4
+    assert stats["delayed"] == 3
+
+
+async def test_search_waits_for_retry_after(db_session, async_db_session, sample_workshop):
+    """A 429 answer pauses the host and the request is retried instead of reporting no availability"""
+    responses = []
+
+    async def send(self, request, **kwargs):
+        if not responses:
+            responses.append(429)
+            return httpx.Response(429, headers={"Retry-After": "0"}, request=request)
+        responses.append(200)
+        return httpx.Response(200, json=[{"id": "1", "time": f"{TOMORROW}T10:00:00Z"}], request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        result = await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+
+    assert responses == [429, 200]
+    assert result["workshops"][0]["status"] == "ok"
+    assert [slot["id_slot"] for slot in result["slots"]] == ["1"]
+    assert get_rate_limiter().stats()["hosts"]["workshop_api"]["throttled"] == 1
+
+
+async def test_throttled_search_is_not_a_workshop_failure(db_session, async_db_session, sample_workshop):
+    """A request the local rate limit holds back is reported, but neither trips the breaker nor is negatively cached"""
+    requests = []
+
+    async def send(self, request, **kwargs):
+        requests.append(request)
+        return httpx.Response(200, json=[{"id": "1", "time": f"{TOMORROW}T10:00:00Z"}], request=request)
+
+    bucket = get_rate_limiter().bucket(sample_workshop.url_available_times)
+    bucket.pause(app_config.UPSTREAM_RATE_LIMIT_MAX_WAIT_IN_SECONDS + 60)
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        throttled = await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+        assert requests == []
+        assert throttled["workshops"][0]["status"] == "throttled"
+        assert get_circuit_breakers().get(sample_workshop.id_workshop).consecutive_failures == 0
+        assert get_failure_cache().stats()["failures"] == []
+
+        bucket.paused_until = 0.0
+        result = await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+
+    assert result["workshops"][0]["status"] == "ok"
+    assert len(requests) == 1
+
+
+def test_booking_is_retried_after_throttling(client, sample_workshop):
+    responses = [httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(200, json={"status": "success"})]
+
+    with patch("app.services.booking_services.httpx.AsyncClient.request", new_callable=AsyncMock, side_effect=responses):
+        response = client.post(
+            "/api/booking/reserve/test-slot-id",
+            params={"id_workshop": sample_workshop.id_workshop, "customer_phone": "+1234567890"}
+        )
+
+    assert response.json()["status_code"] == 200
+    stats = client.get("/api/admin/rate-limits").json()
+    assert stats["hosts"]["workshop_api"]["requests"] == 2
+    assert stats["hosts"]["workshop_api"]["throttled"] == 1
+
+
+def test_booking_reports_a_busy_workshop(client, sample_workshop, monkeypatch):
+    monkeypatch.setattr(app_config, "UPSTREAM_MAX_RETRIES_AFTER_THROTTLING", 0)
+    response_429 = httpx.Response(429, headers={"Retry-After": "120"})
+
+    with patch("app.services.booking_services.httpx.AsyncClient.request", new_callable=AsyncMock, return_value=response_429):
+        params = {"id_workshop": sample_workshop.id_workshop, "customer_phone": "+1234567890"}
+        first = client.post("/api/booking/reserve/test-slot-id", params=params)
+        # The host is paused for longer than the max wait, so the next booking is not even sent
+        second = client.post("/api/booking/reserve/test-slot-id", params=params)
+
+    assert first.json()["status_code"] == 429
+    assert second.json()["status_code"] == 429
+    assert client.get("/api/admin/rate-limits").json()["hosts"]["workshop_api"]["requests"] == 1
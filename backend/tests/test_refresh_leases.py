@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import subprocess
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.models import Workshop, RefreshLease, SAMPLE_WORKSHOP_DATA
+from app.services.refresh_leases import acquire_leases, release_leases
+from app.services.slot_refresher import SlotRefresher
+
+
+TOMORROW = date.today() + timedelta(days=1)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def workshop_ids(db_session):
+    workshops = [Workshop(**SAMPLE_WORKSHOP_DATA | {"name": f"Workshop {i}"}) for i in range(3)]
+    db_session.add_all(workshops)
+    db_session.commit()
+    return [workshop.id_workshop for workshop in workshops]
+
+
+def test_lease_is_held_by_one_owner_until_it_expires(db_session, workshop_ids):
+    assert acquire_leases(db_session, workshop_ids, "worker-a", 60) == set(workshop_ids)
+    assert acquire_leases(db_session, workshop_ids, "worker-b", 60) == set()
+    assert acquire_leases(db_session, workshop_ids, "worker-a", 60) == set(workshop_ids)  # Renewal
+
+    # worker-a died: its leases expire and worker-b takes over
+    db_session.query(RefreshLease).update({"expires_at": RefreshLease.expires_at - timedelta(minutes=5)})
+    db_session.commit()
+    assert acquire_leases(db_session, workshop_ids, "worker-b", 60) == set(workshop_ids)
+    assert acquire_leases(db_session, workshop_ids, "worker-a", 60) == set()
+
+
+def test_released_leases_are_free(db_session, workshop_ids):
+    acquire_leases(db_session, workshop_ids, "worker-a", 60)
+    release_leases(db_session, "worker-a")
+    assert acquire_leases(db_session, workshop_ids, "worker-b", 60) == set(workshop_ids)
+
+
+ACQUIRE_SCRIPT = """
+import sys, json
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.database import enable_sqlite_pragmas
+from app.services.refresh_leases import acquire_leases
+
+engine = enable_sqlite_pragmas(create_engine(f"sqlite:///{sys.argv[1]}"))
+with Session(engine) as db:
+    print(json.dumps(sorted(acquire_leases(db, json.loads(sys.argv[2]), sys.argv[3], 60))))
+"""
+
+
+def test_each_workshop_is_leased_to_exactly_one_process(db_session, workshop_ids):
+    db_path = db_session.get_bind().url.database
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", ACQUIRE_SCRIPT, db_path, json.dumps(workshop_ids), f"process-{i}"],
+            stdout=subprocess.PIPE,
+            cwd=BACKEND_DIR,
+        )
+        for i in range(4)
+    ]
+    owned = [json.loads(process.communicate(timeout=30)[0]) for process in processes]
+
+    assert sorted(id_workshop for ids in owned for id_workshop in ids) == sorted(workshop_ids)
+
+
+async def test_workers_share_the_refresh_work(async_session_factory, workshop_ids):
+    def create_refresher():
+        return SlotRefresher(async_session_factory, 14, min_interval=10, max_interval=100, tick=1, lease_duration=60)
+
+    requests = []
+
+    async def send(self, request, **kwargs):
+        requests.append(str(request.url))
+        return httpx.Response(200, json=[{"id": 1, "time": f"{TOMORROW}T10:00:00Z"}], request=request)
+
+    first, second = create_refresher(), create_refresher()
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        assert await first.refresh_due() == 3
+        assert await second.refresh_due() == 0
+        assert len(requests) == 3
+
+        # A stopped worker hands its workshops over right away
+        first.start()
+        await first.stop()
+        assert await second.refresh_due() == 3
@@ -0,0 +1,156 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+
+import app.config as app_config
+from app.models import Slot
+from app.services.booking_services import request_workshop_timeslots, search_available_timeslots
+from app.services.http_client import get_http_client
+from app.services.parse_offload import get_parse_offload
+from app.services.response_memo import ResponseMemo, get_response_memo
+from app.services.slot_cache import get_slot_cache
+from app.services.workshop_adapters import get_workshop_adapter
+from app.services.workshop_services import update_workshop
+
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+SLOTS = [{"id": 1, "time": f"{TOMORROW}T10:00:00Z"}, {"id": 2, "time": f"{TOMORROW}T11:00:00Z"}]
+
+
+async def request_slots(workshop):
+    return await request_workshop_timeslots(get_http_client(), get_workshop_adapter(workshop), TODAY, TOMORROW)
+
+
+async def test_not_modified_responses_reuse_the_previous_slots(sample_workshop):
+    received_headers = []
+
+    async def send(self, request, **kwargs):
+        received_headers.append(request.headers)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, request=request)
+        return httpx.Response(200, json=SLOTS, headers={"ETag": '"v1"'}, request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        first = await request_slots(sample_workshop)
+        second = await request_slots(sample_workshop)
+
+    assert "If-None-Match" not in received_headers[0]
+    assert received_headers[1]["If-None-Match"] == '"v1"'
+    assert [slot.id_slot for slot in second] == [slot.id_slot for slot in first] == ["1", "2"]
+
+    stats = get_response_memo().stats()
+    assert stats["parsed"] == 1
+    assert stats["not_modified"] == 1
+    assert stats["skipped_parse_ratio"] == 0.5
+
+
+async def test_identical_bodies_are_not_parsed_again(sample_workshop):
+    bodies = [SLOTS, SLOTS, SLOTS[:1]]
+
+    async def send(self, request, **kwargs):
+        return httpx.Response(200, json=bodies.pop(0), headers={"Last-Modified": "x"}, request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        results = [await request_slots(sample_workshop) for _ in range(3)]
+
+    assert [len(slots) for slots in results] == [2, 2, 1]
+    stats = get_response_memo().stats()
+    assert stats["parsed"] == 2
+    assert stats["unchanged_bodies"] == 1
+    assert stats["skipped_bytes"] > 0
+
+
+async def test_large_bodies_are_hashed_while_parsed(sample_workshop, monkeypatch):
+    """Without a size that allows buffering, an unchanged body is still parsed incrementally"""
+    monkeypatch.setattr(app_config, "PARSE_OFFLOAD_THRESHOLD_IN_BYTES", None)
+    monkeypatch.setattr(app_config, "RESPONSE_MEMO_MAX_BUFFERED_BYTES", 10)
+
+    async def send(self, request, **kwargs):
+        return httpx.Response(200, json=SLOTS, request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        results = [await request_slots(sample_workshop) for _ in range(2)]
+
+    assert [[slot.id_slot for slot in slots] for slots in results] == [["1", "2"], ["1", "2"]]
+    assert get_parse_offload().stats()["inline"] == 0  # Nothing was buffered for the pool's inline path
+    stats = get_response_memo().stats()
+    assert stats["parsed"] == 2
+    assert stats["entries"] == 1
+
+
+def test_memo_is_bounded_by_slots():
+    memo = ResponseMemo(max_entries=10, max_slots=3, max_buffered_bytes=0)
+    slots = [Slot(1, str(i), 2_000_000_000 + i, 0) for i in range(2)]
+
+    first_window, second_window = (1, TODAY, TODAY), (1, TOMORROW, TOMORROW)
+    memo._store(first_window, httpx.Response(200), "hash-a", slots)  # pylint: disable=protected-access
+    memo._store(second_window, httpx.Response(200), "hash-b", slots)  # pylint: disable=protected-access
+
+    assert memo.get(first_window) is None
+    assert memo.get(second_window) is not None
+    assert memo.stats()["slots"] == 2
+
+
+async def test_responses_are_remembered_per_window(db_session, sample_workshop):
+    """A URL without dates answers every window with the same body, which is filtered differently per window"""
+    sample_workshop.url_available_times = "http://workshop_api/available"
+    db_session.commit()
+    later = TODAY + timedelta(days=10)
+    body = [{"id": 1, "time": f"{TOMORROW}T10:00:00Z"}, {"id": 2, "time": f"{later}T10:00:00Z"}]
+
+    async def send(self, request, **kwargs):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, request=request)
+        return httpx.Response(200, json=body, headers={"ETag": '"v1"'}, request=request)
+
+    adapter = get_workshop_adapter(sample_workshop)
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        first = await request_workshop_timeslots(get_http_client(), adapter, TODAY, TODAY + timedelta(days=3))
+        second = await request_workshop_timeslots(get_http_client(), adapter, later - timedelta(days=2), later + timedelta(days=2))
+        second_again = await request_workshop_timeslots(get_http_client(), adapter, later - timedelta(days=2), later + timedelta(days=2))
+
+    assert [slot.id_slot for slot in first] == ["1"]
+    assert [slot.id_slot for slot in second] == [slot.id_slot for slot in second_again] == ["2"]
+    assert get_response_memo().stats()["not_modified"] == 1
+
+
+async def test_updating_a_workshop_forgets_its_responses(sample_workshop, db_session):
+    async def send(self, request, **kwargs):
+        return httpx.Response(200, json=SLOTS, request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        await request_slots(sample_workshop)
+
+    update_workshop(db_session, sample_workshop.id_workshop, {"name": "Renamed"})
+    assert get_response_memo().stats()["entries"] == 0
+
+
+class BrokenStream(httpx.AsyncByteStream):
+    """A response body whose connection breaks after the first slot"""
+
+    async def __aiter__(self):
+        yield f'[{{"id": 1, "time": "{TOMORROW}T10:00:00Z"}}, '.encode()
+        raise httpx.ReadError("Connection reset by peer")
+
+
+async def test_broken_responses_are_failures(async_db_session, sample_workshop):
+    """A body cut off mid-stream is not taken for a complete response with fewer slots"""
+    async def send(self, request, **kwargs):
+        return httpx.Response(200, stream=BrokenStream(), request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        result = await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+
+    assert result["workshops"][0]["status"] == "error"
+    assert result["workshops"][0]["error"] == "Connection reset by peer"
+    assert result["slots"] == []
+    assert get_slot_cache().stats()["days"] == 0
+    assert get_response_memo().stats()["entries"] == 0
+
+
+def test_response_memo_stats(client):
+    response = client.get("/api/admin/response-memo")
+    assert response.status_code == 200
+    assert response.json()["responses"] == 0
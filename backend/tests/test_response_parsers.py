@@ -0,0 +1,130 @@
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+from lxml import etree
+
+from app.models import Workshop, SAMPLE_WORKSHOP_DATA
+from app.services.response_parsers import (
+    JsonIdParser, XmlUuidParser, SlotParser, RESPONSE_PARSERS, register_response_parser, get_response_types,
+    parse_response_stream
+)
+from app.services.workshop_adapters import get_workshop_adapter
+
+
+TODAY = date.today()
+DATE_FROM = TODAY + timedelta(days=1)
+DATE_TO = TODAY + timedelta(days=3)
+
+
+def feed_in_chunks(parser, data: bytes, chunk_size):
+    for i in range(0, len(data), chunk_size):
+        parser.feed(data[i:i + chunk_size])
+    return parser.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1_000_000])
+def test_json_parser_filters_while_parsing(chunk_size):
+    items = [
+        {"id": 1, "time": f"{TODAY - timedelta(days=1)}T10:00:00Z", "available": True},
+        {"id": 2, "time": f"{DATE_FROM}T10:00:00Z", "available": True},
+        {"id": 3, "time": f"{DATE_FROM}T11:00:00Z", "available": False},
+        {"id": "ä4", "time": f"{DATE_TO}T23:30:00+00:00"},
+        {"id": 5, "time": f"{DATE_TO + timedelta(days=1)}T10:00:00Z", "available": True},
+    ]
+    data = json.dumps(items, ensure_ascii=False, indent=2).encode("utf-8")
+
+    timeslots = feed_in_chunks(JsonIdParser(1, DATE_FROM, DATE_TO), data, chunk_size)
+
+    assert [slot.id_slot for slot in timeslots] == ["2", "ä4"]
+    assert all(slot.id_workshop == 1 for slot in timeslots)
+
+
+def test_json_parser_empty_array():
+    assert feed_in_chunks(JsonIdParser(1, DATE_FROM, DATE_TO), b" [ ] ", 1) == []
+
+
+def test_json_parser_rejects_truncated_response():
+    parser = JsonIdParser(1, DATE_FROM, DATE_TO)
+    parser.feed(f'[{{"id": 1, "time": "{DATE_FROM}T10:00:00Z"}}, {{"id": 2'.encode())
+    with pytest.raises(ValueError):
+        parser.close()
+    assert [slot.id_slot for slot in parser.timeslots] == ["1"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 13, 1_000_000])
+def test_xml_parser_filters_while_parsing(chunk_size):
+    data = f"""<?xml version="1.0" encoding="UTF-8"?>
+<tireChangeTimesResponse>
+  <availableTime><uuid>a</uuid><time>{DATE_FROM}T10:00:00Z</time></availableTime>
+  <availableTime><uuid>b</uuid><time>{DATE_TO + timedelta(days=2)}T10:00:00Z</time></availableTime>
+  <availableTime><uuid>c</uuid></availableTime>
+  <availableTime><uuid>d</uuid><time>{DATE_TO}T10:00:00Z</time></availableTime>
+</tireChangeTimesResponse>""".encode("utf-8")
+
+    timeslots = feed_in_chunks(XmlUuidParser(2, DATE_FROM, DATE_TO), data, chunk_size)
+
+    assert [slot.id_slot for slot in timeslots] == ["a", "d"]
+
+
+async def test_malformed_stream_raises():
+
+    async def chunks():
+        yield f"<r><availableTime><uuid>a</uuid><time>{DATE_FROM}T10:00:00Z</time></availableTime>".encode()
+        yield b"<broken"
+
+    with pytest.raises(etree.XMLSyntaxError):
+        await parse_response_stream(chunks(), XmlUuidParser(1, DATE_FROM, DATE_TO))
+
+
+def test_malformed_elements_are_skipped():
+    items = [
+        {"id": 1, "time": f"{DATE_FROM}T10:00:00Z"},
+        {"id": 2},
+        {"id": 3, "time": "not a time"},
+        {"id": 4, "time": f"{DATE_FROM}T11:00:00Z"},
+    ]
+    parser = JsonIdParser(1, DATE_FROM, DATE_TO)
+    timeslots = feed_in_chunks(parser, json.dumps(items).encode("utf-8"), 5)
+
+    assert [slot.id_slot for slot in timeslots] == ["1", "4"]
+    assert parser.skipped == 2
+
+
+def test_slots_keep_the_workshop_time_zone():
+    """Slots are filtered and grouped by their date in the workshop's time zone, and serialized with its offset"""
+    items = [
+        {"id": 1, "time": f"{DATE_FROM}T00:30:00+02:00"},  # Previous day in UTC
+        {"id": 2, "time": f"{DATE_TO}T23:30:00-05:00"},  # Next day in UTC
+    ]
+    timeslots = feed_in_chunks(JsonIdParser(1, DATE_FROM, DATE_TO), json.dumps(items).encode("utf-8"), 1_000)
+
+    assert [slot.day for slot in timeslots] == [DATE_FROM, DATE_TO]
+    assert timeslots[0].to_dict() == {
+        "id_workshop": 1,
+        "id_slot": "1",
+        "slot_datetime": datetime.fromisoformat(f"{DATE_FROM}T00:30:00+02:00"),
+    }
+    assert timeslots[1].slot_datetime.isoformat() == f"{DATE_TO}T23:30:00-05:00"
+
+
+def test_custom_response_type_can_be_registered(client):
+    @register_response_parser("CSV_test")
+    class CsvParser(SlotParser):
+        def feed(self, chunk: bytes):
+            for line in chunk.decode().splitlines():
+                id_slot, time_string = line.split(";")
+                self.add_slot(id_slot, time_string)
+
+    try:
+        assert "CSV_test" in get_response_types()
+
+        workshop = Workshop(id_workshop=1, **SAMPLE_WORKSHOP_DATA | {"response_type": "CSV_test"})
+        parser = get_workshop_adapter(workshop).create_parser(DATE_FROM, DATE_FROM)
+        parser.feed(f"1;{DATE_FROM}T10:00:00Z\n2;{DATE_FROM}T11:00:00Z".encode())
+        assert [slot.id_slot for slot in parser.close()] == ["1", "2"]
+
+        response = client.get("/api/workshops/filters")
+        assert "CSV_test" in response.json()["response_types"]
+    finally:
+        del RESPONSE_PARSERS["CSV_test"]
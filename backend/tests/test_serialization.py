@@ -0,0 +1,93 @@
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.compression import accepted_encodings
+from app.models import Workshop, SAMPLE_WORKSHOP_DATA
+
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+SEARCH_PARAMS = {"date_from": TODAY.isoformat(), "date_to": (TODAY + timedelta(days=7)).isoformat()}
+
+
+@pytest.fixture
+def many_slots():
+    slot_time = datetime.combine(TOMORROW, datetime.min.time(), tzinfo=timezone.utc)
+    return [
+        {"id": f"slot-{i}", "time": (slot_time + timedelta(minutes=i)).isoformat().replace("+00:00", "Z")}
+        for i in range(200)
+    ]
+
+
+def test_compact_format_groups_slots_by_workshop(client, sample_workshop, many_slots):
+    async def send(self, request, **kwargs):
+        return httpx.Response(200, json=many_slots, request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        response = client.get("/api/booking/available-times", params=SEARCH_PARAMS | {"format": "compact"})
+
+    assert response.status_code == 200
+    [workshop] = response.json()["workshops"]
+    assert workshop["name"] == "Sample Workshop"
+    assert workshop["city"] == "Sample City"
+    assert workshop["status"] == "ok"
+    assert len(workshop["slots"]) == 200
+
+    first_time = datetime.combine(TOMORROW, datetime.min.time(), tzinfo=timezone.utc).timestamp()
+    assert workshop["slots"][0] == ["slot-0", int(first_time)]
+    assert workshop["slots"][1] == ["slot-1", int(first_time) + 60]
+
+
+def test_list_format_is_unchanged(client, sample_workshop):
+    async def send(self, request, **kwargs):
+        return httpx.Response(200, json=[{"id": 1, "time": f"{TOMORROW}T10:00:00+02:00"}], request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        response = client.get("/api/booking/available-times", params=SEARCH_PARAMS)
+
+    assert response.json() == [
+        {"id_workshop": sample_workshop.id_workshop, "id_slot": "1", "slot_datetime": f"{TOMORROW}T10:00:00+02:00"}
+    ]
+
+
+@pytest.mark.parametrize("accept_encoding, content_encoding", [
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("identity", None),
+])
+def test_large_responses_are_compressed(client, sample_workshop, many_slots, accept_encoding, content_encoding):
+    async def send(self, request, **kwargs):
+        return httpx.Response(200, json=many_slots, request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        response = client.get(
+            "/api/booking/available-times", params=SEARCH_PARAMS, headers={"Accept-Encoding": accept_encoding}
+        )
+
+    assert response.headers.get("Content-Encoding") == content_encoding
+    assert len(response.json()) == 200
+
+
+def test_small_responses_are_not_compressed(client):
+    response = client.get("/api/workshops/", headers={"Accept-Encoding": "gzip, br"})
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+
+
+def test_list_workshops_serializes_api_fields(client, db_session):
+    db_session.add(Workshop(**SAMPLE_WORKSHOP_DATA | {"timeout_in_seconds": 2.5}))
+    db_session.commit()
+
+    [workshop] = client.get("/api/workshops/").json()
+    assert workshop["name"] == "Sample Workshop"
+    assert workshop["timeout_in_seconds"] == 2.5
+    assert workshop["is_active"] is True
+    assert "name_normalized" not in workshop and "city_normalized" not in workshop
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip;q=0.5, br;q=0, deflate;q=0.000, identity") == {"gzip", "identity"}
@@ -0,0 +1,83 @@
+import asyncio
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.services.booking_services import fetch_available_timeslots
+from app.services.single_flight import SingleFlight, get_upstream_flights
+
+
+async def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    executions = 0
+
+    async def work(value):
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.05)
+        return value * 2
+
+    results = await asyncio.gather(*(flights.run("key", work, 21) for _ in range(5)))
+
+    assert results == [42] * 5
+    assert executions == 1
+    assert flights.stats() == {"calls": 5, "executions": 1, "saved_calls": 4, "in_flight": 0}
+
+
+async def test_errors_are_shared_and_not_remembered():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(flights.run("key", fail), flights.run("key", fail), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+
+    with pytest.raises(ValueError):
+        await flights.run("key", fail)
+    assert flights.executions == 2
+
+
+async def test_cancelled_caller_does_not_cancel_others():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(flights.run("key", work))
+    second = asyncio.ensure_future(flights.run("key", work))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+
+
+async def test_concurrent_searches_share_upstream_request(async_session_factory, sample_workshop):
+    today = date.today()
+    requests_made = 0
+
+    async def slow_get(self, request, **kwargs):
+        url = str(request.url)
+        nonlocal requests_made
+        requests_made += 1
+        await asyncio.sleep(0.05)
+        return httpx.Response(
+            status_code=200,
+            json=[{"id": "1", "time": f"{today + timedelta(days=1)}T10:00:00Z"}],
+            request=httpx.Request("GET", url)
+        )
+
+    async def search():
+        async with async_session_factory() as db:
+            return await fetch_available_timeslots(db, today, today + timedelta(days=7))
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=slow_get):
+        results = await asyncio.gather(*(search() for _ in range(10)))
+
+    assert requests_made == 1
+    assert all(len(result) == 1 for result in results)
+    assert get_upstream_flights().stats()["saved_calls"] == 9
@@ -0,0 +1,100 @@
+import datetime
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+
+from app.models import Slot
+from app.services.booking_services import fetch_available_timeslots
+from app.services.slot_cache import SlotCache, get_slot_cache
+
+
+def make_slot(day, id_slot="1", id_workshop=1):
+    return Slot.from_datetime(
+        id_workshop,
+        id_slot,
+        datetime.datetime.combine(day, datetime.time(10), tzinfo=datetime.timezone.utc)
+    )
+
+
+def test_store_range_caches_empty_days():
+    cache = SlotCache(ttl_in_seconds=60, max_slots=100)
+    today = date.today()
+    cache.store_range(1, today, today + timedelta(days=2), [make_slot(today)])
+
+    cached_days, missing_days = cache.get_range(1, today, today + timedelta(days=3))
+    assert missing_days == [today + timedelta(days=3)]
+    assert len(cached_days[today]) == 1
+    assert cached_days[today + timedelta(days=1)] == []
+
+
+def test_expired_days_are_missing():
+    cache = SlotCache(ttl_in_seconds=-1, max_slots=100)
+    cache.put_day(1, date.today(), [])
+    assert cache.get_day(1, date.today()) is None
+    # Expired days stay readable as stale data until evicted
+    assert cache.get_day(1, date.today(), max_age=float("inf")) == []
+
+
+def test_lru_eviction_bounds_size():
+    cache = SlotCache(ttl_in_seconds=60, max_slots=5)
+    today = date.today()
+    cache.put_day(1, today, [make_slot(today, "a"), make_slot(today, "b")])
+    cache.put_day(2, today, [make_slot(today, "c", 2)])
+    cache.get_day(1, today)
+    cache.put_day(3, today, [make_slot(today, "d", 3)])
+
+    assert cache.get_day(2, today) is None
+    assert cache.get_day(1, today) is not None
+    assert cache.stats()["size"] <= 5
+
+
+def test_discard_slot():
+    cache = SlotCache(ttl_in_seconds=60, max_slots=100)
+    today = date.today()
+    cache.put_day(1, today, [make_slot(today, "a"), make_slot(today, "b")])
+    cache.discard_slot(1, "a")
+    assert [slot.id_slot for slot in cache.get_day(1, today)] == ["b"]
+
+
+async def test_search_fetches_only_missing_days(db_session, async_db_session, sample_workshop):
+    """A second search should be assembled from cached days and only request the uncached ones"""
+    today = date.today()
+    requested_urls = []
+
+    async def fake_get(self, request, **kwargs):
+        url = str(request.url)
+        requested_urls.append(url)
+        return httpx.Response(
+            status_code=200,
+            json=[{"id": str(i), "time": f"{today + timedelta(days=i)}T23:00:00Z"} for i in range(20)],
+            request=httpx.Request("GET", url)
+        )
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=fake_get):
+        first = await fetch_available_timeslots(async_db_session, today + timedelta(days=1), today + timedelta(days=7))
+        # Neighbouring days were filled by the widened request
+        second = await fetch_available_timeslots(async_db_session, today, today + timedelta(days=8))
+        assert len(requested_urls) == 1
+
+        third = await fetch_available_timeslots(async_db_session, today + timedelta(days=2), today + timedelta(days=10))
+        assert len(requested_urls) == 2
+
+    assert [slot["id_slot"] for slot in first] == [str(i) for i in range(1, 8)]
+    assert [slot["id_slot"] for slot in second] == [str(i) for i in range(0, 9)]
+    assert [slot["id_slot"] for slot in third] == [str(i) for i in range(2, 11)]
+    assert f"/{today + timedelta(days=7)}/{today + timedelta(days=12)}" in requested_urls[1]
+    assert get_slot_cache().hits > 0
+
+
+async def test_failed_fetch_is_not_cached(db_session, async_db_session, sample_workshop):
+    today = date.today()
+
+    async def failing_get(self, request, **kwargs):
+        url = str(request.url)
+        raise httpx.ConnectError("down")
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=failing_get):
+        assert await fetch_available_timeslots(async_db_session, today, today + timedelta(days=7)) == []
+
+    assert len(get_slot_cache()) == 0
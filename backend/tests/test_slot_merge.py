@@ -0,0 +1,92 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.models import Slot, Workshop, SAMPLE_WORKSHOP_DATA
+from app.services.slot_merge import merge_sorted_slots, encode_cursor, decode_cursor, slot_sort_key
+
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+
+
+def slots(id_workshop, *timestamps):
+    return [Slot(id_workshop, f"{id_workshop}-{timestamp}", timestamp) for timestamp in timestamps]
+
+
+def ids(merged):
+    return [slot.id_slot for slot in merged]
+
+
+def test_merge_orders_slots_across_workshops():
+    merged, next_key = merge_sorted_slots([slots(1, 30, 10, 20), slots(2, 15, 10), []])
+
+    assert ids(merged) == ["1-10", "2-10", "2-15", "1-20", "1-30"]
+    assert next_key is None
+
+
+def test_merge_stops_at_the_limit_and_continues_after_the_key():
+    lists = [slots(1, 10, 20, 30), slots(2, 15, 25)]
+
+    first_page, next_key = merge_sorted_slots(lists, limit=2)
+    assert ids(first_page) == ["1-10", "2-15"]
+    assert next_key == slot_sort_key(first_page[-1])
+
+    second_page, next_key = merge_sorted_slots(lists, limit=2, after=next_key)
+    assert ids(second_page) == ["1-20", "2-25"]
+
+    last_page, next_key = merge_sorted_slots(lists, limit=2, after=next_key)
+    assert ids(last_page) == ["1-30"]
+    assert next_key is None
+
+
+def test_cursor_round_trip():
+    key = (1_700_000_000.5, 3, "ä-slot")
+    assert decode_cursor(encode_cursor(key)) == key
+    assert encode_cursor(None) is None
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", encode_cursor((1, "2", "3")), encode_cursor((1, 2))])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_available_times_pages_with_limit_and_cursor(client, db_session):
+    for name in ["A", "B"]:
+        db_session.add(Workshop(**SAMPLE_WORKSHOP_DATA | {
+            "name": name,
+            "url_available_times": f"http://{name.lower()}/{{date_from}}/{{date_to}}",
+        }))
+    db_session.commit()
+
+    async def send(self, request, **kwargs):
+        host = request.url.host
+        hours = [10, 12, 14] if host == "a" else [11, 13]
+        items = [{"id": f"{host}{hour}", "time": f"{TOMORROW}T{hour}:00:00Z"} for hour in reversed(hours)]
+        return httpx.Response(200, json=items, request=request)
+
+    params = {"date_from": TODAY.isoformat(), "date_to": (TODAY + timedelta(days=7)).isoformat(), "limit": 2}
+    pages = []
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        cursor = None
+        while True:
+            response = client.get("/api/booking/available-times", params=params | ({"cursor": cursor} if cursor else {}))
+            assert response.status_code == 200
+            pages.append([slot["id_slot"] for slot in response.json()["slots"]])
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+
+        compact = client.get("/api/booking/available-times", params=params | {"format": "compact"}).json()
+
+    assert pages == [["a10", "b11"], ["a12", "b13"], ["a14"]]
+    assert [[slot[0] for slot in workshop["slots"]] for workshop in compact["workshops"]] == [["a10"], ["b11"]]
+    assert compact["next_cursor"] is not None
+
+
+def test_available_times_rejects_invalid_cursor(client):
+    params = {"date_from": TODAY.isoformat(), "date_to": TODAY.isoformat(), "cursor": "nope"}
+    assert client.get("/api/booking/available-times", params=params).status_code == 400
@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app.config as app_config
+from app.models import Workshop, SAMPLE_WORKSHOP_DATA
+from app.services.booking_services import search_available_timeslots
+from app.services.slot_refresher import SlotRefresher
+from app.services.slot_store import load_stored_slots
+from app.services.workshop_services import update_workshop
+
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+
+
+@pytest.fixture
+def refresher(async_session_factory):
+    return SlotRefresher(async_session_factory, horizon_in_days=14, min_interval=10, max_interval=100, tick=1, lease_duration=60)
+
+
+@pytest.fixture
+def refresher_enabled(monkeypatch):
+    monkeypatch.setattr(app_config, "SLOT_REFRESHER_ENABLED", True)
+
+
+def make_send(slots, requests):
+    async def send(self, request, **kwargs):
+        requests.append(str(request.url))
+        return httpx.Response(200, json=slots, request=request)
+    return send
+
+
+async def test_search_is_served_from_the_slot_store(refresher, refresher_enabled, sample_workshop, async_db_session):
+    requests = []
+    slots = [{"id": 1, "time": f"{TOMORROW}T10:00:00Z"}, {"id": 2, "time": f"{TOMORROW}T11:00:00Z"}]
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=make_send(slots, requests)):
+        assert await refresher.refresh_due() == 1
+        assert await refresher.refresh_due() == 0  # Not due again yet
+        assert len(requests) == 1
+
+        results = await search_available_timeslots(async_db_session, TODAY, TODAY + timedelta(days=7))
+
+    assert len(requests) == 1
+    assert [slot["id_slot"] for slot in results["slots"]] == ["1", "2"]
+    assert results["slots"][0]["slot_datetime"].tzinfo is not None
+    assert results["workshops"][0]["status"] == "stored"
+
+
+async def test_dates_beyond_the_horizon_are_requested_live(refresher, refresher_enabled, sample_workshop, async_db_session, monkeypatch):
+    monkeypatch.setattr(app_config, "FETCH_CHUNK_SIZE_IN_DAYS", 14)
+    requests = []
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=make_send([], requests)):
+        await refresher.refresh_due()
+        results = await search_available_timeslots(async_db_session, TODAY, TODAY + timedelta(days=30))
+
+    # One refresh, then the live search of the widened 33 days in chunks of 14 days
+    assert len(requests) == 1 + 3
+    assert results["workshops"][0]["status"] == "ok"
+
+
+async def test_polling_interval_adapts_to_changes(refresher, sample_workshop):
+    requests = []
+    slots = [{"id": 1, "time": f"{TOMORROW}T10:00:00Z"}]
+    schedule = refresher.schedule(sample_workshop.id_workshop)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=make_send(slots, requests)):
+        await refresher.refresh_due()
+        assert schedule.interval == 10  # First refresh is a change, the interval stays at the minimum
+
+        for _ in range(3):
+            schedule.next_due = 0
+            await refresher.refresh_due()
+        assert schedule.interval == pytest.approx(10 * 1.5 ** 3)
+
+        slots.append({"id": 2, "time": f"{TOMORROW}T11:00:00Z"})
+        schedule.next_due = 0
+        await refresher.refresh_due()
+
+    assert schedule.interval == pytest.approx(10 * 1.5 ** 3 / 2)
+    assert schedule.refreshes == 5
+    assert schedule.changes == 2
+
+
+async def test_failed_refresh_keeps_stored_slots(refresher, sample_workshop, async_db_session):
+    slots = [{"id": 1, "time": f"{TOMORROW}T10:00:00Z"}]
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=make_send(slots, [])):
+        await refresher.refresh_due()
+
+    async def fail(self, request, **kwargs):
+        return httpx.Response(500, request=request)
+
+    schedule = refresher.schedule(sample_workshop.id_workshop)
+    schedule.next_due = 0
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=fail):
+        await refresher.refresh_due()
+
+    assert schedule.failures == 1
+    stored = await async_db_session.run_sync(load_stored_slots, [sample_workshop.id_workshop], TODAY, TOMORROW, 60)
+    assert [slot.id_slot for slot in stored[sample_workshop.id_workshop]] == ["1"]
+
+
+async def test_updating_a_workshop_clears_its_stored_slots(refresher, sample_workshop, db_session, async_db_session):
+    slots = [{"id": 1, "time": f"{TOMORROW}T10:00:00Z"}]
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=make_send(slots, [])):
+        await refresher.refresh_due()
+
+    update_workshop(db_session, sample_workshop.id_workshop, {"url_available_times": "http://other/{date_from}/{date_to}"})
+
+    stored = await async_db_session.run_sync(load_stored_slots, [sample_workshop.id_workshop], TODAY, TOMORROW, 60)
+    assert stored == {}
+
+
+def test_lifespan_starts_the_refresher(app_with_db, db_session, async_session_factory, monkeypatch):
+    monkeypatch.setattr(app_config, "SLOT_REFRESHER_ENABLED", True)
+    monkeypatch.setattr("app.services.slot_refresher.AsyncSessionLocal", async_session_factory)
+    db_session.add(Workshop(**SAMPLE_WORKSHOP_DATA))
+    db_session.commit()
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=make_send([], [])):
+        with TestClient(app_with_db) as client:
+            response = client.get("/api/admin/slot-refresher")
+
+    assert response.status_code == 200
+    assert response.json()["enabled"] is True
+    assert response.json()["running"] is True
@@ -0,0 +1,166 @@
+import asyncio
+from datetime import date, timedelta
+from unittest.mock import patch, AsyncMock
+
+import httpx
+import orjson
+import pytest
+
+from app.routes.booking_routes import subscribe_timeslots
+from app.services.booking_services import book_timeslot
+from app.services.slot_cache import get_slot_cache
+from app.services.slot_events import get_slot_events
+from app.services.slot_subscriptions import SubscriptionFilters, get_slot_subscriptions
+
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+FILTERS = SubscriptionFilters.normalized(TODAY, TOMORROW)
+
+
+@pytest.fixture
+def upstream():
+    """Slots answered by the mocked workshop API; set to None to make it fail"""
+    state = {"slots": ["a", "b"], "requests": 0}
+
+    async def send(self, request, **kwargs):
+        state["requests"] += 1
+        if state["slots"] is None:
+            return httpx.Response(500, request=request)
+        return httpx.Response(
+            200,
+            json=[{"id": id_slot, "time": f"{TOMORROW}T1{i}:00:00Z"} for i, id_slot in enumerate(state["slots"])],
+            request=request
+        )
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        yield state
+
+
+@pytest.fixture
+def subscriptions(async_session_factory, monkeypatch):
+    monkeypatch.setattr("app.services.slot_subscriptions.AsyncSessionLocal", async_session_factory)
+    return get_slot_subscriptions()
+
+
+async def next_event(queue):
+    return await asyncio.wait_for(queue.get(), 5)
+
+
+def test_equal_filters_are_normalized():
+    assert SubscriptionFilters.normalized(TODAY, TOMORROW, "Truck,car", "Tallinn") == \
+        SubscriptionFilters.normalized(TODAY, TOMORROW, "car,truck", "TALLINN")
+
+
+async def test_subscribers_with_equal_filters_share_one_computation(sample_workshop, upstream, subscriptions):
+    group, first = subscriptions.subscribe(FILTERS)
+    event, data = await next_event(first)
+    assert event == "snapshot"
+    assert [slot["id_slot"] for slot in data["slots"]] == ["a", "b"]
+
+    same_group, second = subscriptions.subscribe(SubscriptionFilters.normalized(TODAY, TOMORROW))
+    assert same_group is group
+    assert (await next_event(second))[0] == "snapshot"
+    assert subscriptions.stats()["groups"] == 1
+    assert group.computations == 1
+    assert upstream["requests"] == 1
+
+    subscriptions.unsubscribe(group, first)
+    subscriptions.unsubscribe(group, second)
+    assert subscriptions.stats()["groups"] == 0
+
+
+async def test_only_changes_are_published(sample_workshop, upstream, subscriptions):
+    group, queue = subscriptions.subscribe(FILTERS)
+    await next_event(queue)
+
+    upstream["slots"] = ["b", "c"]
+    get_slot_cache().invalidate_workshop(sample_workshop.id_workshop)
+    await group.recompute()
+
+    event, data = await next_event(queue)
+    assert event == "delta"
+    assert [slot["id_slot"] for slot in data["added"]] == ["c"]
+    assert data["removed"] == [{"id_workshop": sample_workshop.id_workshop, "id_slot": "a"}]
+
+    # Unchanged slots publish nothing
+    await group.recompute()
+    assert queue.empty()
+    subscriptions.unsubscribe(group, queue)
+
+
+async def test_failing_workshop_keeps_its_slots(sample_workshop, upstream, subscriptions):
+    group, queue = subscriptions.subscribe(FILTERS)
+    await next_event(queue)
+
+    upstream["slots"] = None
+    get_slot_cache().invalidate_workshop(sample_workshop.id_workshop)
+    await group.recompute()
+
+    assert queue.empty()
+    assert len(group.slots) == 2
+    subscriptions.unsubscribe(group, queue)
+
+
+async def test_booking_is_published_right_away(sample_workshop, upstream, subscriptions):
+    group, queue = subscriptions.subscribe(FILTERS)
+    await next_event(queue)
+
+    get_slot_events().slot_booked(sample_workshop.id_workshop, "a")
+
+    event, data = await next_event(queue)
+    assert event == "delta"
+    assert data == {"added": [], "removed": [{"id_workshop": sample_workshop.id_workshop, "id_slot": "a"}]}
+    subscriptions.unsubscribe(group, queue)
+
+
+async def test_slow_subscriber_gets_a_new_snapshot(sample_workshop, upstream, subscriptions, monkeypatch):
+    monkeypatch.setattr(subscriptions, "queue_size", 1)
+    group, queue = subscriptions.subscribe(FILTERS)
+    await asyncio.sleep(0.1)  # The snapshot fills the queue
+
+    get_slot_events().slot_booked(sample_workshop.id_workshop, "a")
+
+    event, data = await next_event(queue)
+    assert event == "snapshot"
+    assert [slot["id_slot"] for slot in data["slots"]] == ["b"]
+    subscriptions.unsubscribe(group, queue)
+
+
+async def test_subscribe_streams_server_sent_events(sample_workshop, upstream, subscriptions, async_db_session):
+    response = await subscribe_timeslots(TODAY, TOMORROW, None, None, None)
+    assert response.media_type == "text/event-stream"
+    events = response.body_iterator
+
+    event, data = (await anext(events)).split(b"\n")[:2]
+    assert event == b"event: snapshot"
+    assert [slot["id_slot"] for slot in orjson.loads(data.removeprefix(b"data: "))["slots"]] == ["a", "b"]
+    assert subscriptions.stats()["subscribers"] == 1
+
+    with patch("app.services.booking_services.httpx.AsyncClient.request",
+               new_callable=AsyncMock, return_value=httpx.Response(200, json={"status": "success"})):
+        await book_timeslot(async_db_session, "a", sample_workshop.id_workshop, "+1234567890")
+
+    assert await anext(events) == (
+        b"event: delta\ndata: "
+        + orjson.dumps({"added": [], "removed": [{"id_workshop": sample_workshop.id_workshop, "id_slot": "a"}]})
+        + b"\n\n"
+    )
+
+    # A disconnected client is unsubscribed
+    await events.aclose()
+    assert subscriptions.stats()["subscribers"] == 0
+
+
+async def test_subscribe_waits_for_the_body_to_be_iterated(sample_workshop, upstream, subscriptions):
+    response = await subscribe_timeslots(TODAY, TOMORROW, None, None, None)
+    assert subscriptions.stats()["groups"] == 0
+
+    # A client that disconnects before the body starts never subscribes
+    await response.body_iterator.aclose()
+    assert subscriptions.stats() == {"groups": 0, "subscribers": 0, "filters": []}
+
+
+def test_subscribe_rejects_reversed_dates(client):
+    params = {"date_from": TOMORROW.isoformat(), "date_to": TODAY.isoformat()}
+    assert client.get("/api/booking/available-times/subscribe", params=params).status_code == 400
@@ -0,0 +1,112 @@
+import datetime
+from datetime import date, timedelta
+from unittest.mock import patch, AsyncMock
+
+import httpx
+import pytest
+
+from app.models import Slot
+from app.services.slot_cache import get_slot_cache
+from app.services.slot_versions import WorkshopVersions
+
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+PARAMS = {"date_from": TODAY.isoformat(), "date_to": TOMORROW.isoformat()}
+
+
+def make_slot(id_slot, hour=10):
+    return Slot.from_datetime(1, id_slot, datetime.datetime.combine(TOMORROW, datetime.time(hour), datetime.timezone.utc))
+
+
+@pytest.fixture
+def upstream():
+    state = {"slots": ["a", "b"]}
+
+    async def send(self, request, **kwargs):
+        return httpx.Response(
+            200,
+            json=[{"id": id_slot, "time": f"{TOMORROW}T1{i}:00:00Z"} for i, id_slot in enumerate(state["slots"])],
+            request=request
+        )
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        yield state
+
+
+def test_changes_since_a_version():
+    versions = WorkshopVersions(history_size=100)
+    assert versions.record(TODAY, TOMORROW, [make_slot("a"), make_slot("b")])
+    assert not versions.record(TODAY, TOMORROW, [make_slot("a"), make_slot("b")])
+    assert versions.version == 1
+
+    versions.record(TODAY, TOMORROW, [make_slot("b", hour=11), make_slot("c")])
+    added, removed = versions.changes_since(1, TODAY, TOMORROW)
+    assert sorted(ts.id_slot for ts in added) == ["b", "c"]
+    assert [ts.id_slot for ts in removed] == ["a"]
+    assert versions.changes_since(2, TODAY, TOMORROW) == ([], [])
+    # Changes outside the requested dates are left out
+    assert versions.changes_since(1, TODAY, TODAY) == ([], [])
+
+
+def test_record_only_removes_slots_within_its_dates():
+    versions = WorkshopVersions(history_size=100)
+    versions.record(TODAY, TOMORROW, [make_slot("a")])
+    assert not versions.record(TODAY, TODAY, [])
+    assert set(versions.slots) == {"a"}
+
+
+def test_versions_beyond_the_history_are_unknown():
+    versions = WorkshopVersions(history_size=2)
+    for id_slot in "abc":
+        versions.record(TODAY, TOMORROW, [make_slot(id_slot)])
+    assert versions.changes_since(1, TODAY, TOMORROW) is None
+    assert versions.changes_since(versions.version, TODAY, TOMORROW) == ([], [])
+    assert versions.changes_since(versions.version + 1, TODAY, TOMORROW) is None
+
+
+def test_since_token_returns_only_changes(client, sample_workshop, upstream):
+    first = client.get("/api/booking/available-times", params=PARAMS | {"since": ""}).json()
+    assert [slot["id_slot"] for slot in first["added"]] == ["a", "b"]
+    assert first["removed"] == []
+    assert first["reset_workshops"] == [sample_workshop.id_workshop]
+
+    unchanged = client.get("/api/booking/available-times", params=PARAMS | {"since": first["token"]}).json()
+    assert (unchanged["added"], unchanged["removed"], unchanged["reset_workshops"]) == ([], [], [])
+
+    upstream["slots"] = ["b", "c"]
+    get_slot_cache().invalidate_workshop(sample_workshop.id_workshop)
+    changed = client.get("/api/booking/available-times", params=PARAMS | {"since": unchanged["token"]}).json()
+    # "b" moved to another hour, "c" is new
+    assert [slot["id_slot"] for slot in changed["added"]] == ["b", "c"]
+    assert changed["removed"] == [{"id_workshop": sample_workshop.id_workshop, "id_slot": "a"}]
+    assert changed["reset_workshops"] == []
+
+
+def test_booking_is_a_change(client, sample_workshop, upstream):
+    first = client.get("/api/booking/available-times", params=PARAMS | {"since": ""}).json()
+
+    with patch("app.services.booking_services.httpx.AsyncClient.request",
+               new_callable=AsyncMock, return_value=httpx.Response(200, json={"status": "success"})):
+        client.post(
+            "/api/booking/reserve/a",
+            params={"id_workshop": sample_workshop.id_workshop, "customer_phone": "+1234567890"}
+        )
+
+    changes = client.get("/api/booking/available-times", params=PARAMS | {"since": first["token"]}).json()
+    assert changes["added"] == []
+    assert changes["removed"] == [{"id_workshop": sample_workshop.id_workshop, "id_slot": "a"}]
+
+
+def test_token_for_other_dates_gets_a_full_response(client, sample_workshop, upstream):
+    first = client.get("/api/booking/available-times", params=PARAMS | {"since": ""}).json()
+    params = {"date_from": TODAY.isoformat(), "date_to": (TODAY + timedelta(days=2)).isoformat(), "since": first["token"]}
+
+    other_dates = client.get("/api/booking/available-times", params=params).json()
+    assert other_dates["reset_workshops"] == [sample_workshop.id_workshop]
+    assert [slot["id_slot"] for slot in other_dates["added"]] == ["a", "b"]
+
+
+def test_invalid_since_token(client, sample_workshop):
+    response = client.get("/api/booking/available-times", params=PARAMS | {"since": "not-a-token"})
+    assert response.status_code == 400
@@ -0,0 +1,171 @@
+import time
+import asyncio
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+
+import app.config as app_config
+from app.services.booking_services import search_available_timeslots
+from app.services.failure_cache import FailureCache
+from app.services.single_flight import get_upstream_flights
+from app.services.slot_cache import get_slot_cache
+
+
+TODAY = date.today()
+TOMORROW = TODAY + timedelta(days=1)
+
+
+def slot_response(request, id_slot):
+    return httpx.Response(200, json=[{"id": id_slot, "time": f"{TOMORROW}T10:00:00Z"}], request=request)
+
+
+async def wait_for_revalidation():
+    while get_upstream_flights().stats()["in_flight"]:
+        await asyncio.sleep(0.01)
+
+
+async def test_stale_slots_are_served_and_refreshed_in_background(db_session, async_db_session, sample_workshop, monkeypatch):
+    """Expired days within the staleness limit are answered at once and revalidated without blocking the search"""
+    monkeypatch.setattr(app_config, "SLOT_CACHE_MAX_STALE_IN_SECONDS", 300)
+    responses = iter(["old", "new"])
+
+    async def send(self, request, **kwargs):
+        await asyncio.sleep(0.05)
+        return slot_response(request, next(responses))
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        monkeypatch.setattr(get_slot_cache(), "ttl_in_seconds", 0.05)
+        await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+        await asyncio.sleep(0.1)
+
+        stale = await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+        assert stale["workshops"][0]["status"] == "stale"
+        assert stale["workshops"][0]["age_in_seconds"] is not None
+        assert [slot["id_slot"] for slot in stale["slots"]] == ["old"]
+
+        await wait_for_revalidation()
+        monkeypatch.setattr(get_slot_cache(), "ttl_in_seconds", 60)
+        fresh = await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+
+    assert fresh["workshops"][0]["status"] == "cached"
+    assert fresh["workshops"][0]["age_in_seconds"] is None
+    assert [slot["id_slot"] for slot in fresh["slots"]] == ["new"]
+    assert get_slot_cache().stats()["stale_hits"] >= 1
+
+
+async def test_stale_slots_are_opt_in(db_session, async_db_session, sample_workshop, monkeypatch):
+    """By default expired days are fetched again, since a plain slot list cannot mark them as stale"""
+    responses = iter(["old", "new"])
+
+    async def send(self, request, **kwargs):
+        return slot_response(request, next(responses))
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        monkeypatch.setattr(get_slot_cache(), "ttl_in_seconds", 0.05)
+        await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+        await asyncio.sleep(0.1)
+        result = await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+
+    assert result["workshops"][0]["status"] == "ok"
+    assert [slot["id_slot"] for slot in result["slots"]] == ["new"]
+
+
+async def test_workshop_can_disable_stale_slots(db_session, async_db_session, sample_workshop, monkeypatch):
+    monkeypatch.setattr(app_config, "SLOT_CACHE_MAX_STALE_IN_SECONDS", 300)
+    sample_workshop.max_stale_in_seconds = 0
+    db_session.commit()
+    responses = iter(["old", "new"])
+
+    async def send(self, request, **kwargs):
+        return slot_response(request, next(responses))
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+        monkeypatch.setattr(get_slot_cache(), "ttl_in_seconds", 0)
+        result = await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+
+    assert result["workshops"][0]["status"] == "ok"
+    assert [slot["id_slot"] for slot in result["slots"]] == ["new"]
+
+
+async def test_failures_are_negatively_cached(db_session, async_db_session, sample_workshop):
+    """A workshop that just failed is reported as failed again without another upstream request"""
+    requests = []
+
+    async def send(self, request, **kwargs):
+        requests.append(request)
+        return httpx.Response(500, request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        first = await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+        request_count = len(requests)
+        second = await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+
+    assert first["workshops"][0]["status"] == "error"
+    assert second["workshops"][0]["status"] == "error"
+    assert second["workshops"][0]["error"] == first["workshops"][0]["error"]
+    assert len(requests) == request_count
+
+
+async def test_failures_are_cached_per_window(db_session, async_db_session, sample_workshop):
+    """A failed window of days does not stop searches for other dates of the same workshop"""
+    later = TODAY + timedelta(days=10)
+    requests = []
+
+    async def send(self, request, **kwargs):
+        requests.append(request)
+        if str(later - timedelta(days=2)) in str(request.url):
+            return httpx.Response(200, json=[{"id": "later", "time": f"{later}T10:00:00Z"}], request=request)
+        return httpx.Response(500, request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        failed = await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+        other_dates = await search_available_timeslots(async_db_session, later, later)
+        failed_again = await search_available_timeslots(async_db_session, TODAY, TOMORROW)
+
+    assert failed["workshops"][0]["status"] == "error"
+    assert other_dates["workshops"][0]["status"] == "ok"
+    assert [slot["id_slot"] for slot in other_dates["slots"]] == ["later"]
+    assert failed_again["workshops"][0]["status"] == "error"
+    assert len(requests) == 2
+
+
+def test_failure_cache_expires():
+    window = (1, TODAY, TOMORROW)
+    cache = FailureCache(ttl_in_seconds=-1)
+    cache.remember(window, "error", "HTTP 500")
+    assert cache.get(window) is None
+
+    cache = FailureCache(ttl_in_seconds=60)
+    cache.remember(window, "timeout", "Timed out")
+    assert cache.get(window).status == "timeout"
+    assert cache.get((1, TOMORROW, TOMORROW)) is None
+    cache.forget(window)
+    assert cache.get(window) is None
+
+
+def test_expired_failures_are_purged(monkeypatch):
+    cache = FailureCache(ttl_in_seconds=60)
+    for days in range(5):
+        cache.remember((1, TODAY, TODAY + timedelta(days=days)), "error", "HTTP 500")
+
+    monkeypatch.setattr(cache, "ttl_in_seconds", 0.0001)
+    time.sleep(0.001)
+    cache.remember((1, TODAY, TOMORROW), "error", "HTTP 500")
+    assert len(cache._failures) == 1  # pylint: disable=protected-access
+
+
+def test_negative_cache_stats(client, sample_workshop):
+    async def send(self, request, **kwargs):
+        return httpx.Response(500, request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        client.get("/api/booking/available-times", params={"date_from": TODAY.isoformat(), "date_to": TOMORROW.isoformat()})
+
+    stats = client.get("/api/admin/negative-cache").json()
+    assert stats["ttl_in_seconds"] > 0
+    [failure] = stats["failures"]
+    assert failure["id_workshop"] == sample_workshop.id_workshop
+    assert failure["date_from"] == (TODAY - timedelta(days=1)).isoformat()
+    assert failure["status"] == "error"
@@ -1,6 +1,13 @@
 import datetime
+from unittest.mock import patch
 
-from app.models import Workshop
+import httpx
+from sqlalchemy import event
+
+from app.models import Workshop, SAMPLE_WORKSHOP_DATA
+from app.services.workshop_adapters import compile_template, get_workshop_adapter
+from app.services.workshop_registry import WorkshopRegistry, get_workshop_registry, bump_db_version
+from app.services.workshop_services import WORKSHOP_API_FIELDS, find_workshops
 
 
 NONEXISTENT_ID_WORKSHOP = 99999999
@@ -61,6 +68,7 @@ def test_add_workshop(client):
     assert data["city"] == "New City"
     assert data["is_active"]
     assert "id_workshop" in data
+    assert set(data) == set(WORKSHOP_API_FIELDS)
 
 
 def test_add_workshop_with_missing_data(client):
@@ -116,6 +124,7 @@ def test_update_workshop(client, sample_workshop):
     assert data["city"] == "Updated City"
     assert data["vehicle_types"] == "Truck"
     assert data["id_workshop"] == sample_workshop.id_workshop
+    assert set(data) == set(WORKSHOP_API_FIELDS)
 
 
 def test_update_workshop_invalid_vehicle_type(client, sample_workshop):
@@ -232,3 +241,131 @@ def test_multiple_workshops_filter_values(client, db_session):
     assert "Workshop B" in data["workshop_names"]
     assert len(data["cities"]) == 2
     assert len(data["workshop_names"]) == 2
+
+
+def test_workshop_reads_are_served_from_registry(client, sample_workshop):
+    """Repeated reads should load workshops from the database only once until a write happens"""
+    for _ in range(3):
+        assert client.get("/api/workshops/").status_code == 200
+        assert client.get("/api/workshops/filters").status_code == 200
+    assert get_workshop_registry().loads == 1
+
+    client.post("/api/workshops/", json=new_workshop_data)
+    workshops = client.get("/api/workshops/").json()
+    assert [w["name"] for w in workshops] == ["Sample Workshop", "New Workshop"]
+    assert get_workshop_registry().loads == 2
+
+    client.post(f"/api/workshops/{sample_workshop.id_workshop}/toggle-active")
+    assert client.get("/api/workshops/filters").json()["workshop_names"] == ["New Workshop"]
+
+    client.put(f"/api/workshops/{sample_workshop.id_workshop}", json={"name": "Renamed Workshop"})
+    assert client.get("/api/workshops/").json()[0]["name"] == "Renamed Workshop"
+
+
+def test_registry_detects_writes_from_other_processes(db_session, sample_workshop):
+    registry = WorkshopRegistry(version_check_interval=0)
+    assert len(registry.snapshot(db_session).workshops) == 1
+
+    # Another process adds a workshop and bumps the shared counter
+    db_session.add(Workshop(**SAMPLE_WORKSHOP_DATA | {"name": "Other Process Workshop"}))
+    db_session.commit()
+    assert len(registry.snapshot(db_session).workshops) == 1
+    bump_db_version(db_session)
+
+    assert len(registry.snapshot(db_session).workshops) == 2
+    assert registry.loads == 2
+
+
+def test_find_workshops_filters_in_sql(db_session):
+    """Filters should be case-insensitive and match any of the given cities and vehicle types"""
+    for name, city, vehicle_types in [("Alpha", "Tallinn", "Car"), ("Beta", "Tartu", "Car,Truck"), ("Gamma", "tartu", "Truck")]:
+        db_session.add(Workshop(**SAMPLE_WORKSHOP_DATA | {"name": name, "city": city, "vehicle_types": vehicle_types}))
+    db_session.add(Workshop(**SAMPLE_WORKSHOP_DATA | {"name": "Inactive", "city": "Tartu", "is_active": False}))
+    db_session.commit()
+
+    def names(**filters):
+        return [w.name for w in find_workshops(db_session, **filters)]
+
+    assert names() == ["Alpha", "Beta", "Gamma"]
+    assert names(cities="TARTU") == ["Beta", "Gamma"]
+    assert names(vehicle_types="truck") == ["Beta", "Gamma"]
+    assert names(vehicle_types="Car", cities="Tartu,Narva") == ["Beta"]
+    assert names(workshop_name="alpha") == ["Alpha"]
+
+
+def test_search_without_filters_does_not_query(db_session, sample_workshop):
+    find_workshops(db_session, cities="sample city")
+    statements = []
+
+    def listener(_connection, _cursor, statement, *_):
+        statements.append(statement)
+
+    event.listen(db_session.bind, "before_cursor_execute", listener)
+    try:
+        assert [w.name for w in find_workshops(db_session)] == ["Sample Workshop"]
+        assert statements == []
+        assert [w.name for w in find_workshops(db_session, cities="sample city")] == ["Sample Workshop"]
+        assert len(statements) == 1
+    finally:
+        event.remove(db_session.bind, "before_cursor_execute", listener)
+
+
+def test_vehicle_type_links_follow_updates(client, db_session, sample_workshop):
+    client.put(f"/api/workshops/{sample_workshop.id_workshop}", json={"vehicle_types": "Truck"})
+
+    assert [w.name for w in find_workshops(db_session, vehicle_types="car")] == []
+    assert [w.name for w in find_workshops(db_session, vehicle_types="truck")] == ["Sample Workshop"]
+
+
+def test_compile_template():
+    render = compile_template("http://api/{date_from}/{date_to!s}?page={page:03d}&x={{literal}}")
+    assert render(date_from=datetime.date(2025, 1, 2), date_to="b", page=7) == "http://api/2025-01-02/b?page=007&x={literal}"
+    assert render(date_from="a", date_to="b", page=1) == "http://api/a/b?page=001&x={literal}"
+
+
+def test_compiled_template_resolves_fields_like_str_format():
+    template = "http://api/{date_from.year}/{date_from:%m}/{dates[1]}?page={page:0{width}d}"
+    values = {"date_from": datetime.date(2025, 1, 2), "dates": ["a", "b"], "page": 7, "width": 3}
+    assert compile_template(template)(**values) == template.format(**values) == "http://api/2025/01/b?page=007"
+
+
+def test_adapter_builds_requests():
+    workshop = Workshop(id_workshop=1, **SAMPLE_WORKSHOP_DATA | {"booking_body": '{{"contactInformation": "{contact_info}"}}'})
+    adapter = get_workshop_adapter(workshop)
+
+    assert adapter.availability_url(datetime.date(2025, 1, 1), datetime.date(2025, 1, 8)) == \
+        "http://workshop_api/available/2025-01-01/2025-01-08"
+    assert adapter.booking_request("abc", "+123") == {
+        "method": "POST",
+        "url": "http://workshop_api/book/abc",
+        "data": '{"contactInformation": "+123"}',
+    }
+
+
+def test_adapter_is_compiled_once_per_row_version():
+    workshop = Workshop(id_workshop=1, **SAMPLE_WORKSHOP_DATA)
+    adapter = get_workshop_adapter(workshop)
+    assert get_workshop_adapter(workshop) is adapter
+
+    workshop.url_available_times = "http://other/{date_from}/{date_to}"
+    recompiled = get_workshop_adapter(workshop)
+    assert recompiled is not adapter
+    assert recompiled.availability_url("a", "b") == "http://other/a/b"
+
+
+def test_broken_url_template_only_fails_its_workshop(client, db_session, sample_workshop):
+    db_session.add(Workshop(**SAMPLE_WORKSHOP_DATA | {"name": "Broken", "url_available_times": "http://api/{unknown}"}))
+    db_session.commit()
+    today = datetime.date.today()
+
+    async def send(self, request, **kwargs):
+        return httpx.Response(200, json=[], request=request)
+
+    with patch("app.services.booking_services.httpx.AsyncClient.send", new=send):
+        response = client.get("/api/booking/available-times", params={
+            "date_from": today.isoformat(), "date_to": today.isoformat(), "deadline_ms": 5000
+        })
+
+    assert response.status_code == 200
+    statuses = {workshop["name"]: workshop["status"] for workshop in response.json()["workshops"]}
+    assert statuses == {"Sample Workshop": "ok", "Broken": "error"}